@@ -0,0 +1,196 @@
+"""
+Aggregate cube of the final table for the report's plots.
+
+results.qmd re-reads the full player table for every chart and regroups
+it each time (age curve, market efficiency by position, progression and
+defensive quadrant medians, club landscape). The cube holds those
+summaries precomputed in one small tidy table: one row per (dimension,
+group, metric) with the player count, mean, std, sum and quantiles.
+
+    dimension          rows                              grouped by
+    all                every player                      nothing (league-wide)
+    position           every player                      position_group
+    age_band           every player                      age_band (AGE_BANDS)
+    position_age_band  every player                      position_group x age_band (age curve facets)
+    club               every player                      club (team landscape)
+    position_category  every player                      position_group x valuation_category (mosaic)
+    prog_quadrant      FW/MF/DF, nineties >= 10          nothing (progression quadrant medians)
+    def_quadrant       DF/MF, nineties >= 10             nothing (defensive quadrant medians)
+    prime_targets      top 15 undervalued, age < 28,     player_name (market gap)
+                       nineties >= 16.7
+
+league_perf_pct and league_value_pct are the report's league-wide re-rank
+(dplyr percent_rank * 100 over every player), so the prime_targets rows
+carry each target's market gap. Columns a dimension does not group by are
+empty. pipeline.py and
+data_transform.py write the cube next to the final table; it can also be
+rebuilt on its own:
+
+    python aggregates.py --final epl_player_data_final_v2.csv --out epl_player_cube.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import data_transform
+from storage import read_table, write_table
+
+# ---------- CONFIG ----------
+
+CUBE_PATH = "epl_player_cube.csv"
+
+# Age band edges (left-closed) and labels
+AGE_EDGES = [0, 21, 24, 27, 30, 33, np.inf]
+AGE_BANDS = ["<21", "21-23", "24-26", "27-29", "30-32", "33+"]
+
+# League-wide percent ranks (0-100) the market gap plot re-computes
+LEAGUE_RANKS = {
+    "league_perf_pct": "performance_index",
+    "league_value_pct": "market_value_millions",
+}
+
+# Per-90 rates the report derives (numerator stats / nineties)
+RATE_METRICS = {
+    "goals_p90": ["goals"],
+    "npxg_p90": ["npxg"],
+    "prog_pass_p90": ["progressive_passes"],
+    "prog_carry_p90": ["progressive_carries"],
+    "aggression_p90": ["tackles_plus_interceptions"],
+    "protection_p90": ["blocks", "clearances"],
+}
+
+CUBE_METRICS = [
+    "performance_index", "market_value_millions", "undervaluation_delta",
+    "perf_rank_pct", "value_rank_pct", "league_perf_pct", "league_value_pct", "age", "nineties",
+    "raw_attacking", "raw_progression", "raw_creation", "raw_defensive", "raw_mistakes",
+] + list(RATE_METRICS)
+
+DIMENSIONS = {
+    "all": [],
+    "position": ["position_group"],
+    "age_band": ["age_band"],
+    "position_age_band": ["position_group", "age_band"],
+    "club": ["club"],
+    "position_category": ["position_group", "valuation_category"],
+    "prog_quadrant": [],
+    "def_quadrant": [],
+    "prime_targets": ["player_name"],
+}
+
+KEY_COLS = ["position_group", "age_band", "club", "valuation_category", "player_name"]
+QUANTILES = [0.1, 0.25, 0.5, 0.75, 0.9]
+
+# Prime targets: undervalued, under 28, proven starters, best 15 by index
+PRIME_TARGETS = {"age_below": 28, "min_nineties": 16.7, "top": 15}
+
+
+# ---------- FILTERS ----------
+
+def quadrant_rows(positions: list, min_nineties: float = 10):
+    """Row filter of a quadrant plot: these positions with enough minutes."""
+    def rows(df: pd.DataFrame) -> pd.Series:
+        return df["position_group"].isin(positions) & (df["nineties"] >= min_nineties)
+    return rows
+
+
+def prime_target_rows(df: pd.DataFrame) -> pd.Series:
+    """The report's shopping list (PRIME_TARGETS) as a row filter."""
+    eligible = df[(df["valuation_category"] == "Undervalued")
+                  & (df["age"] < PRIME_TARGETS["age_below"])
+                  & (df["nineties"] >= PRIME_TARGETS["min_nineties"])]
+    top = eligible["performance_index"].sort_values(ascending=False, kind="stable").head(PRIME_TARGETS["top"])
+    return df.index.isin(top.index)
+
+
+# Dimensions summarising only some rows (the others use every player)
+DIMENSION_ROWS = {
+    "prog_quadrant": quadrant_rows(["FW", "MF", "DF"]),
+    "def_quadrant": quadrant_rows(["DF", "MF"]),
+    "prime_targets": prime_target_rows,
+}
+
+
+# ---------- CUBE ----------
+
+def cube_frame(final: pd.DataFrame) -> pd.DataFrame:
+    """The final table's metric columns plus age_band and the per-90 rates."""
+    df = pd.DataFrame({col: final[col] for col in KEY_COLS if col in final.columns})
+    age = pd.to_numeric(final["age"], errors="coerce")
+    df["age_band"] = pd.cut(age, AGE_EDGES, labels=AGE_BANDS, right=False).astype(object)
+
+    nineties = pd.to_numeric(final["nineties"], errors="coerce").replace(0, np.nan)
+    for metric in CUBE_METRICS:
+        if metric in RATE_METRICS:
+            total = sum(pd.to_numeric(final[c], errors="coerce") for c in RATE_METRICS[metric])
+            df[metric] = total / nineties
+        elif metric in LEAGUE_RANKS:
+            df[metric] = percent_rank(pd.to_numeric(final[LEAGUE_RANKS[metric]], errors="coerce")) * 100
+        elif metric in final.columns:
+            df[metric] = pd.to_numeric(final[metric], errors="coerce")
+    return df
+
+
+def percent_rank(values: pd.Series) -> pd.Series:
+    """dplyr's percent_rank: (min rank - 1) / (non-missing values - 1)."""
+    return (values.rank(method="min") - 1) / (values.notna().sum() - 1)
+
+
+def summarize(long: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """Stats of every metric per group of keys, from the melted cube frame."""
+    grouped = long.groupby(keys + ["metric"], sort=True, dropna=False)["value"]
+    out = grouped.agg(players="size", n="count", mean="mean", std="std", sum="sum", min="min", max="max")
+    q = grouped.quantile(QUANTILES).unstack()
+    q.columns = ["median" if p == 0.5 else f"q{round(p * 100):02d}" for p in q.columns]
+    return out.join(q).reset_index()
+
+
+def build_cube(final: pd.DataFrame) -> pd.DataFrame:
+    """One row per (dimension, group, metric); see the module docstring."""
+    df = cube_frame(final)
+    metrics = [m for m in CUBE_METRICS if m in df.columns]
+    df["_all"] = "all"
+    id_vars = [c for c in KEY_COLS if c in df.columns] + ["_all"]
+
+    def melt(rows: pd.DataFrame) -> pd.DataFrame:
+        long = rows.melt(id_vars=id_vars, value_vars=metrics, var_name="metric")
+        long["metric"] = pd.Categorical(long["metric"], categories=metrics)
+        return long
+
+    every = melt(df)
+    parts = []
+    for dimension, keys in DIMENSIONS.items():
+        if not set(keys) <= set(df.columns):
+            continue
+        long = melt(df[DIMENSION_ROWS[dimension](df)]) if dimension in DIMENSION_ROWS else every
+        part = summarize(long, keys or ["_all"]).drop(columns="_all", errors="ignore")
+        part.insert(0, "dimension", dimension)
+        parts.append(part)
+
+    cube = pd.concat(parts, ignore_index=True)
+    cube["metric"] = cube["metric"].astype(str)
+    columns = ["dimension"] + [c for c in KEY_COLS if c in cube.columns] + ["metric"]
+    stats = [c for c in cube.columns if c not in columns]
+    return cube[columns + stats].round(4)
+
+
+def write_cube(final: pd.DataFrame, path: str = CUBE_PATH) -> pd.DataFrame:
+    cube = build_cube(final)
+    write_table(cube, path)
+    return cube
+
+
+# ---------- CLI ----------
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the report's aggregate cube from the final table.")
+    parser.add_argument("--final", default=data_transform.FINAL_PATH)
+    parser.add_argument("--out", default=CUBE_PATH, help="cube path (.csv, .parquet or .arrow)")
+    args = parser.parse_args()
+
+    cube = write_cube(read_table(args.final), args.out)
+    print(f"Wrote {len(cube)} cube rows ({cube['dimension'].nunique()} dimensions) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Batch mode: clean every (league, season, table) raw export under a
+directory tree in a process pool and write partitioned outputs.
+
+Expected layout (league / season folders, optionally hive-style):
+
+    raw/Premier League/2024-25/EPL_Shooting.csv
+    raw/league=La Liga/season=2023-24/Transfermkt.csv
+
+Outputs go to <out>/<table>/league=<league>/season=<season>/part.<ext>, and
+with --score to <out>/final/league=<league>/season=<season>/part.<ext>.
+league and season live in the directory names only, so a whole table
+reads back as one dataset: pd.read_parquet("out/final").
+
+    python batch.py raw/ out/ --format parquet --score
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import data_join
+import data_transform
+from pipeline import CLEAN_STAGES
+from storage import FORMAT_EXTENSIONS, read_partition, write_partition
+
+# ---------- CONFIG ----------
+
+# Lowercase filename fragment -> table name (first match wins)
+TABLE_PATTERNS = [
+    ("shoot", "shooting"),
+    ("pass", "passing"),
+    ("def", "defense"),
+    ("poss", "possession"),
+    ("transf", "transfermarkt"),
+]
+
+RAW_EXTENSIONS = (".csv", ".xls", ".xlsx")
+
+
+# ---------- DISCOVERY ----------
+
+def _label(dirname: str) -> str:
+    """'league=Premier League' -> 'Premier League'; plain names pass through."""
+    return dirname.split("=", 1)[1] if "=" in dirname else dirname
+
+
+def table_for(filename: str):
+    name = filename.lower()
+    for fragment, table in TABLE_PATTERNS:
+        if fragment in name:
+            return table
+    return None
+
+
+def discover(raw_root: str) -> list:
+    """
+    [(league, season, table, path)] for every recognised raw export two
+    levels down. Two exports of the same (league, season, table), e.g.
+    EPL_Shooting.csv next to EPL_Shooting_1.csv, would write the same
+    partition, so they are an error rather than a race.
+    """
+    partitions = []
+    for dirpath, _, filenames in os.walk(raw_root):
+        rel = os.path.relpath(dirpath, raw_root)
+        parts = [] if rel == "." else rel.split(os.sep)
+        if len(parts) != 2:
+            continue
+        league, season = _label(parts[0]), _label(parts[1])
+        for filename in sorted(filenames):
+            if not filename.lower().endswith(RAW_EXTENSIONS):
+                continue
+            table = table_for(filename)
+            if table is not None:
+                partitions.append((league, season, table, os.path.join(dirpath, filename)))
+
+    paths = {}
+    for league, season, table, path in partitions:
+        paths.setdefault((league, season, table), []).append(path)
+    clashes = [f"{table} of {league} {season}: {', '.join(sorted(found))}"
+               for (league, season, table), found in sorted(paths.items()) if len(found) > 1]
+    if clashes:
+        raise ValueError("More than one raw export per partition; keep one of each:\n  "
+                         + "\n  ".join(clashes))
+    return sorted(partitions)
+
+
+def partition_path(out_root: str, table: str, league: str, season: str, fmt: str) -> str:
+    return os.path.join(out_root, table, f"league={league}", f"season={season}",
+                        "part" + FORMAT_EXTENSIONS[fmt])
+
+
+# ---------- WORKERS ----------
+# Top-level so the pool can pickle them; each worker process imports pandas
+# and the cleaners once and then reuses them for every partition it gets.
+
+def clean_partition(league: str, season: str, table: str, path: str, out_root: str, fmt: str):
+    _, load, clean_table, _ = CLEAN_STAGES[table]
+    df = clean_table(load(path), season=season, league=league)
+    out_path = partition_path(out_root, table, league, season, fmt)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    write_partition(df, out_path, {"league": league, "season": season})
+    return out_path, len(df)
+
+
+def score_partition(league: str, season: str, out_root: str, fmt: str, weights: dict = None):
+    partition = {"league": league, "season": season}
+    tables = {t: read_partition(partition_path(out_root, t, league, season, fmt), partition)
+              for t in CLEAN_STAGES}
+    joined = data_join.join_tables(tables["shooting"], tables["passing"], tables["defense"],
+                                   tables["possession"], tables["transfermarkt"])
+    final = data_transform.transform(joined, weights)
+    out_path = partition_path(out_root, "final", league, season, fmt)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    write_partition(final, out_path, partition)
+    return out_path, len(final)
+
+
+# ---------- BATCH ----------
+
+def run_batch(raw_root: str, out_root: str, fmt: str = "parquet",
+              workers: int = None, score: bool = False, weights: dict = None) -> list:
+    """
+    Clean all discovered partitions in parallel (and optionally join + score
+    every complete league/season). Returns [(stage, output path, rows)].
+    """
+    partitions = discover(raw_root)
+    results = []
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = {
+            pool.submit(clean_partition, league, season, table, path, out_root, fmt): path
+            for league, season, table, path in partitions
+        }
+        for future in as_completed(futures):
+            out_path, rows = future.result()
+            results.append(("clean", out_path, rows))
+
+        if score:
+            found = {}
+            for league, season, table, _ in partitions:
+                found.setdefault((league, season), set()).add(table)
+            complete = [ls for ls, tables in found.items() if tables >= set(CLEAN_STAGES)]
+            for league, season in sorted(set(found) - set(complete)):
+                print(f"Skipping scoring for {league} {season}: missing "
+                      f"{sorted(set(CLEAN_STAGES) - found[(league, season)])}")
+
+            futures = [pool.submit(score_partition, league, season, out_root, fmt, weights)
+                       for league, season in sorted(complete)]
+            for future in as_completed(futures):
+                out_path, rows = future.result()
+                results.append(("score", out_path, rows))
+
+    return sorted(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean every league/season raw export in parallel.")
+    parser.add_argument("raw_root", help="directory holding <league>/<season>/<raw export>")
+    parser.add_argument("out_root", help="directory for the partitioned outputs")
+    parser.add_argument("--format", default="parquet", choices=sorted(FORMAT_EXTENSIONS))
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--score", action="store_true",
+                        help="also join and score every complete league/season")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        results = run_batch(args.raw_root, args.out_root, fmt=args.format,
+                            workers=args.workers, score=args.score)
+    except ValueError as e:
+        parser.error(str(e))
+    for stage, out_path, rows in results:
+        print(f"{stage:<6} {rows:>8} rows  {out_path}")
+    print(f"{len(results)} partitions in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Pipeline benchmark on synthetic exports (see synthetic.py).
+
+For every size, each stage (load+clean per table, join, transform) runs in
+a fresh worker process so its peak RSS is its own. Stage inputs are
+prepared up front as pickles and not timed. Results go to a JSON file
+that can be compared across commits.
+
+    python benchmark.py --sizes 1000 10000 100000 1000000 --out bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import pandas as pd
+
+import data_join
+import data_transform
+from instrument import peak_rss_mb
+from pipeline import CLEAN_STAGES
+from synthetic import write_exports
+
+# ---------- CONFIG ----------
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+# ---------- MEASUREMENT ----------
+
+def _run_stage(stage: str, inputs: dict, output: str) -> dict:
+    """Runs in a fresh process: load inputs, time the stage, pickle its output."""
+    frames = {name: pd.read_pickle(path) for name, path in inputs.items() if path.endswith(".pkl")}
+    rows_in = sum(len(df) for df in frames.values())
+    rss_before = peak_rss_mb()
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    if stage.startswith("clean:"):
+        table = stage.split(":", 1)[1]
+        _, load, clean_table, _ = CLEAN_STAGES[table]
+        raw = load(inputs["raw"])
+        rows_in = len(raw)
+        result = clean_table(raw)
+    elif stage == "join":
+        result = data_join.join_tables(frames["shooting"], frames["passing"], frames["defense"],
+                                       frames["possession"], frames["transfermarkt"])
+    else:
+        result = data_transform.transform(frames["joined"])
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+    result.to_pickle(output)
+    return {
+        "stage": stage,
+        "wall_s": round(wall, 4),
+        "cpu_s": round(cpu, 4),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "inputs_rss_mb": round(rss_before, 1),
+        "rows_in": rows_in,
+        "rows_out": len(result),
+    }
+
+
+def run_isolated(stage: str, inputs: dict, output: str) -> dict:
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(_run_stage, stage, inputs, output).result()
+
+
+# ---------- BENCHMARK ----------
+
+def bench_size(n: int, work_dir: str) -> list:
+    raw_dir = os.path.join(work_dir, f"raw_{n}")
+    start = time.perf_counter()
+    raw_paths = write_exports(n, raw_dir)
+    print(f"[{n}] generated exports in {time.perf_counter() - start:.1f}s")
+
+    def pkl(name):
+        return os.path.join(work_dir, f"{name}_{n}.pkl")
+
+    results = []
+    for table in CLEAN_STAGES:
+        results.append(run_isolated(f"clean:{table}", {"raw": raw_paths[table]}, pkl(table)))
+    results.append(run_isolated("join", {t: pkl(t) for t in CLEAN_STAGES}, pkl("joined")))
+    results.append(run_isolated("transform", {"joined": pkl("joined")}, pkl("final")))
+
+    for r in results:
+        r["players"] = n
+        print(f"[{n}] {r['stage']:<22} {r['wall_s']:9.3f}s wall {r['cpu_s']:9.3f}s cpu "
+              f"{r['peak_rss_mb']:9.1f} MB peak")
+    return results
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ETL stages on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="number of synthetic players per run")
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--work-dir", default=None,
+                        help="where to put generated exports (default: a temp dir)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = args.work_dir or tmp
+        os.makedirs(work_dir, exist_ok=True)
+        results = []
+        for n in args.sizes:
+            results.extend(bench_size(n, work_dir))
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} measurements to {os.path.abspath(args.out)}")
+
+
+if __name__ == "__main__":
+    main()
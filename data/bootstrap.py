@@ -0,0 +1,308 @@
+"""
+Bootstrap uncertainty for performance_index, perf_rank_pct and valuation_category.
+
+A player with 10 nineties and one with 38 get equally confident scores in
+the final table. Here every counting stat behind the raw features (goals,
+npxg, tackles + interceptions, ...) is redrawn as Poisson(observed total)
+for each replicate, the league is re-scored from the resampled totals
+(per-90 features, league z-scores, position weights, within-position
+percentiles and valuation cut-offs, as in data_transform), and the spread
+of the replicates gives each player's interval. Market values are not
+resampled, so value_rank_pct is fixed.
+
+Each batch of replicates is one set of (replicates x players) arrays, so
+the whole scoring runs vectorized across replicates; the batches are
+spread over a process pool. The batch size follows from the number of
+players and a memory budget (--memory-mb), and every batch has its own
+seed, so results do not depend on the number of workers. Batches are
+reduced as they arrive: a running mean and sum of squared deviations per
+player for the std, and for the interval only the tail order statistics
+np.quantile interpolates between (the smallest and largest
+(1 - confidence) / 2 * replicates values of each player), so memory grows
+with players x that tail rather than players x replicates. Players without
+a position_group have no within-position percentile and get no
+percentile interval or category shares.
+
+    python bootstrap.py --replicates 5000 --workers 4
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import data_transform
+from scoring import RAW_FEATURE_STATS, SCORE_FEATURES, build_weight_matrix, position_codes, raw_feature_arrays
+from storage import read_table
+from valuation import CATEGORIES, bin_codes, frame_thresholds
+
+# ---------- CONFIG ----------
+
+UNCERTAINTY_PATH = "epl_player_uncertainty.csv"
+DEFAULT_REPLICATES = 2000
+BATCH_REPLICATES = 250          # most replicates scored together in one worker call
+MEMORY_BUDGET_MB = 512          # working memory of one batch
+CONFIDENCE = 0.90               # central interval reported as *_lo / *_hi
+SEED = 42
+
+# Counting stats resampled with Poisson noise (everything the raw features sum)
+RESAMPLED_STATS = [col for cols in RAW_FEATURE_STATS.values() for col in cols]
+
+ID_COLS = ["player_name", "club", "season", "league", "position_group", "nineties"]
+
+# replicates x players float64 arrays alive at once in a batch: the resampled
+# stats, the raw features and the scoring / ranking temporaries
+ARRAYS_PER_REPLICATE = len(RESAMPLED_STATS) + 20
+
+
+# ---------- RANKING ----------
+
+def rank_pct(x: np.ndarray) -> np.ndarray:
+    """
+    rank(pct=True) of every row of x (replicates x players) at once:
+    average rank among ties, NaN left out of the ranking and the count.
+    """
+    rows, n = x.shape
+    order = np.argsort(x, axis=1, kind="stable")          # NaN sorts last
+    s = np.take_along_axis(x, order, axis=1)
+    pos = np.arange(n)
+
+    # first / last sorted position of each run of equal values
+    starts = np.ones((rows, n), dtype=bool)
+    starts[:, 1:] = s[:, 1:] != s[:, :-1]
+    ends = np.ones((rows, n), dtype=bool)
+    ends[:, :-1] = starts[:, 1:]
+    first = np.maximum.accumulate(np.where(starts, pos, 0), axis=1)
+    last = np.minimum.accumulate(np.where(ends, pos, n - 1)[:, ::-1], axis=1)[:, ::-1]
+
+    valid = (~np.isnan(x)).sum(axis=1, keepdims=True)
+    ranks = np.empty_like(x)
+    np.put_along_axis(ranks, order, (first + last) / 2 + 1, axis=1)
+    ranks = ranks / valid
+    ranks[np.isnan(x)] = np.nan
+    return ranks
+
+
+# ---------- REPLICATES ----------
+
+def replicate_batch(inputs: dict, replicates: int, seed) -> tuple:
+    """
+    Score replicates resampled leagues. Returns (performance_index,
+    perf_rank_pct), both replicates x players, and the per-player count of
+    replicates in each valuation category (len(CATEGORIES) x players).
+    """
+    rng = np.random.default_rng(seed)
+    n = len(inputs["nineties"])
+    stats = {"nineties": inputs["nineties"]}
+    for col, totals in inputs["totals"].items():
+        stats[col] = rng.poisson(totals, size=(replicates, n)).astype("float64")
+
+    # Per-90 features and league z-scores of each replicate (pandas' mean/std skip NaN)
+    raw = raw_feature_arrays(stats)
+    perf = np.zeros((replicates, n))
+    for j, feature in enumerate(SCORE_FEATURES):
+        values = raw[feature[len("z_"):]]
+        z = (values - np.nanmean(values, axis=1, keepdims=True)) / np.nanstd(values, axis=1, ddof=1, keepdims=True)
+        perf += inputs["row_weights"][:, j] * z
+
+    # players without a position_group are in no group and stay unranked
+    pct = np.full_like(perf, np.nan)
+    for cols in inputs["groups"]:
+        pct[:, cols] = rank_pct(perf[:, cols])
+
+    codes = bin_codes(pct - inputs["value_pct"], inputs["upper"], inputs["lower"])
+    codes[:, ~inputs["ranked"]] = -1
+    counts = np.stack([(codes == c).sum(axis=0) for c in range(len(CATEGORIES))])
+    return perf, pct, counts
+
+
+def _run_batch(args):
+    return replicate_batch(*args)
+
+
+def bootstrap_inputs(final: pd.DataFrame, weights: dict = None, thresholds: dict = None) -> dict:
+    """Arrays one replicate batch needs, from the final table (transform output)."""
+    nineties = final["nineties"].to_numpy(dtype="float64")
+    totals = {}
+    for col in RESAMPLED_STATS:
+        values = final[col].to_numpy(dtype="float64") if col in final.columns else np.zeros(len(final))
+        # Poisson needs a non-negative rate; missing stats count as 0, as in the transform
+        totals[col] = np.clip(np.nan_to_num(values, nan=0.0), 0, None)
+
+    groups, matrix = build_weight_matrix(weights)
+    codes, positions = pd.factorize(final["position_group"])
+    upper, lower = frame_thresholds(final, thresholds)
+    return {
+        "nineties": nineties,
+        "totals": totals,
+        "row_weights": matrix[position_codes(final["position_group"], groups)],
+        "groups": [np.flatnonzero(codes == i) for i in range(len(positions))],
+        "ranked": codes >= 0,
+        # value_rank_pct before rounding; market values are not resampled
+        "value_pct": final.groupby("position_group")["market_value_millions"].rank(pct=True).to_numpy(dtype="float64"),
+        "upper": upper,
+        "lower": lower,
+    }
+
+
+def replicate_block(n: int, budget_mb: float = MEMORY_BUDGET_MB) -> int:
+    """Replicates per batch so one batch's arrays over n players fit in budget_mb."""
+    per_replicate = max(n, 1) * 8 * ARRAYS_PER_REPLICATE
+    return int(max(1, min(BATCH_REPLICATES, budget_mb * 1024 ** 2 // per_replicate)))
+
+
+# ---------- SUMMARY ----------
+
+class RunningSummary:
+    """
+    Per-player std and central interval of replicates x players batches,
+    equal to np.std(ddof=1) / np.quantile (or np.nanquantile with skipna)
+    over all the replicates stacked, without keeping them.
+    """
+
+    def __init__(self, replicates: int, confidence: float, skipna: bool = False):
+        self.tail = (1 - confidence) / 2
+        # np.quantile reads positions floor / ceil of tail * (valid - 1) from each end
+        self.keep = min(replicates, int(self.tail * (replicates - 1)) + 3)
+        self.skipna = skipna
+        self.count = self.mean = self.m2 = self.valid = self.low = self.high = None
+
+    def add(self, values: np.ndarray):
+        # Chan et al.'s pairwise update of count, mean and squared deviations
+        n = len(values)
+        mean = values.mean(axis=0)
+        m2 = ((values - mean) ** 2).sum(axis=0)
+        valid = (~np.isnan(values)).sum(axis=0)
+        if self.count is None:
+            self.count, self.mean, self.m2, self.valid = n, mean, m2, valid
+            low, high = values, values
+        else:
+            total = self.count + n
+            delta = mean - self.mean
+            self.m2 = self.m2 + m2 + delta ** 2 * self.count * n / total
+            self.mean = self.mean + delta * n / total
+            self.count, self.valid = total, self.valid + valid
+            low, high = np.concatenate([self.low, values]), np.concatenate([self.high, values])
+        # NaN sorts last either way, so the tails keep valid values first
+        self.low = np.sort(low, axis=0)[:self.keep]
+        self.high = -np.sort(-high, axis=0)[:self.keep]
+
+    def std(self) -> np.ndarray:
+        if self.count < 2:
+            return np.full_like(self.mean, np.nan)
+        return np.sqrt(self.m2 / (self.count - 1))
+
+    def interval(self) -> tuple:
+        """(lo, hi) quantiles at tail and 1 - tail, linear interpolation."""
+        valid = self.valid
+        cols = np.arange(len(valid))
+        last = np.maximum(valid - 1, 0)
+
+        def at(pos, pick):
+            i = np.floor(pos).astype(int)
+            a, b = pick(i), pick(np.minimum(i + 1, last))
+            return a + (b - a) * (pos - i)
+
+        lo = at(self.tail * last, lambda i: self.low[i, cols])
+        hi = at((1 - self.tail) * last, lambda i: self.high[last - i, cols])
+        missing = valid == 0 if self.skipna else valid < self.count
+        lo[missing], hi[missing] = np.nan, np.nan
+        return lo, hi
+
+
+def bootstrap(final: pd.DataFrame, replicates: int = DEFAULT_REPLICATES, weights: dict = None,
+              thresholds: dict = None, workers: int = None, seed: int = SEED,
+              confidence: float = CONFIDENCE, budget_mb: float = MEMORY_BUDGET_MB) -> pd.DataFrame:
+    """
+    Per-player bootstrap intervals for the final table (data_transform's
+    output, scored with the same weights and thresholds). Replicate batches
+    (sized by replicate_block) run in a process pool of workers (default:
+    one per CPU).
+    """
+    final = final.reset_index(drop=True)
+    inputs = bootstrap_inputs(final, weights, thresholds)
+    block = replicate_block(len(final), budget_mb)
+    sizes = [min(block, replicates - start) for start in range(0, replicates, block)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(inputs, size, s) for size, s in zip(sizes, seeds)]
+
+    ranked = inputs["ranked"]
+    perf = RunningSummary(replicates, confidence)
+    pct = RunningSummary(replicates, confidence, skipna=True)
+    counts = 0
+
+    def reduce(results):
+        nonlocal counts
+        for batch_perf, batch_pct, batch_counts in results:
+            perf.add(batch_perf)
+            pct.add(batch_pct[:, ranked])
+            counts = counts + batch_counts
+
+    workers = workers or os.cpu_count()
+    if workers == 1 or len(tasks) == 1:
+        reduce(_run_batch(task) for task in tasks)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            reduce(pool.map(_run_batch, tasks))
+    shares = counts / replicates
+
+    out = final[[c for c in ID_COLS if c in final.columns]].copy()
+    out["performance_index"] = final["performance_index"]
+    out["performance_index_std"] = perf.std()
+    out["performance_index_lo"], out["performance_index_hi"] = perf.interval()
+    out["perf_rank_pct"] = final["perf_rank_pct"]
+    out["perf_rank_pct_lo"], out["perf_rank_pct_hi"] = np.nan, np.nan
+    if ranked.any():
+        lo, hi = pct.interval()
+        out.loc[ranked, "perf_rank_pct_lo"], out.loc[ranked, "perf_rank_pct_hi"] = lo, hi
+    out["valuation_category"] = final["valuation_category"]
+
+    # Stability: share of replicates that land in the table's category
+    shares[:, ~ranked] = np.nan
+    point = pd.Categorical(final["valuation_category"], categories=CATEGORIES).codes
+    out["category_stability"] = np.where(point >= 0, shares[np.maximum(point, 0), np.arange(len(final))], np.nan)
+    for c, label in enumerate(CATEGORIES):
+        out[f"share_{label.lower().replace(' ', '_')}"] = shares[c]
+
+    value_cols = [c for c in out.columns if c not in ID_COLS and c != "valuation_category"]
+    out[value_cols] = out[value_cols].round(4)
+    return out
+
+
+# ---------- CLI ----------
+
+def main():
+    from scoring import load_weights
+    from valuation import load_thresholds
+
+    parser = argparse.ArgumentParser(description="Bootstrap intervals for the performance index and valuation.")
+    parser.add_argument("--final", default=data_transform.FINAL_PATH)
+    parser.add_argument("--out", default=UNCERTAINTY_PATH)
+    parser.add_argument("--replicates", type=int, default=DEFAULT_REPLICATES)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--confidence", type=float, default=CONFIDENCE)
+    parser.add_argument("--weights", default=None, help="JSON weight table the final table was scored with")
+    parser.add_argument("--thresholds", default=None, help="JSON valuation thresholds the final table used")
+    parser.add_argument("--memory-mb", type=float, default=MEMORY_BUDGET_MB,
+                        help="working memory per batch of replicates")
+    args = parser.parse_args()
+    if args.replicates < 1:
+        parser.error("--replicates must be at least 1")
+
+    start = time.perf_counter()
+    final = read_table(args.final)
+    result = bootstrap(final, args.replicates,
+                       weights=load_weights(args.weights) if args.weights else None,
+                       thresholds=load_thresholds(args.thresholds) if args.thresholds else None,
+                       workers=args.workers, seed=args.seed, confidence=args.confidence,
+                       budget_mb=args.memory_mb)
+    result.to_csv(args.out, index=False, encoding="utf-8-sig")
+    print(f"Bootstrapped {len(result)} players x {args.replicates} replicates "
+          f"in {time.perf_counter() - start:.1f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+# ---------- CONFIG ----------
+
+# Always stored as categoricals when present
+CATEGORY_COLS = [
+    "season", "league", "club", "club_key", "club_final", "club_tm",
+    "position", "position_group", "nation_code", "nation_raw", "nation",
+    "valuation_category",
+]
+
+# Other text columns become categoricals below this distinct/rows ratio
+CATEGORY_MAX_RATIO = 0.5
+
+# Suffixes the joins add to columns that every FBref table carries
+JOIN_SUFFIXES = ("_pass", "_def", "_poss")
+
+# float32 keeps ~7 significant digits; larger magnitudes (e.g. euros) stay float64
+FLOAT32_MAX_ABS = 2 ** 24
+
+
+# ---------- HELPERS ----------
+
+def redundant_suffix_cols(df: pd.DataFrame) -> list:
+    """
+    Join-suffixed columns (age_pass, nineties_poss, position_group_def, ...)
+    that only repeat their base column: equal wherever they are present.
+    """
+    redundant = []
+    for col in df.columns:
+        for suffix in JOIN_SUFFIXES:
+            base = col[: -len(suffix)]
+            if col.endswith(suffix) and base in df.columns:
+                dup = df[col]
+                same = dup.isna() | (dup.astype(object) == df[base].astype(object))
+                if same.all():
+                    redundant.append(col)
+                break
+    return redundant
+
+
+def _is_integral(values: pd.Series) -> bool:
+    finite = values.dropna()
+    return bool(np.all(np.mod(finite.to_numpy(), 1) == 0))
+
+
+def compact_column(s: pd.Series) -> pd.Series:
+    if pd.api.types.is_bool_dtype(s):
+        return s
+
+    if pd.api.types.is_integer_dtype(s):
+        return pd.to_numeric(s, downcast="integer")
+
+    if pd.api.types.is_float_dtype(s):
+        # counts stored as float64 (tackles, touches, ...) -> smallest int
+        if s.notna().all() and _is_integral(s):
+            return pd.to_numeric(s, downcast="integer")
+        if s.abs().max(skipna=True) < FLOAT32_MAX_ABS or s.isna().all():
+            return s.astype("float32")
+        return s
+
+    if pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s):
+        if s.name in CATEGORY_COLS or s.nunique(dropna=True) <= CATEGORY_MAX_RATIO * len(s):
+            return s.astype("category")
+    return s
+
+
+# ---------- COMPACT SCHEMA ----------
+
+def compact_frame(df: pd.DataFrame, drop_duplicates: bool = True):
+    """
+    Memory-compact copy of a clean / joined / final table: categoricals for
+    repeated strings, downcast integers, float32 stats and no redundant
+    join-suffix columns. Returns (compact frame, report dict).
+    """
+    before = int(df.memory_usage(deep=True).sum())
+
+    dropped = redundant_suffix_cols(df) if drop_duplicates else []
+    out = df.drop(columns=dropped)
+    out = pd.DataFrame({col: compact_column(out[col]) for col in out.columns}, index=out.index)
+
+    after = int(out.memory_usage(deep=True).sum())
+    report = {
+        "rows": len(df),
+        "bytes_before": before,
+        "bytes_after": after,
+        "saved_pct": round(100 * (1 - after / before), 1) if before else 0.0,
+        "dropped_columns": dropped,
+    }
+    return out, report
+
+
+def format_report(name: str, report: dict) -> str:
+    mb = 1024 ** 2
+    return (f"{name}: {report['bytes_before'] / mb:.2f} MB -> {report['bytes_after'] / mb:.2f} MB "
+            f"({report['saved_pct']}% saved, {len(report['dropped_columns'])} duplicate columns dropped)")
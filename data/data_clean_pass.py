@@ -1,82 +1,22 @@
 import pandas as pd
-import unicodedata
 import os
 
+from derive import nation_codes, position_groups
+from instrument import RunLog, traced
+from keys import normalize_keys, standardize_clubs
+from loader import load_raw
+from schemas import TableSchema
+
 # ---------- CONFIG ----------
 RAW_PASSING_PATH = "EPL_Passing.csv"          # update if needed
 CLEAN_PASSING_PATH = "epl_passing_clean.csv"
 SEASON_LABEL = "2024-25"                      # change if different season
 LEAGUE_LABEL = "Premier League"
 
-CLUB_MAP_FBREF_TO_CANON = {
-    "Ipswich Town": "Ipswich",
-    "Leicester City": "Leicester",
-    "Manchester City": "Man City",
-    "Manchester Utd": "Man Utd",
-    "Newcastle Utd": "Newcastle",
-    "Nott'ham Forest": "Nottm Forest"
-}
-
-def standardize_club_fbref(club):
-    if pd.isna(club):
-        return club
-    club = str(club).strip()
-    return CLUB_MAP_FBREF_TO_CANON.get(club, club)
-
-
-# ---------- HELPER FUNCTIONS ----------
-
-def normalize_name(s: str) -> str:
-    """Lowercase, strip, and remove accents for robust joining."""
-    if pd.isna(s):
-        return ""
-    s = str(s).strip().lower()
-    s = "".join(
-        c for c in unicodedata.normalize("NFKD", s)
-        if not unicodedata.combining(c)
-    )
-    return s
-
-def extract_country_code(nation: str) -> str:
-    """
-    From values like 'eng ENG', 'ci CIV', 'br BRA',
-    keep only the uppercase 3-letter code (ENG, CIV, BRA).
-    """
-    if pd.isna(nation):
-        return ""
-    parts = str(nation).split()
-    last = parts[-1]
-    return "".join(ch for ch in last if ch.isupper())
-
-
-# ---------- ROBUST LOAD (LIKE SHOOTING SCRIPT) ----------
-
-input_file = RAW_PASSING_PATH
-
-try:
-    print(f"Attempting to read '{input_file}' as UTF-8 CSV...")
-    pass_raw = pd.read_csv(input_file, encoding="utf-8")
-except UnicodeDecodeError:
-    print("UTF-8 read failed. Trying with 'latin-1'...")
-    pass_raw = pd.read_csv(input_file, encoding="latin-1")
-except pd.errors.ParserError:
-    print("CSV parsing failed. Trying read_excel()...")
-    pass_raw = pd.read_excel(input_file)
-
-print("Raw columns:", list(pass_raw.columns))
 
+# ---------- RENAME MAP & NUMERIC COLUMNS ----------
 
-# ---------- DROP CLEARLY UNNEEDED COLUMNS ----------
-
-cols_to_drop = ["Rk", "Born"]
-for col in cols_to_drop:
-    if col in pass_raw.columns:
-        pass_raw = pass_raw.drop(columns=col)
-
-
-# ---------- RENAME COLUMNS TO SNAKE_CASE ----------
-
-rename_map = {
+RENAME_MAP = {
     "Player": "player_name",
     "Nation": "nation",
     "Pos": "position",
@@ -108,18 +48,7 @@ rename_map = {
     "PrgP": "progressive_passes",
 }
 
-pass_df = pass_raw.rename(columns=rename_map)
-
-
-# ---------- ADD SEASON & LEAGUE ----------
-
-pass_df["season"] = SEASON_LABEL
-pass_df["league"] = LEAGUE_LABEL
-
-
-# ---------- ENSURE NUMERIC TYPES ----------
-
-numeric_cols = [
+NUMERIC_COLS = [
     "age", "nineties",
     "passes_completed_total", "passes_attempted_total",
     "pass_completion_total_pct",
@@ -136,49 +65,78 @@ numeric_cols = [
     "progressive_passes",
 ]
 
-for col in numeric_cols:
-    if col in pass_df.columns:
-        pass_df[col] = pd.to_numeric(pass_df[col], errors="coerce")
+# Column names, ranges and header aliases, compiled once (see schemas.py)
+SCHEMA = TableSchema("passing", RENAME_MAP, NUMERIC_COLS)
+
+
+# ---------- ROBUST LOAD (LIKE SHOOTING SCRIPT) ----------
+
+def load_passing(input_file: str = RAW_PASSING_PATH) -> pd.DataFrame:
+    """Sniff encoding, FBref title row and CSV vs Excel, then parse once."""
+    return load_raw(input_file, RENAME_MAP, NUMERIC_COLS)
+
+
+@traced
+def clean_passing(pass_raw: pd.DataFrame,
+                  season: str = SEASON_LABEL,
+                  league: str = LEAGUE_LABEL) -> pd.DataFrame:
+    """Raw FBref passing export -> one tidy row per player/club."""
+
+    # ---------- CHECK HEADER AGAINST THE SCHEMA ----------
+
+    pass_raw = SCHEMA.check_header(pass_raw)
+
+    # ---------- DROP CLEARLY UNNEEDED COLUMNS ----------
+
+    cols_to_drop = ["Rk", "Born"]
+    pass_raw = pass_raw.drop(columns=[c for c in cols_to_drop if c in pass_raw.columns])
+
+    # ---------- RENAME COLUMNS TO SNAKE_CASE ----------
+
+    pass_df = pass_raw.rename(columns=RENAME_MAP)
+
+    # ---------- ADD SEASON & LEAGUE ----------
+
+    pass_df["season"] = season
+    pass_df["league"] = league
+
+    # ---------- ENSURE NUMERIC TYPES ----------
+
+    SCHEMA.validate(pass_df)
 
+    # ---------- KEYS, NATION CODE, POSITION GROUP ----------
 
-# ---------- KEYS, NATION CODE, POSITION GROUP ----------
+    # Keep original accented name for display (player_name)
+    # Use accent-stripped, lowercase key for joins
 
-# Keep original accented name for display (player_name)
-# Use accent-stripped, lowercase key for joins
+    pass_df["player_key"] = normalize_keys(pass_df["player_name"])
+    pass_df["club"] = standardize_clubs(pass_df["club"])
+    pass_df["club_key"] = normalize_keys(pass_df["club"])
 
-pass_df["player_key"] = pass_df["player_name"].apply(normalize_name)
-pass_df["club"] = pass_df["club"].apply(standardize_club_fbref)
-pass_df["club_key"] = pass_df["club"].apply(normalize_name)
+    # Only the CAPS part of Nation
+    if "nation" in pass_df.columns:
+        pass_df["nation_code"] = nation_codes(pass_df["nation"])
 
-# Only the CAPS part of Nation
-if "nation" in pass_df.columns:
-    pass_df["nation_code"] = pass_df["nation"].apply(extract_country_code)
+    pass_df["position_group"] = position_groups(pass_df["position"])
 
-def position_group(pos: str) -> str:
-    if pd.isna(pos):
-        return "Other"
-    pos = str(pos)
-    if "GK" in pos:
-        return "GK"
-    if "DF" in pos:
-        return "DF"
-    if "MF" in pos:
-        return "MF"
-    if "FW" in pos:
-        return "FW"
-    return "Other"
+    # ---------- OPTIONAL FILTER: DROP 0 MINUTES ----------
 
-pass_df["position_group"] = pass_df["position"].apply(position_group)
+    if "nineties" in pass_df.columns:
+        pass_df = pass_df[pass_df["nineties"] > 0]
 
+    return pass_df
 
-# ---------- OPTIONAL FILTER: DROP 0 MINUTES ----------
 
-if "nineties" in pass_df.columns:
-    pass_df = pass_df[pass_df["nineties"] > 0]
+if __name__ == "__main__":
+    with RunLog.from_env("data_clean_pass.py") as run:
+        pass_raw = load_passing(RAW_PASSING_PATH)
+        print("Raw columns:", list(pass_raw.columns))
 
+        pass_df = clean_passing(pass_raw)
 
-# ---------- SAVE WITH UTF-8-SIG (LIKE SHOOTING SCRIPT) ----------
+        # ---------- SAVE WITH UTF-8-SIG (LIKE SHOOTING SCRIPT) ----------
 
-pass_df.to_csv(CLEAN_PASSING_PATH, index=False, encoding="utf-8-sig")
-print(f"Saved cleaned passing data to: {os.path.abspath(CLEAN_PASSING_PATH)}")
-print(pass_df.head())
+        with run.stage("write", pass_df):
+            pass_df.to_csv(CLEAN_PASSING_PATH, index=False, encoding="utf-8-sig")
+        print(f"Saved cleaned passing data to: {os.path.abspath(CLEAN_PASSING_PATH)}")
+        print(pass_df.head())
@@ -1,7 +1,12 @@
 import pandas as pd
-import unicodedata
 import os
 
+from derive import nation_codes, position_groups
+from instrument import RunLog, traced
+from keys import normalize_keys, standardize_clubs
+from loader import load_raw
+from schemas import TableSchema
+
 # ---------- CONFIG ----------
 RAW_POSSESSION_PATH = "EPL_Possession.csv"          # update if needed
 CLEAN_POSSESSION_PATH = "epl_possession_clean.csv"
@@ -9,97 +14,9 @@ SEASON_LABEL = "2024-25"                            # set to your season
 LEAGUE_LABEL = "Premier League"
 
 
-# ---------- HELPER FUNCTIONS ----------
-
-def normalize_name(s: str) -> str:
-    """Lowercase, strip, and remove accents for robust joining."""
-    if pd.isna(s):
-        return ""
-    s = str(s).strip().lower()
-    s = "".join(
-        c for c in unicodedata.normalize("NFKD", s)
-        if not unicodedata.combining(c)
-    )
-    return s
-
-def extract_country_code(nation: str) -> str:
-    """
-    From values like 'eng ENG', 'ci CIV', 'br BRA',
-    keep only the uppercase 3-letter code (ENG, CIV, BRA).
-    """
-    if pd.isna(nation):
-        return ""
-    parts = str(nation).split()
-    last = parts[-1]
-    return "".join(ch for ch in last if ch.isupper())
-
-def position_group(pos: str) -> str:
-    if pd.isna(pos):
-        return "Other"
-    pos = str(pos)
-    if "GK" in pos:
-        return "GK"
-    if "DF" in pos:
-        return "DF"
-    if "MF" in pos:
-        return "MF"
-    if "FW" in pos:
-        return "FW"
-    return "Other"
-
-
-CLUB_MAP_FBREF_TO_CANON = {
-    "Ipswich Town": "Ipswich",
-    "Leicester City": "Leicester",
-    "Manchester City": "Man City",
-    "Manchester Utd": "Man Utd",
-    "Newcastle Utd": "Newcastle",
-    "Nott'ham Forest": "Nottm Forest"
-}
-
-def standardize_club_fbref(club):
-    if pd.isna(club):
-        return club
-    club = str(club).strip()
-    return CLUB_MAP_FBREF_TO_CANON.get(club, club)
-
-
-
-# ---------- ROBUST LOAD ----------
-
-input_file = RAW_POSSESSION_PATH
-
-try:
-    print(f"Attempting to read '{input_file}' as UTF-8 CSV...")
-    poss_raw = pd.read_csv(input_file,header=1,  encoding="utf-8")
-except UnicodeDecodeError:
-    print("UTF-8 read failed. Trying with 'latin-1'...")
-    poss_raw = pd.read_csv(input_file, header=1, encoding="latin-1")
-except pd.errors.ParserError:
-    print("CSV parsing failed. Trying read_excel()...")
-    poss_raw = pd.read_excel(input_file, header=1)
-
-print("Raw columns:", list(poss_raw.columns))
-
+# ---------- RENAME MAP & NUMERIC COLUMNS ----------
 
-# ---------- DROP UNNEEDED COLUMNS ----------
-
-cols_to_drop = ["Rk", "Matches"]
-for col in cols_to_drop:
-    if col in poss_raw.columns:
-        poss_raw = poss_raw.drop(columns=col)
-
-
-# ---------- NATION CODE ----------
-
-if "Nation" in poss_raw.columns:
-    poss_raw["Nation"] = poss_raw["Nation"].astype(str)
-    poss_raw["nation_code"] = poss_raw["Nation"].apply(extract_country_code)
-
-
-# ---------- RENAME COLUMNS TO SNAKE_CASE ----------
-
-rename_map = {
+RENAME_MAP = {
     "Player": "player_name",
     "Nation": "nation_raw",
     "Pos": "position",
@@ -131,18 +48,7 @@ rename_map = {
     "PrgR": "progressive_passes_received",
 }
 
-poss_df = poss_raw.rename(columns=rename_map)
-
-
-# ---------- ADD SEASON & LEAGUE ----------
-
-poss_df["season"] = SEASON_LABEL
-poss_df["league"] = LEAGUE_LABEL
-
-
-# ---------- NUMERIC CONVERSION ----------
-
-numeric_cols = [
+NUMERIC_COLS = [
     "age", "nineties",
     "touches", "touches_def_pen", "touches_def_3rd", "touches_mid_3rd",
     "touches_att_3rd", "touches_att_pen", "touches_live",
@@ -154,32 +60,81 @@ numeric_cols = [
     "passes_received", "progressive_passes_received",
 ]
 
-existing_numeric = [c for c in numeric_cols if c in poss_df.columns]
+# Column names, ranges and header aliases, compiled once (see schemas.py)
+SCHEMA = TableSchema("possession", RENAME_MAP, NUMERIC_COLS)
+
+
+# ---------- ROBUST LOAD ----------
+
+def load_possession(input_file: str = RAW_POSSESSION_PATH) -> pd.DataFrame:
+    """Sniff encoding, FBref title row and CSV vs Excel, then parse once."""
+    return load_raw(input_file, RENAME_MAP, NUMERIC_COLS)
+
+
+@traced
+def clean_possession(poss_raw: pd.DataFrame,
+                     season: str = SEASON_LABEL,
+                     league: str = LEAGUE_LABEL) -> pd.DataFrame:
+    """Raw FBref possession export -> one tidy row per player/club."""
+
+    # ---------- CHECK HEADER AGAINST THE SCHEMA ----------
+
+    poss_raw = SCHEMA.check_header(poss_raw)
+
+    # ---------- DROP UNNEEDED COLUMNS ----------
+
+    cols_to_drop = ["Rk", "Matches"]
+    poss_raw = poss_raw.drop(columns=[c for c in cols_to_drop if c in poss_raw.columns])
+
+    # ---------- NATION CODE ----------
+
+    if "Nation" in poss_raw.columns:
+        poss_raw["Nation"] = poss_raw["Nation"].astype(str)
+        poss_raw["nation_code"] = nation_codes(poss_raw["Nation"])
+
+    # ---------- RENAME COLUMNS TO SNAKE_CASE ----------
+
+    poss_df = poss_raw.rename(columns=RENAME_MAP)
+
+    # ---------- ADD SEASON & LEAGUE ----------
+
+    poss_df["season"] = season
+    poss_df["league"] = league
+
+    # ---------- NUMERIC CONVERSION ----------
+
+    existing_numeric = [c for c in NUMERIC_COLS if c in poss_df.columns]
+    SCHEMA.validate(poss_df)
 
-for col in existing_numeric:
-    poss_df[col] = pd.to_numeric(poss_df[col], errors="coerce")
+    # Optional: fill NaNs with 0 for stats (but not Age)
+    cols_to_fill_zero = [c for c in existing_numeric if c != "age"]
+    poss_df[cols_to_fill_zero] = poss_df[cols_to_fill_zero].fillna(0)
 
-# Optional: fill NaNs with 0 for stats (but not Age)
-cols_to_fill_zero = [c for c in existing_numeric if c != "age"]
-poss_df[cols_to_fill_zero] = poss_df[cols_to_fill_zero].fillna(0)
+    # ---------- KEYS & POSITION GROUP ----------
 
+    poss_df["player_key"] = normalize_keys(poss_df["player_name"])
+    poss_df["club"] = standardize_clubs(poss_df["club"])
+    poss_df["club_key"] = normalize_keys(poss_df["club"])
+    poss_df["position_group"] = position_groups(poss_df["position"])
 
-# ---------- KEYS & POSITION GROUP ----------
+    # ---------- OPTIONAL FILTER: DROP 0 MINUTES ----------
 
-poss_df["player_key"] = poss_df["player_name"].apply(normalize_name)
-poss_df["club"] = poss_df["club"].apply(standardize_club_fbref)
-poss_df["club_key"] = poss_df["club"].apply(normalize_name)
-poss_df["position_group"] = poss_df["position"].apply(position_group)
+    if "nineties" in poss_df.columns:
+        poss_df = poss_df[poss_df["nineties"] > 0]
 
+    return poss_df
 
-# ---------- OPTIONAL FILTER: DROP 0 MINUTES ----------
 
-if "nineties" in poss_df.columns:
-    poss_df = poss_df[poss_df["nineties"] > 0]
+if __name__ == "__main__":
+    with RunLog.from_env("data_clean_possess.py") as run:
+        poss_raw = load_possession(RAW_POSSESSION_PATH)
+        print("Raw columns:", list(poss_raw.columns))
 
+        poss_df = clean_possession(poss_raw)
 
-# ---------- SAVE CLEAN FILE ----------
+        # ---------- SAVE CLEAN FILE ----------
 
-poss_df.to_csv(CLEAN_POSSESSION_PATH, index=False, encoding="utf-8-sig")
-print(f"Saved cleaned possession data to: {os.path.abspath(CLEAN_POSSESSION_PATH)}")
-print(poss_df.head())
+        with run.stage("write", poss_df):
+            poss_df.to_csv(CLEAN_POSSESSION_PATH, index=False, encoding="utf-8-sig")
+        print(f"Saved cleaned possession data to: {os.path.abspath(CLEAN_POSSESSION_PATH)}")
+        print(poss_df.head())
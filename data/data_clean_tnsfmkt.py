@@ -1,8 +1,11 @@
 import pandas as pd
-import unicodedata
-import re
 import os
 
+from instrument import RunLog, traced
+from keys import normalize_keys
+from loader import load_raw
+from schemas import TableSchema
+
 # ---------- CONFIG ----------
 RAW_TM_PATH = "Transfermkt.csv"              # your file
 CLEAN_TM_PATH = "epl_tm_clean.csv"
@@ -12,95 +15,119 @@ LEAGUE_LABEL = "Premier League"
 
 # ---------- HELPER FUNCTIONS ----------
 
-def normalize_name(s: str) -> str:
-    """Lowercase, strip, and remove accents for robust joining."""
-    if pd.isna(s):
-        return ""
-    s = str(s).strip().lower()
-    s = "".join(
-        c for c in unicodedata.normalize("NFKD", s)
-        if not unicodedata.combining(c)
-    )
-    return s
-
-def parse_market_value(v):
-    """Convert '€150.00m' / '€10.00m' / '€800k' to numeric euros."""
-    if pd.isna(v):
-        return None
-    s = str(v).strip().lower()
-    # remove euro sign, spaces, commas
-    s = s.replace("€", "").replace(",", "").strip()
-    multiplier = 1.0
-    if s.endswith("m"):
-        multiplier = 1e6
-        s = s[:-1]
-    elif s.endswith("k"):
-        multiplier = 1e3
-        s = s[:-1]
-    # keep only digits and dot
-    s = re.sub(r"[^0-9.]", "", s)
-    if not s:
-        return None
-    try:
-        return float(s) * multiplier
-    except ValueError:
-        return None
+# Value suffix -> multiplier ('€1.50bn', '€150.00m', '€800k')
+VALUE_MULTIPLIERS = {"bn": 1e9, "m": 1e6, "k": 1e3}
 
+# Transfermarkt's placeholders for "no value"
+MISSING_VALUES = {"", "-"}
 
-# ---------- LOAD RAW DATA (ROBUST ENCODING) ----------
 
-try:
-    print(f"Reading {RAW_TM_PATH} as UTF-8 CSV...")
-    tm_raw = pd.read_csv(RAW_TM_PATH, encoding="utf-8")
-except UnicodeDecodeError:
-    print("UTF-8 failed; trying latin-1...")
-    tm_raw = pd.read_csv(RAW_TM_PATH, encoding="latin-1")
+def parse_market_values(values: pd.Series):
+    """
+    Convert a column of '€1.50bn' / '€150.00m' / '€800k' strings to numeric
+    euros in bulk. Blanks and '-' become NaN; so does anything that still is
+    not a number once the euro sign, separators and suffix are removed.
+    Returns (euros, counts) with counts = {"parsed", "missing", "malformed"}.
+    """
+    s = values.astype("string").str.strip().str.lower()
+    # remove euro sign, spaces, commas
+    s = s.str.replace("€", "", regex=False).str.replace(",", "", regex=False).str.strip()
+    missing = s.isna() | s.isin(MISSING_VALUES)
 
-print("Raw columns:", list(tm_raw.columns))
-# Expect: ['Name', 'Position', 'Value', 'Team']
+    multiplier = pd.Series(1.0, index=s.index)
+    for suffix, factor in VALUE_MULTIPLIERS.items():
+        has_suffix = s.str.endswith(suffix).fillna(False) & (multiplier == 1.0)
+        multiplier[has_suffix] = factor
+    s = s.str.replace(r"(bn|m|k)$", "", regex=True)
 
+    # keep only digits and dot
+    digits = s.str.replace(r"[^0-9.]", "", regex=True)
+    euros = pd.to_numeric(digits.replace("", pd.NA), errors="coerce").astype("float64") * multiplier
+
+    malformed = euros.isna() & ~missing
+    counts = {
+        "parsed": int(euros.notna().sum()),
+        "missing": int(missing.sum()),
+        "malformed": int(malformed.sum()),
+    }
+    return euros.rename(values.name), counts
 
-# ---------- RENAME COLUMNS ----------
 
-rename_map = {
+# ---------- RENAME MAP ----------
+
+RENAME_MAP = {
     "Name": "player_name",
     "Position": "position",
     "Value": "market_value_raw",
     "Team": "club"
 }
-tm = tm_raw.rename(columns=rename_map)
 
+# Column names and required columns, compiled once (see schemas.py)
+SCHEMA = TableSchema("transfermarkt", RENAME_MAP)
+
+
+# ---------- LOAD RAW DATA (ROBUST ENCODING) ----------
+
+def load_transfermarkt(input_file: str = RAW_TM_PATH) -> pd.DataFrame:
+    """Sniff encoding and CSV vs Excel, then parse once."""
+    return load_raw(input_file, RENAME_MAP)
+
+
+@traced
+def clean_transfermarkt(tm_raw: pd.DataFrame,
+                        season: str = SEASON_LABEL,
+                        league: str = LEAGUE_LABEL) -> pd.DataFrame:
+    """Raw Transfermarkt export (Name, Position, Value, Team) -> valued players."""
+
+    # ---------- CHECK HEADER AGAINST THE SCHEMA ----------
+
+    tm_raw = SCHEMA.check_header(tm_raw)
+
+    # ---------- RENAME COLUMNS ----------
 
-# ---------- ADD SEASON & LEAGUE ----------
+    tm = tm_raw.rename(columns=RENAME_MAP)
 
-tm["season"] = SEASON_LABEL
-tm["league"] = LEAGUE_LABEL
+    # ---------- ADD SEASON & LEAGUE ----------
 
+    tm["season"] = season
+    tm["league"] = league
 
-# ---------- PARSE MARKET VALUE ----------
+    # ---------- PARSE MARKET VALUE ----------
 
-tm["market_value_eur"] = tm["market_value_raw"].apply(parse_market_value)
-tm["market_value_millions"] = tm["market_value_eur"] / 1e6
+    tm["market_value_eur"], value_counts = parse_market_values(tm["market_value_raw"])
+    tm["market_value_millions"] = tm["market_value_eur"] / 1e6
+    if value_counts["malformed"]:
+        print(f"Could not parse {value_counts['malformed']} market values "
+              f"({value_counts['missing']} missing, {value_counts['parsed']} parsed)")
 
+    # ---------- CLEAN POSITION TEXT (LIGHT) ----------
 
-# ---------- CLEAN POSITION TEXT (LIGHT) ----------
+    tm["position"] = tm["position"].astype(str).str.strip()
 
-tm["position"] = tm["position"].astype(str).str.strip()
+    # ---------- CREATE JOIN KEYS (MATCHING FBREF SCRIPTS) ----------
 
+    tm["player_key"] = normalize_keys(tm["player_name"])
+    tm["club_key"] = normalize_keys(tm["club"])
 
-# ---------- CREATE JOIN KEYS (MATCHING FBREF SCRIPTS) ----------
+    # ---------- OPTIONAL FILTER: DROP ROWS WITHOUT VALUE ----------
 
-tm["player_key"] = tm["player_name"].apply(normalize_name)
-tm["club_key"] = tm["club"].apply(normalize_name)
+    tm = tm[tm["market_value_eur"].notna()]
+    SCHEMA.validate(tm)
 
+    return tm
 
-# ---------- OPTIONAL FILTER: DROP ROWS WITHOUT VALUE ----------
 
-tm = tm[tm["market_value_eur"].notna()]
+if __name__ == "__main__":
+    with RunLog.from_env("data_clean_tnsfmkt.py") as run:
+        tm_raw = load_transfermarkt(RAW_TM_PATH)
+        print("Raw columns:", list(tm_raw.columns))
+        # Expect: ['Name', 'Position', 'Value', 'Team']
 
+        tm = clean_transfermarkt(tm_raw)
 
-# ---------- SAVE CLEANED FILE ----------
+        # ---------- SAVE CLEANED FILE ----------
 
-tm.to_csv(CLEAN_TM_PATH, index=False, encoding="utf-8-sig")
-print(f"Saved cleaned Transfermarkt data to: {os.path.abspath(CLEAN_TM_PATH)}")
-print(tm.head())
+        with run.stage("write", tm):
+            tm.to_csv(CLEAN_TM_PATH, index=False, encoding="utf-8-sig")
+        print(f"Saved cleaned Transfermarkt data to: {os.path.abspath(CLEAN_TM_PATH)}")
+        print(tm.head())
@@ -1,5 +1,9 @@
+import numpy as np
 import pandas as pd
 
+from entity_resolution import resolve_unmatched
+from instrument import RunLog, traced
+
 
 # Paths
 shoot_path = "epl_shooting_clean.csv"
@@ -7,69 +11,146 @@ pass_path = "epl_passing_clean.csv"
 def_path = "epl_defensive_clean.csv"
 poss_path = "epl_possession_clean.csv"
 tm_path = "epl_tm_clean.csv"
-
-
-# Load
-shoot = pd.read_csv(shoot_path)
-passing = pd.read_csv(pass_path)
-defn = pd.read_csv(def_path)
-poss = pd.read_csv(poss_path)
-tm = pd.read_csv(tm_path)
+joined_path = "epl_player_joined_raw.csv"
 
 
 # Common key set
 key_cols = ["player_key", "club_key", "season", "league"]
 
-
-# Merge FBref tables step by step (left joins on shooting base)
-base = shoot.copy()
-
-
-base = base.merge(
-passing.drop(columns=["player_name", "club", "position", "nation_raw", "nation_code"], errors="ignore"),
-on=key_cols,
-how="left",
-suffixes=("", "_pass")
-)
-
-
-base = base.merge(
-defn.drop(columns=["player_name", "club", "position", "nation_raw", "nation_code"], errors="ignore"),
-on=key_cols,
-how="left",
-suffixes=("", "_def")
-)
-
-
-base = base.merge(
-poss.drop(columns=["player_name", "club", "position", "nation_raw", "nation_code"], errors="ignore"),
-on=key_cols,
-how="left",
-suffixes=("", "_poss")
-)
-
-
-# Merge Transfermarkt
-full = base.merge(
-tm[["player_key", "club_key", "season", "league",
-"player_name", "club", "position", "market_value_eur", "market_value_millions"]],
-on=key_cols,
-how="left",
-suffixes=("", "_tm")
-)
+# FBref display columns already carried by the shooting base
+fbref_display_cols = ["player_name", "club", "position", "nation_raw", "nation_code"]
+
+# Transfermarkt columns brought into the joined table
+tm_cols = ["player_key", "club_key", "season", "league",
+           "player_name", "club", "position", "market_value_eur", "market_value_millions"]
 
 
-# Prefer FBref display names when present
-full["player_name_final"] = full["player_name"].fillna(full["player_name_tm"])
-full["club_final"] = full.get("club", full.get("club_tm"))
+# ---------- KEY ENCODING ----------
 
+def encode_keys(tables):
+  """
+  Factorize the composite key of every table against one shared index.
+  Returns one int64 array of surrogate ids per table; equal keys (NaN
+  included, as in DataFrame.merge) get equal ids across all tables.
+  """
+  lengths = [len(t) for t in tables]
+  combined = np.zeros(sum(lengths), dtype="int64")
+  for col in key_cols:
+    values = pd.concat([t[col] for t in tables], ignore_index=True)
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    # re-densify after every column so the packed code never overflows
+    combined, _ = pd.factorize(combined * len(uniques) + codes)
+  return np.split(combined.astype("int64"), np.cumsum(lengths)[:-1])
 
-# Filter to players with some real playing time (e.g. >= 10 90s)
-if "nineties" in full.columns:
-  full = full[full["nineties"] >= 10]
 
+# ---------- JOINS ----------
+
+def chained_left_join(left, rights):
+  """Reference path: one DataFrame.merge per right table."""
+  for right, suffix in rights:
+    left = left.merge(right, on=key_cols, how="left", suffixes=("", suffix))
+  return left
 
-# Save intermediate joined table
-full.to_csv("epl_player_joined_raw.csv", index=False, encoding="utf-8-sig")
-print("Joined shape:", full.shape)
-print(full.head())
\ No newline at end of file
+
+def align_left(left, rights):
+  """
+  Left-join every (right, suffix) in rights onto left in a single pass.
+
+  Keys are encoded once into integer surrogates; each right table is then
+  gathered into left's row order through a position lookup and all
+  pieces are concatenated at once. Matches chained_left_join exactly,
+  which it falls back to when a right table has duplicate keys (a
+  many-to-one match there multiplies rows).
+  """
+  ids = encode_keys([left] + [right for right, _ in rights])
+  left_ids, right_ids = ids[0], ids[1:]
+  n_ids = max((i.max() + 1 for i in ids if len(i)), default=0)
+
+  pieces = [left.reset_index(drop=True)]
+  columns = set(left.columns)
+  for (right, suffix), rid in zip(rights, right_ids):
+    if len(np.unique(rid)) != len(rid):
+      return chained_left_join(left, rights)
+
+    lookup = np.full(n_ids, -1, dtype="int64")
+    lookup[rid] = np.arange(len(rid))
+    rows = lookup[left_ids]
+
+    # -1 is never a label of the reset index, so reindex fills NaN there
+    values = right.drop(columns=key_cols).reset_index(drop=True).reindex(rows)
+    values.index = pieces[0].index
+    values.columns = [c + suffix if c in columns else c for c in values.columns]
+    columns.update(values.columns)
+    pieces.append(values)
+
+  return pd.concat(pieces, axis=1)
+
+
+@traced
+def join_fbref(shoot, passing, defn, poss):
+  """Left-join passing/defense/possession onto the shooting base."""
+  return align_left(shoot, [
+    (passing.drop(columns=fbref_display_cols, errors="ignore"), "_pass"),
+    (defn.drop(columns=fbref_display_cols, errors="ignore"), "_def"),
+    (poss.drop(columns=fbref_display_cols, errors="ignore"), "_poss"),
+  ])
+
+
+@traced
+def merge_transfermarkt(base, tm, resolve_entities=False):
+  """
+  Left-join Transfermarkt values onto the FBref base and keep regular players.
+  With resolve_entities, players the exact key join missed are matched by
+  name / club similarity (see entity_resolution.py).
+  """
+
+  # Merge Transfermarkt
+  full = align_left(base, [(tm[tm_cols], "_tm")])
+
+
+  # Prefer FBref display names when present
+  full["player_name_final"] = full["player_name"].fillna(full["player_name_tm"])
+  full["club_final"] = full.get("club", full.get("club_tm"))
+
+
+  # Transfermarkt rows the exact join used, also by players filtered out below
+  exact = full.loc[full["market_value_eur"].notna(), key_cols]
+
+  full = filter_playing_time(full)
+  if resolve_entities:
+    full = resolve_unmatched(full, tm, exact=exact)
+  return full
+
+
+@traced
+def filter_playing_time(full):
+  # Filter to players with some real playing time (e.g. >= 10 90s)
+  if "nineties" in full.columns:
+    full = full[full["nineties"] >= 10]
+  return full
+
+
+def join_tables(shoot, passing, defn, poss, tm, resolve_entities=False):
+  """Left-join passing/defense/possession and Transfermarkt onto shooting."""
+  base = join_fbref(shoot, passing, defn, poss)
+  return merge_transfermarkt(base, tm, resolve_entities)
+
+
+if __name__ == "__main__":
+  with RunLog.from_env("data_join.py") as run:
+    # Load
+    with run.stage("load") as s:
+      shoot = pd.read_csv(shoot_path)
+      passing = pd.read_csv(pass_path)
+      defn = pd.read_csv(def_path)
+      poss = pd.read_csv(poss_path)
+      tm = pd.read_csv(tm_path)
+      s.rows_out(len(shoot) + len(passing) + len(defn) + len(poss) + len(tm))
+
+    full = join_tables(shoot, passing, defn, poss, tm)
+
+    # Save intermediate joined table
+    with run.stage("write", full):
+      full.to_csv(joined_path, index=False, encoding="utf-8-sig")
+    print("Joined shape:", full.shape)
+    print(full.head())
@@ -1,150 +1,33 @@
 import numpy as np
 import pandas as pd
 
-# ---------------------------------------------------------
-# 1. LOAD DATA
-# ---------------------------------------------------------
-df = pd.read_csv("epl_player_joined_raw.csv")
-
-# Filter out Goalkeepers (They require completely different stats)
-df = df[df["position_group"] != "GK"].copy()
-
-# Basic Safety: Replace 0 minutes with NaN to avoid division by zero
-df["nineties"] = df["nineties"].replace(0, np.nan)
-
-
-# ---------------------------------------------------------
-# 2. FEATURE ENGINEERING (RAW PER 90 SCORES)
-# ---------------------------------------------------------
-
-# A. Attacking Score (Goals + Non-Penalty xG)
-# We use npxG to measure threat without penalty inflation
-df["raw_attacking"] = (
-    df["goals"].fillna(0) / df["nineties"] +
-    df["npxg"].fillna(0) / df["nineties"]
-)
-
-# B. Progression Score (Moving the ball)
-# Passes that move the ball 10 yards or into the box + Carries
-df["raw_progression"] = (
-    df["progressive_passes"].fillna(0) / df["nineties"] +
-    df["progressive_carries"].fillna(0) / df["nineties"]
-)
-
-# C. Creation Score (The final ball)
-# Assists + Expected Assisted Goals (xAG)
-df["raw_creation"] = (
-    df["assists"].fillna(0) / df["nineties"] +
-    df["xag"].fillna(0) / df["nineties"]
-)
-
-# D. Defensive Activity Score
-# Tackles + Interceptions + Blocks + Clearances
-# Note: 'recoveries' was excluded as it wasn't in your initial column list
-df["raw_defensive"] = (
-    df["tackles_plus_interceptions"].fillna(0) / df["nineties"] +
-    df["blocks"].fillna(0) / df["nineties"] +
-    df["clearances"].fillna(0) / df["nineties"]
-)
-
-# E. Mistakes Score (Negative Impact)
-# Losing the ball via failed dribble or bad touch
-df["raw_mistakes"] = (
-    df["dispossessed"].fillna(0) / df["nineties"] +
-    df["miscontrols"].fillna(0) / df["nineties"]
-)
-
-
-# ---------------------------------------------------------
-# 3. NORMALIZATION (Z-SCORES)
-# ---------------------------------------------------------
-# This puts all stats on the same scale (Mean = 0, Std Dev = 1)
-# Vital so that "50 passes" doesn't outweigh "0.5 goals"
-
-features_to_scale = [
-    "raw_attacking", 
-    "raw_progression", 
-    "raw_creation", 
-    "raw_defensive", 
-    "raw_mistakes"
+from instrument import RunLog, step, traced
+from scoring import RAW_FEATURE_STATS, load_weights, performance_index
+from valuation import categorize_players, load_thresholds
+
+# ---------- CONFIG ----------
+JOINED_PATH = "epl_player_joined_raw.csv"
+FINAL_PATH = "epl_player_data_final_v2.csv"
+WEIGHTS_PATH = None                     # optional JSON weight table
+THRESHOLDS_PATH = None                  # optional JSON valuation thresholds
+REFERENCE_PATH = "epl_reference.npz"    # frozen league baseline, see reference.py
+BOOTSTRAP_REPLICATES = 0                # > 0: also write bootstrap intervals, see bootstrap.py
+
+RAW_FEATURES = list(RAW_FEATURE_STATS)
+
+
+# Columns produced by score_performance (everything except valuation)
+SCORE_COLS = [
+    "raw_attacking", "raw_progression", "raw_creation", "raw_defensive", "raw_mistakes",
+    "z_raw_attacking", "z_raw_progression", "z_raw_creation", "z_raw_defensive", "z_raw_mistakes",
+    "performance_index",
 ]
 
-for col in features_to_scale:
-    # Calculate mean and std for the whole league
-    mu = df[col].mean()
-    sigma = df[col].std()
-    
-    # Create the Z-score column (e.g., z_raw_attacking)
-    df[f"z_{col}"] = (df[col] - mu) / sigma
-
-
-# ---------------------------------------------------------
-# 4. PERFORMANCE INDEX
-# ---------------------------------------------------------
-
-def calculate_index(row):
-    pg = row.get("position_group", "")
-    
-    # Grab the Z-scores
-    att = row["z_raw_attacking"]
-    prog = row["z_raw_progression"]
-    creat = row["z_raw_creation"]
-    defs = row["z_raw_defensive"]
-    mistakes = row["z_raw_mistakes"]
-    
-    # Weighted Formula based on Position
-    if pg == "FW":
-        # Forwards: Heavily favor Attacking & Creation
-        score = (0.50 * att) + (0.15 * prog) + (0.25 * creat) + (0.10 * defs) - (0.15 * mistakes)
-        
-    elif pg == "MF":
-        # Midfielders: Balanced, high emphasis on Progression
-        score = (0.15 * att) + (0.35 * prog) + (0.25 * creat) + (0.25 * defs) - (0.15 * mistakes)
-        
-    elif pg == "DF":
-        # Defenders: Heavily favor Defense, but reward Progression (Modern CBs)
-        score = (0.05 * att) + (0.20 * prog) + (0.05 * creat) + (0.70 * defs) - (0.15 * mistakes)
-        
-    else:
-        # Fallback (Equal weights)
-        score = att + prog + creat + defs - mistakes
-        
-    return score
-
-df["performance_index"] = df.apply(calculate_index, axis=1)
-
-
-# ---------------------------------------------------------
-# 5. VALUATION ANALYSIS
-# ---------------------------------------------------------
-
-# Rank Percentiles (0.0 to 1.0) within Position Groups
-df["perf_rank_pct"] = df.groupby("position_group")["performance_index"].rank(pct=True)
-df["value_rank_pct"] = df.groupby("position_group")["market_value_millions"].rank(pct=True)
-
-# The Delta: How much better is their play than their price?
-df["undervaluation_delta"] = df["perf_rank_pct"] - df["value_rank_pct"]
-
-def categorize_valuation(delta):
-    # If Performance percentile is >25% higher than Value percentile
-    if delta > 0.25:
-        return "Undervalued"
-    # If Performance percentile is >15% lower than Value percentile
-    if delta < -0.15:
-        return "Overvalued"
-    return "Fair Value"
-
-df["valuation_category"] = df["undervaluation_delta"].apply(categorize_valuation)
-
-
-# ---------------------------------------------------------
-# 6. SAVE & CLEANUP
-# ---------------------------------------------------------
-
-cols_to_round = [
-    "performance_index", 
-    "undervaluation_delta", 
-    "perf_rank_pct", 
+# Rounded to 4 decimals in the final table
+ROUNDED_COLS = [
+    "performance_index",
+    "undervaluation_delta",
+    "perf_rank_pct",
     "value_rank_pct",
     "raw_attacking",
     "raw_progression",
@@ -153,10 +36,160 @@ cols_to_round = [
     "raw_mistakes"
 ]
 
-for col in cols_to_round:
-    if col in df.columns:
-        df[col] = df[col].round(4)
 
-df.to_csv("epl_player_data_final_v2.csv", index=False, encoding="utf-8-sig")
-print("Process Complete. File saved as 'epl_player_data_final_v2.csv'")
-print(df[["player_name", "position_group", "performance_index", "valuation_category"]].head(10))
\ No newline at end of file
+@traced
+def add_raw_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-90 attacking / progression / creation / defensive / mistakes scores, in place."""
+    # Basic Safety: Replace 0 minutes with NaN to avoid division by zero
+    df["nineties"] = df["nineties"].replace(0, np.nan)
+
+
+    # ---------------------------------------------------------
+    # 2. FEATURE ENGINEERING (RAW PER 90 SCORES)
+    # ---------------------------------------------------------
+
+    # Each score sums its stats per 90 (see scoring.RAW_FEATURE_STATS),
+    # e.g. raw_attacking = goals / 90s + npxG / 90s
+    for feature, stats in RAW_FEATURE_STATS.items():
+        score = df[stats[0]].fillna(0) / df["nineties"]
+        for stat in stats[1:]:
+            score = score + df[stat].fillna(0) / df["nineties"]
+        df[feature] = score
+    return df
+
+
+def feature_stats(df: pd.DataFrame) -> dict:
+    """{raw feature: (mean, std)} over the whole league, used for the z-scores."""
+    return {col: (df[col].mean(), df[col].std()) for col in RAW_FEATURES}
+
+
+@traced
+def score_performance(df: pd.DataFrame, weights: dict = None, stats: dict = None) -> pd.DataFrame:
+    """
+    Joined player table -> per-90 scores, z-scores and performance index.
+    stats (see feature_stats) freezes the z-score baseline, e.g. to score a
+    few new players against a fitted reference (see reference.py).
+    """
+    # Filter out Goalkeepers (They require completely different stats)
+    df = df[df["position_group"] != "GK"].copy()
+    df = add_raw_features(df)
+
+
+    # ---------------------------------------------------------
+    # 3. NORMALIZATION (Z-SCORES)
+    # ---------------------------------------------------------
+    # This puts all stats on the same scale (Mean = 0, Std Dev = 1)
+    # Vital so that "50 passes" doesn't outweigh "0.5 goals"
+
+    # Calculate mean and std for the whole league
+    stats = stats or feature_stats(df)
+
+    with step("zscore", df):
+        for col in RAW_FEATURES:
+            mu, sigma = stats[col]
+
+            # Create the Z-score column (e.g., z_raw_attacking)
+            df[f"z_{col}"] = (df[col] - mu) / sigma
+
+
+    # ---------------------------------------------------------
+    # 4. PERFORMANCE INDEX
+    # ---------------------------------------------------------
+
+    # Weights live in scoring.DEFAULT_POSITION_WEIGHTS (FW / MF / DF / fallback);
+    # pass a table of the same shape (or set WEIGHTS_PATH) to override them.
+    df["performance_index"] = performance_index(df, weights)
+
+    return df
+
+
+@traced
+def value_players(df: pd.DataFrame, reference=None, thresholds: dict = None) -> pd.DataFrame:
+    """
+    Scored players with market values -> percentiles and valuation category.
+    With a fitted reference (see reference.py) percentiles are looked up in
+    its frozen league distribution instead of ranked within df. thresholds
+    sets the category cut-offs per league / position (see valuation.py).
+    """
+
+    # ---------------------------------------------------------
+    # 5. VALUATION ANALYSIS
+    # ---------------------------------------------------------
+
+    # Rank Percentiles (0.0 to 1.0) within Position Groups
+    with step("rank", df):
+        if reference is None:
+            df["perf_rank_pct"] = df.groupby("position_group")["performance_index"].rank(pct=True)
+            df["value_rank_pct"] = df.groupby("position_group")["market_value_millions"].rank(pct=True)
+        else:
+            df["perf_rank_pct"] = reference.percentiles(df, "performance_index")
+            df["value_rank_pct"] = reference.percentiles(df, "market_value_millions")
+
+    # The Delta: How much better is their play than their price?
+    df["undervaluation_delta"] = df["perf_rank_pct"] - df["value_rank_pct"]
+
+    # Undervalued / Fair Value / Overvalued by delta (default cut-offs +0.25 / -0.15)
+    df["valuation_category"] = categorize_players(df, thresholds)
+
+
+    # ---------------------------------------------------------
+    # 6. CLEANUP
+    # ---------------------------------------------------------
+
+    for col in ROUNDED_COLS:
+        if col in df.columns:
+            df[col] = df[col].round(4)
+
+    return df
+
+
+def transform(df: pd.DataFrame, weights: dict = None, reference=None,
+              thresholds: dict = None) -> pd.DataFrame:
+    """
+    Joined player table -> per-90 scores, z-scores, index and valuation.
+    With a fitted reference the rows are scored against its frozen league
+    baseline (z-score stats, weights and percentile arrays) instead of
+    against each other.
+    """
+    if reference is not None:
+        scored = score_performance(df, reference.weights, reference.stats)
+        return value_players(scored, reference, thresholds)
+    return value_players(score_performance(df, weights), thresholds=thresholds)
+
+
+if __name__ == "__main__":
+    from aggregates import CUBE_PATH, write_cube
+    from reference import fit_reference
+
+    with RunLog.from_env("data_transform.py") as run:
+        # ---------------------------------------------------------
+        # 1. LOAD DATA
+        # ---------------------------------------------------------
+        with run.stage("load") as s:
+            df = s.rows_out(pd.read_csv(JOINED_PATH))
+
+        weights = load_weights(WEIGHTS_PATH) if WEIGHTS_PATH else None
+        thresholds = load_thresholds(THRESHOLDS_PATH) if THRESHOLDS_PATH else None
+        scored = score_performance(df, weights)
+        with run.stage("reference", scored):
+            fit_reference(scored, feature_stats(scored), weights).save(REFERENCE_PATH)
+        df = value_players(scored, thresholds=thresholds)
+
+        # ---------------------------------------------------------
+        # 7. SAVE
+        # ---------------------------------------------------------
+        with run.stage("write", df):
+            df.to_csv(FINAL_PATH, index=False, encoding="utf-8-sig")
+        with run.stage("cube", df) as s:
+            s.rows_out(write_cube(df, CUBE_PATH))
+        print(f"Process Complete. File saved as '{FINAL_PATH}' (reference: '{REFERENCE_PATH}', "
+              f"report cube: '{CUBE_PATH}')")
+
+        if BOOTSTRAP_REPLICATES:
+            from bootstrap import UNCERTAINTY_PATH, bootstrap
+
+            with run.stage("bootstrap", df):
+                bootstrap(df, BOOTSTRAP_REPLICATES, weights, thresholds).to_csv(
+                    UNCERTAINTY_PATH, index=False, encoding="utf-8-sig")
+            print(f"Bootstrap intervals ({BOOTSTRAP_REPLICATES} replicates) saved as '{UNCERTAINTY_PATH}'")
+        print(df[["player_name", "position_group", "performance_index", "valuation_category"]].head(10))
@@ -0,0 +1,54 @@
+"""
+Derived FBref columns: nation_code from Nation and position_group from Pos.
+
+Both columns have only a handful of distinct values ("eng ENG", "DF,MF",
+...), so the scalar rules run once per distinct value and the results are
+broadcast back to every row (keys.map_unique).
+"""
+import pandas as pd
+
+from instrument import traced
+from keys import map_unique
+
+
+# ---------- SCALAR RULES ----------
+
+def extract_country_code(nation: str) -> str:
+    """
+    From values like 'eng ENG', 'ci CIV', 'br BRA',
+    keep only the uppercase 3-letter code (ENG, CIV, BRA).
+    """
+    if pd.isna(nation):
+        return ""
+    parts = str(nation).split()
+    last = parts[-1]
+    return "".join(ch for ch in last if ch.isupper())
+
+
+def position_group(pos: str) -> str:
+    if pd.isna(pos):
+        return "Other"
+    pos = str(pos)
+    if "GK" in pos:
+        return "GK"
+    if "DF" in pos:
+        return "DF"
+    if "MF" in pos:
+        return "MF"
+    if "FW" in pos:
+        return "FW"
+    return "Other"
+
+
+# ---------- COLUMN HELPERS ----------
+
+@traced
+def nation_codes(series: pd.Series) -> pd.Series:
+    """extract_country_code over a whole column, computed on unique values only."""
+    return map_unique(series, extract_country_code, "")
+
+
+@traced
+def position_groups(series: pd.Series) -> pd.Series:
+    """position_group over a whole column, computed on unique values only."""
+    return map_unique(series, position_group, "Other")
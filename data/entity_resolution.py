@@ -0,0 +1,181 @@
+"""
+Fuzzy FBref <-> Transfermarkt matching for players the exact key join missed.
+
+Candidate pairs come from a character-trigram inverted index over player
+keys, blocked by season and league, so only names that share trigrams are
+ever compared (no all-pairs scan). Each candidate is scored on name
+similarity (trigram Dice), club similarity and, when both sides carry it,
+birth year; the best pairs above MIN_CONFIDENCE are matched one-to-one.
+"""
+import numpy as np
+import pandas as pd
+
+from keys import normalize_keys, standardize_clubs
+
+# ---------- CONFIG ----------
+
+BLOCK_COLS = ["season", "league"]
+
+MIN_CONFIDENCE = 0.75
+NAME_WEIGHT = 0.7
+CLUB_WEIGHT = 0.3
+BORN_MISMATCH_PENALTY = 0.3       # subtracted when birth years differ by more than 1
+
+# Trigrams in more than this share of a block's Transfermarkt names are too
+# common to narrow anything down and are left out of the index
+MAX_TRIGRAM_SHARE = 0.05
+MIN_TRIGRAM_POSTINGS = 50
+
+# Columns filled in from Transfermarkt for a fuzzy match
+TM_VALUE_COLS = {
+    "player_name": "player_name_tm",
+    "club": "club_tm",
+    "position": "position_tm",
+    "market_value_eur": "market_value_eur",
+    "market_value_millions": "market_value_millions",
+}
+
+
+# ---------- TRIGRAMS ----------
+
+def trigrams(keys: pd.Series) -> pd.DataFrame:
+    """Long table (row, gram) of the distinct padded character trigrams of every key."""
+    padded = (" " + keys.fillna("").astype(str) + " ").to_numpy()
+    rows, grams = [], []
+    for row, text in enumerate(padded):
+        for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+            rows.append(row)
+            grams.append(gram)
+    return pd.DataFrame({"row": np.array(rows, dtype="int64"), "gram": grams})
+
+
+def club_tokens_match(a: str, b: str) -> float:
+    """Share of the shorter club name's tokens that prefix-match a token of the other."""
+    ta, tb = a.split(), b.split()
+    if not ta or not tb:
+        return 0.0
+    if len(ta) > len(tb):
+        ta, tb = tb, ta
+    hits = sum(any(x.startswith(y) or y.startswith(x) for y in tb) for x in ta)
+    return hits / len(ta)
+
+
+# ---------- MATCHING ----------
+
+def candidate_pairs(left: pd.DataFrame, right: pd.DataFrame) -> pd.DataFrame:
+    """
+    (left_row, right_row, name_score) for every pair in the same block that
+    shares at least one informative trigram; name_score is the trigram Dice
+    of the two full trigram sets (pruned trigrams only narrow the candidates).
+    """
+    lg_full, rg_full = trigrams(left["player_key"]), trigrams(right["player_key"])
+    left_n, right_n = lg_full.groupby("row").size(), rg_full.groupby("row").size()
+    lg = lg_full.join(left[BLOCK_COLS].reset_index(drop=True), on="row")
+    rg = rg_full.join(right[BLOCK_COLS].reset_index(drop=True), on="row")
+
+    # Drop trigrams so common within a block that they would explode the pairs
+    postings = rg.groupby(BLOCK_COLS + ["gram"]).size().rename("postings").reset_index()
+    block_size = right.groupby(BLOCK_COLS).size().rename("block_size").reset_index()
+    postings = postings.merge(block_size, on=BLOCK_COLS)
+    common = postings[(postings["postings"] > MIN_TRIGRAM_POSTINGS) &
+                      (postings["postings"] > MAX_TRIGRAM_SHARE * postings["block_size"])]
+    rg = rg.merge(common[BLOCK_COLS + ["gram"]], on=BLOCK_COLS + ["gram"],
+                  how="left", indicator=True)
+    rg = rg[rg["_merge"] == "left_only"].drop(columns="_merge")
+
+    pairs = lg.merge(rg, on=BLOCK_COLS + ["gram"], suffixes=("_l", "_r"))
+    pairs = pairs[["row_l", "row_r"]].drop_duplicates()
+
+    # Shared trigrams of each candidate pair, counted over the unpruned sets
+    shared = (pairs.merge(lg_full.rename(columns={"row": "row_l"}), on="row_l")
+                   .merge(rg_full.rename(columns={"row": "row_r"}), on=["row_r", "gram"]))
+    shared = shared.groupby(["row_l", "row_r"]).size().rename("shared")
+    pairs = pairs.join(shared, on=["row_l", "row_r"]).reset_index(drop=True)
+
+    total = left_n.reindex(pairs["row_l"]).to_numpy() + right_n.reindex(pairs["row_r"]).to_numpy()
+    pairs["name_score"] = 2 * pairs["shared"] / total
+    return pairs.rename(columns={"row_l": "left_row", "row_r": "right_row"}).drop(columns="shared")
+
+
+def score_pairs(pairs: pd.DataFrame, left: pd.DataFrame, right: pd.DataFrame) -> pd.Series:
+    # Compare clubs on the canonical FBref names used by the cleaners
+    left_club = normalize_keys(standardize_clubs(left["club"])).to_numpy()
+    right_club = normalize_keys(standardize_clubs(right["club"])).to_numpy()
+    club_pairs = pd.DataFrame({"a": left_club[pairs["left_row"]], "b": right_club[pairs["right_row"]]})
+    unique_pairs = club_pairs.drop_duplicates()
+    unique_pairs["club_score"] = [club_tokens_match(a, b) for a, b in zip(unique_pairs["a"], unique_pairs["b"])]
+    club_score = club_pairs.merge(unique_pairs, on=["a", "b"], how="left")["club_score"].to_numpy()
+
+    score = NAME_WEIGHT * pairs["name_score"].to_numpy() + CLUB_WEIGHT * club_score
+
+    if "born" in left.columns and "born" in right.columns:
+        lb = pd.to_numeric(left["born"], errors="coerce").to_numpy()[pairs["left_row"]]
+        rb = pd.to_numeric(right["born"], errors="coerce").to_numpy()[pairs["right_row"]]
+        mismatch = np.abs(lb - rb) > 1          # NaN on either side never penalises
+        score = score - BORN_MISMATCH_PENALTY * mismatch
+
+    return pd.Series(score, index=pairs.index)
+
+
+def best_one_to_one(pairs: pd.DataFrame) -> pd.DataFrame:
+    """
+    Greedy one-to-one matching by confidence, in rounds: a pair is accepted
+    when it is both the player's and the Transfermarkt row's best remaining
+    candidate; matched rows on both sides leave the pool and the others try
+    their next candidate. No row on either side is matched twice.
+    """
+    pairs = pairs.sort_values("confidence", ascending=False, kind="mergesort")
+    matched = []
+    while not pairs.empty:
+        best_left = pairs.drop_duplicates("left_row")
+        best_right = pairs.drop_duplicates("right_row")
+        accepted = best_left[best_left.index.isin(best_right.index)]
+        matched.append(accepted)
+        pairs = pairs[~pairs["left_row"].isin(accepted["left_row"])
+                      & ~pairs["right_row"].isin(accepted["right_row"])]
+    if not matched:
+        return pairs
+    return pd.concat(matched).sort_values("confidence", ascending=False, kind="mergesort")
+
+
+def resolve_unmatched(full: pd.DataFrame, tm: pd.DataFrame,
+                      min_confidence: float = MIN_CONFIDENCE, exact: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Add tm_match_method ("exact" / "fuzzy") and tm_match_confidence to the
+    joined table and fill Transfermarkt columns for rows the exact key join
+    missed but a fuzzy match above min_confidence found.
+
+    exact holds the keys the exact join matched before any row of full was
+    filtered out (default: the matched rows of full); their Transfermarkt
+    rows are never handed to another player.
+    """
+    full = full.copy()
+    matched = full["market_value_eur"].notna()
+    full["tm_match_method"] = np.where(matched, "exact", None)
+    full["tm_match_confidence"] = np.where(matched, 1.0, np.nan)
+
+    key_cols = ["player_key", "club_key"] + BLOCK_COLS
+    used = (full.loc[matched, key_cols] if exact is None else exact[key_cols]).drop_duplicates()
+    tm_free = tm.merge(used, on=key_cols, how="left", indicator=True)
+    tm_free = tm_free[tm_free["_merge"] == "left_only"].drop(columns="_merge").reset_index(drop=True)
+
+    left = full[~matched]
+    if left.empty or tm_free.empty:
+        return full
+
+    pairs = candidate_pairs(left, tm_free)
+    if pairs.empty:
+        return full
+    pairs["confidence"] = score_pairs(pairs, left, tm_free).clip(0, 1)
+    matches = best_one_to_one(pairs[pairs["confidence"] >= min_confidence])
+
+    target = left.index[matches["left_row"].to_numpy()]
+    source = matches["right_row"].to_numpy()
+    for tm_col, out_col in TM_VALUE_COLS.items():
+        if out_col in full.columns:
+            full.loc[target, out_col] = tm_free[tm_col].to_numpy()[source]
+    full.loc[target, "tm_match_method"] = "fuzzy"
+    full.loc[target, "tm_match_confidence"] = matches["confidence"].round(4).to_numpy()
+    if "player_name_final" in full.columns:
+        full["player_name_final"] = full["player_name"].fillna(full["player_name_tm"])
+    return full
@@ -0,0 +1,275 @@
+"""
+Season-partitioned player history for trajectories across seasons.
+
+Every scored season is appended to the store as its own partition,
+<root>/season=<season>/league=<league>/part.<ext>, holding HISTORY_COLS
+for every player of the final table; season and league live only in the
+directory names, so a Parquet store also reads as one dataset with
+pd.read_parquet(root). Partitions are never rewritten by an append;
+appending a season / league that is already stored is an error unless
+replace=True (re-scoring the current season).
+
+Players are identified across seasons and clubs by player_id: the
+normalized name, the birth year and the FBref nation code, each blank when
+unknown ("bukayo saka|2001|ENG"), which keeps namesakes apart. The exports
+carry no birth date or Transfermarkt id, so two players of the same name,
+birth year and nation still share an id: their seasons are merged, and
+trajectories() keeps only the one with more nineties in a season they
+both played. The store keeps an index (_index.<ext>: one row per player,
+season and partition row) sorted by player_id, so a player's seasons are
+found by binary search and only their rows are read.
+
+trajectories() loads the whole store once and computes season-over-season
+deltas and rolling means of performance_index / market_value_millions for
+every player at once from the sorted table (no per-player loop).
+
+    python history.py append epl_player_data_final_v2.csv
+    python history.py player "Bukayo Saka"
+    python history.py trends --window 3 --out epl_player_trends.csv
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+import data_transform
+from keys import normalize_keys
+from storage import FORMAT_EXTENSIONS, read_partition, read_table, write_partition, write_table
+
+# ---------- CONFIG ----------
+
+HISTORY_DIR = "history"
+INDEX_NAME = "_index"
+DEFAULT_WINDOW = 3
+
+HISTORY_COLS = [
+    "player_id", "player_key", "player_name", "born", "nation_code", "age", "club", "season", "league",
+    "position_group", "nineties", "performance_index", "perf_rank_pct",
+    "market_value_millions", "value_rank_pct", "undervaluation_delta", "valuation_category",
+]
+
+TREND_METRICS = ["performance_index", "market_value_millions", "perf_rank_pct"]
+
+
+# ---------- PLAYER IDS ----------
+
+def player_ids(df: pd.DataFrame) -> pd.Series:
+    """normalized name | birth year | nation code ('' when unknown) for every row."""
+    key = df["player_key"] if "player_key" in df.columns else normalize_keys(df["player_name"])
+    born = pd.to_numeric(df["born"], errors="coerce") if "born" in df.columns else pd.Series(np.nan, index=df.index)
+    born = born.astype("Int64").astype("string").fillna("")
+    nation = df["nation_code"] if "nation_code" in df.columns else pd.Series(None, index=df.index)
+    nation = nation.astype("string").fillna("")
+    return (key.astype("string") + "|" + born + "|" + nation).astype(object)
+
+
+def name_id_prefix(name: str) -> str:
+    return normalize_keys(pd.Series([name]))[0] + "|"
+
+
+# ---------- STORE ----------
+
+class HistoryStore:
+    def __init__(self, root: str = HISTORY_DIR, fmt: str = "csv"):
+        self.root = root
+        self.fmt = fmt
+        self.ext = FORMAT_EXTENSIONS[fmt]
+        self.index_path = os.path.join(root, INDEX_NAME + self.ext)
+        self._index = None
+
+    def partition_path(self, season: str, league: str) -> str:
+        return os.path.join(self.root, f"season={season}", f"league={league}", "part" + self.ext)
+
+    def index(self) -> pd.DataFrame:
+        """player_id, season, league, path, row, sorted by player_id then season."""
+        if self._index is None:
+            if os.path.exists(self.index_path):
+                self._index = read_table(self.index_path).astype({"season": str, "league": str})
+            else:
+                self._index = pd.DataFrame(columns=["player_id", "season", "league", "path", "row"])
+        return self._index
+
+    def partitions(self) -> list:
+        """[(season, league, path)] stored so far, in season order."""
+        idx = self.index()
+        parts = idx[["season", "league", "path"]].drop_duplicates()
+        return sorted(parts.itertuples(index=False, name=None))
+
+    def append(self, final: pd.DataFrame, replace: bool = False) -> list:
+        """
+        Store every (season, league) of a final table as a new partition.
+        Returns the partition paths written.
+        """
+        df = final.copy()
+        df["player_id"] = player_ids(df)
+        df = df[[c for c in HISTORY_COLS if c in df.columns]]
+        stored = {(s, lg) for s, lg, _ in self.partitions()}
+
+        parts = [((str(season), str(league)), part.reset_index(drop=True))
+                 for (season, league), part in df.groupby(["season", "league"], sort=True)]
+        clashes = [f"{league} {season}" for (season, league), _ in parts if (season, league) in stored]
+        if clashes and not replace:
+            raise ValueError(f"History already has {', '.join(clashes)}; pass replace=True to re-score")
+
+        written, entries = [], []
+        for (season, league), part in parts:
+            path = self.partition_path(season, league)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_partition(part, path, {"season": season, "league": league})
+            written.append(path)
+            entries.append(pd.DataFrame({"player_id": part["player_id"], "season": season, "league": league,
+                                         "path": os.path.relpath(path, self.root), "row": np.arange(len(part))}))
+
+        idx = self.index()
+        replaced = pd.MultiIndex.from_tuples([key for key, _ in parts])
+        keep = ~pd.MultiIndex.from_frame(idx[["season", "league"]]).isin(replaced)
+        idx = pd.concat([idx[keep]] + entries, ignore_index=True)
+        self._index = idx.sort_values(["player_id", "season"], kind="stable").reset_index(drop=True)
+        write_table(self._index, self.index_path)
+        return written
+
+    # ---------- READS ----------
+
+    def read(self, seasons=None, columns: list = None) -> pd.DataFrame:
+        """All stored rows (optionally only some seasons / columns)."""
+        wanted = None if seasons is None else {str(s) for s in (seasons if isinstance(seasons, (list, tuple, set)) else [seasons])}
+        frames = [read_partition(os.path.join(self.root, path), {"season": season, "league": league}, columns)
+                  for season, league, path in self.partitions() if wanted is None or season in wanted]
+        if not frames:
+            return pd.DataFrame(columns=columns or HISTORY_COLS)
+        return pd.concat(frames, ignore_index=True)
+
+    def lookup(self, player_id: str = None, prefix: str = None, start: str = None, end: str = None) -> pd.DataFrame:
+        """
+        Rows of one player_id (or every id starting with prefix, e.g. a
+        name without birth year) with start <= season <= end; only those
+        rows of their partitions are read (the index's row positions).
+        """
+        idx = self.index()
+        ids = idx["player_id"].to_numpy(dtype=object)
+        if player_id is not None:
+            lo, hi = np.searchsorted(ids, player_id, "left"), np.searchsorted(ids, player_id, "right")
+        else:
+            # every id starting with prefix sorts between prefix and prefix + U+FFFF
+            lo, hi = np.searchsorted(ids, prefix, "left"), np.searchsorted(ids, prefix + "\uffff", "left")
+        hits = idx.iloc[lo:hi]
+        if start is not None:
+            hits = hits[hits["season"] >= start]
+        if end is not None:
+            hits = hits[hits["season"] <= end]
+
+        frames = []
+        for (path, season, league), rows in hits.groupby(["path", "season", "league"], sort=False)["row"]:
+            frames.append(read_partition(os.path.join(self.root, path), {"season": season, "league": league},
+                                         rows=rows.to_numpy()))
+        if not frames:
+            return pd.DataFrame(columns=HISTORY_COLS)
+        return pd.concat(frames, ignore_index=True).sort_values(["player_id", "season"], kind="stable")
+
+    def player(self, name: str, start: str = None, end: str = None) -> pd.DataFrame:
+        """Every stored season of players called name (namesakes have separate ids)."""
+        return self.lookup(prefix=name_id_prefix(name), start=start, end=end)
+
+
+# ---------- TRAJECTORIES ----------
+
+def season_rows(history: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per player and season: a player who moved clubs mid-season
+    keeps the row with the most nineties. Sorted by player_id, season.
+    """
+    df = history.sort_values(["player_id", "season", "nineties"], ascending=[True, True, False], kind="stable")
+    df = df.drop_duplicates(["player_id", "season"], keep="first")
+    return df.reset_index(drop=True)
+
+
+def rolling_mean(values: np.ndarray, group_start: np.ndarray, window: int) -> np.ndarray:
+    """
+    Mean of the last window values (NaN skipped) of every row's group, for
+    rows sorted by group; group_start[i] is the first row of row i's group.
+    """
+    n = len(values)
+    present = ~np.isnan(values)
+    sums = np.concatenate([[0.0], np.cumsum(np.where(present, values, 0.0))])
+    counts = np.concatenate([[0], np.cumsum(present)])
+    end = np.arange(n) + 1
+    lo = np.maximum(end - window, group_start)
+    total, count = sums[end] - sums[lo], counts[end] - counts[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def trajectories(history: pd.DataFrame, metrics: list = None, window: int = DEFAULT_WINDOW) -> pd.DataFrame:
+    """
+    Per player-season: the previous stored season, the change of every
+    metric since then (<metric>_delta) and its mean over the last window
+    stored seasons (<metric>_rolling), computed for the whole league at once.
+    """
+    metrics = [m for m in (metrics or TREND_METRICS) if m in history.columns]
+    df = season_rows(history)
+    ids = df["player_id"].to_numpy(dtype=object)
+    n = len(df)
+
+    first = np.ones(n, dtype=bool)
+    first[1:] = ids[1:] != ids[:-1]
+    group_start = np.maximum.accumulate(np.where(first, np.arange(n), 0))
+
+    seasons = df["season"].to_numpy(dtype=object)
+    df["prev_season"] = np.where(first, None, np.roll(seasons, 1))
+    df["seasons_played"] = np.arange(n) - group_start + 1
+    for metric in metrics:
+        values = pd.to_numeric(df[metric], errors="coerce").to_numpy(dtype="float64")
+        prev = np.roll(values, 1)
+        df[f"{metric}_delta"] = np.where(first, np.nan, values - prev)
+        df[f"{metric}_rolling"] = rolling_mean(values, group_start, window)
+    return df.round({c: 4 for c in df.columns if c.endswith(("_delta", "_rolling"))})
+
+
+# ---------- CLI ----------
+
+def main():
+    parser = argparse.ArgumentParser(description="Season-partitioned player history.")
+    parser.add_argument("--root", default=HISTORY_DIR)
+    parser.add_argument("--format", default="csv", choices=sorted(FORMAT_EXTENSIONS))
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    append = sub.add_parser("append", help="store the seasons of a final table")
+    append.add_argument("final", nargs="?", default=data_transform.FINAL_PATH)
+    append.add_argument("--replace", action="store_true", help="overwrite seasons already stored")
+
+    player = sub.add_parser("player", help="stored seasons of one player")
+    player.add_argument("name")
+    player.add_argument("--start", default=None, help="first season, e.g. 2022-23")
+    player.add_argument("--end", default=None)
+
+    trends = sub.add_parser("trends", help="season-over-season deltas and rolling means")
+    trends.add_argument("--window", type=int, default=DEFAULT_WINDOW)
+    trends.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    store = HistoryStore(args.root, args.format)
+    if args.command == "append":
+        written = store.append(read_table(args.final), replace=args.replace)
+        print(f"Stored {len(written)} partition(s) under {args.root}: {', '.join(written)}")
+    elif args.command == "player":
+        rows = store.player(args.name, args.start, args.end)
+        if rows.empty:
+            raise SystemExit(f"No history for '{args.name}'")
+        print(rows[["player_id", "season", "club", "age", "nineties", "performance_index",
+                    "market_value_millions", "valuation_category"]].to_string(index=False))
+    else:
+        result = trajectories(store.read(), window=args.window)
+        if args.out:
+            result.to_csv(args.out, index=False, encoding="utf-8-sig")
+            print(f"Wrote {len(result)} player-seasons to {args.out}")
+        else:
+            improving = result[(result["performance_index_delta"] > 0)
+                               & (result["valuation_category"] == "Undervalued")]
+            print(improving.sort_values("performance_index_delta", ascending=False)
+                  [["player_name", "season", "prev_season", "performance_index", "performance_index_delta",
+                    "market_value_millions", "market_value_millions_delta"]].head(20).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Incremental pipeline runs backed by a local artifact cache.
+
+Every raw input and every stage output is fingerprinted by content. A
+stage is recomputed only when the fingerprint of one of its inputs (or of
+the code that implements it) changed; otherwise its output is loaded from
+the cache. The stages are
+
+    clean:<table>   raw export                   -> clean table
+    fbref_joined    four clean FBref tables      -> joined (every player)
+    fbref_scored    fbref_joined                 -> filtered, z-scored, indexed
+    final           fbref_joined + fbref_scored  -> TM merge (and entity resolution),
+                    + clean TM                      percentiles, valuation
+
+so a Transfermarkt-only refresh re-runs just clean:transfermarkt and final.
+The Transfermarkt merge runs on the unfiltered FBref join, as in
+data_join.join_tables, so the result equals the full transform's.
+"""
+import hashlib
+import json
+import os
+import sys
+
+import pandas as pd
+
+import data_join
+import data_transform
+import derive
+import entity_resolution
+import keys
+import loader
+import schemas
+import scoring
+import valuation
+
+# ---------- CONFIG ----------
+
+CACHE_DIR = ".pipeline_cache"
+MANIFEST_NAME = "manifest.json"
+
+FBREF_TABLES = ["shooting", "passing", "defense", "possession"]
+
+# Modules whose source is part of a stage's key (besides the cleaner itself)
+CLEAN_DEPENDENCIES = [loader, keys, derive, schemas]
+SCORE_DEPENDENCIES = [data_join, data_transform, scoring, entity_resolution, valuation, keys]
+
+
+# ---------- FINGERPRINTS ----------
+
+def hash_file(path: str) -> str:
+    """sha256 of a file's bytes."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def hash_frame(df: pd.DataFrame) -> str:
+    """sha256 of a frame's columns, dtypes and cell values (row order included)."""
+    h = hashlib.sha256()
+    h.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def hash_parts(*parts) -> str:
+    """Combine fingerprints / parameters into one stage key."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def code_version(*modules) -> str:
+    """Fingerprint of the source files implementing a stage."""
+    return hash_parts(*[hash_file(m.__file__) for m in modules])
+
+
+# ---------- ARTIFACT CACHE ----------
+
+class ArtifactCache:
+    """
+    Stage outputs stored as pickles under cache_dir, keyed by the stage's
+    input fingerprint, plus a manifest of the last key/output hash per stage.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+    def _path(self, stage: str, key: str) -> str:
+        safe = stage.replace(":", "_")
+        return os.path.join(self.cache_dir, f"{safe}-{key[:16]}.pkl")
+
+    def get(self, stage: str, key: str):
+        """(frame, output hash) if this stage already ran on these inputs, else None."""
+        entry = self.manifest.get(stage)
+        path = self._path(stage, key)
+        if entry is None or entry["key"] != key or not os.path.exists(path):
+            return None
+        return pd.read_pickle(path), entry["output_hash"]
+
+    def put(self, stage: str, key: str, df: pd.DataFrame) -> str:
+        old = self.manifest.get(stage)
+        if old is not None and old["key"] != key:
+            old_path = self._path(stage, old["key"])
+            if os.path.exists(old_path):
+                os.remove(old_path)
+
+        output_hash = hash_frame(df)
+        df.to_pickle(self._path(stage, key))
+        self.manifest[stage] = {"key": key, "output_hash": output_hash}
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        return output_hash
+
+
+# ---------- STAGES ----------
+
+def score_fbref(base: pd.DataFrame, weights: dict = None) -> pd.DataFrame:
+    """Playing-time filter and performance scoring of the FBref join (no market values)."""
+    return data_transform.score_performance(data_join.filter_playing_time(base), weights)
+
+
+def finish_with_transfermarkt(base: pd.DataFrame, scored: pd.DataFrame, tm: pd.DataFrame,
+                              resolve_entities: bool = False, thresholds: dict = None):
+    """
+    TM merge (and entity resolution) on the unfiltered FBref join, exactly
+    as join_tables does it, then the scores of the cached scored table and
+    the valuation.
+
+    Returns None when Transfermarkt has several rows for one scored player:
+    the left join then duplicates rows, which changes the league z-scores,
+    so the caller must fall back to the full transform.
+    """
+    merged = data_join.merge_transfermarkt(base, tm, resolve_entities)
+    # the rows score_performance keeps
+    merged = merged[merged["position_group"] != "GK"].copy()
+    if len(merged) != len(scored):
+        return None
+
+    for col in data_transform.SCORE_COLS:
+        merged[col] = scored[col].to_numpy()
+    return data_transform.value_players(merged, thresholds=thresholds)
+
+
+def run_incremental(raw_paths: dict, clean_stages: dict, season: str, league: str,
+                    weights: dict = None, cache_dir: str = CACHE_DIR, timed=None, timings=None,
+                    resolve_entities: bool = False, thresholds: dict = None):
+    """
+    Run the pipeline, recomputing only stages whose inputs changed.
+
+    clean_stages is pipeline.CLEAN_STAGES; timed/timings are pipeline's stage
+    timer. Returns (final table, clean tables, {stage: "cached"|"recomputed"}).
+    """
+    cache = ArtifactCache(cache_dir)
+    status = {}
+    clean, clean_hashes = {}, {}
+
+    def run(stage, key, compute):
+        hit = cache.get(stage, key)
+        if hit is not None:
+            status[stage] = "cached"
+            return hit
+        with timed(timings, stage):
+            df = compute()
+        status[stage] = "recomputed"
+        return df, cache.put(stage, key, df)
+
+    for table, (default_path, load, clean_table, _) in clean_stages.items():
+        path = raw_paths.get(table, default_path)
+        module = sys.modules[clean_table.__module__]
+        key = hash_parts(table, hash_file(path), season, league, code_version(module, *CLEAN_DEPENDENCIES))
+        clean[table], clean_hashes[table] = run(
+            f"clean:{table}", key,
+            lambda load=load, clean_table=clean_table, path=path:
+                clean_table(load(path), season=season, league=league))
+
+    code = code_version(*SCORE_DEPENDENCIES)
+    joined_key = hash_parts([clean_hashes[t] for t in FBREF_TABLES], code)
+    base, base_hash = run(
+        "fbref_joined", joined_key,
+        lambda: data_join.join_fbref(*[clean[t] for t in FBREF_TABLES]))
+    scored, scored_hash = run("fbref_scored", hash_parts(base_hash, weights, code),
+                              lambda: score_fbref(base, weights))
+
+    def finish():
+        final = finish_with_transfermarkt(base, scored, clean["transfermarkt"], resolve_entities,
+                                          thresholds)
+        if final is None:
+            print("Duplicate Transfermarkt keys; falling back to the full transform.")
+            joined = data_join.join_tables(*[clean[t] for t in FBREF_TABLES], clean["transfermarkt"],
+                                           resolve_entities)
+            final = data_transform.transform(joined, weights, thresholds=thresholds)
+        return final
+
+    final_key = hash_parts(base_hash, scored_hash, clean_hashes["transfermarkt"], weights,
+                           resolve_entities, thresholds, code)
+    final, _ = run("final", final_key, finish)
+
+    return final, clean, status
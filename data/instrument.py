@@ -0,0 +1,373 @@
+"""
+Stage instrumentation and a JSON-lines run log.
+
+A RunLog wraps one run of a script. Every stage opened on it records wall
+time, CPU time, rows in / out and resident memory (Linux only, None
+elsewhere):
+
+    rss_delta_mb         RSS at the stage's end minus at its start
+    rss_peak_mb          highest RSS during the stage (children included)
+    rss_process_peak_mb  highest RSS of the process so far, not of the stage
+
+The stage peak comes from the kernel's high-water mark (VmHWM), which each
+stage resets through /proc/self/clear_refs; that also resets ru_maxrss,
+so the run keeps the process peak itself. With trace_memory a stage also
+records the peak Python / numpy allocation inside it via tracemalloc
+(py_peak_mb). With profile_dir each top-level stage also runs under
+cProfile and leaves <run_id>.<stage>.prof there (read with
+python -m pstats). On exit one JSON line per stage and one for the whole
+run are appended to the log.
+
+Library code marks its own steps with step() or @traced (normalize_keys,
+the merges, z-scoring, the index, ranking, ...); these nest under the
+stage that is running and cost one global lookup when no run is active.
+
+Logging is opt-in. The standalone scripts read their settings from the
+environment and write no log unless SMARTSCOUTING_RUN_LOG is set (a
+relative path is relative to the working directory):
+
+    SMARTSCOUTING_RUN_LOG=run_log.jsonl      log path (unset / "" = no log)
+    SMARTSCOUTING_PROFILE=profiles/          cProfile output per stage
+    SMARTSCOUTING_TRACE_MEMORY=1             per-stage peak allocations
+
+pipeline.py takes --run-log [PATH] (default run_log.jsonl when given
+without a path) / --profile / --trace-memory instead.
+
+    python instrument.py show                # last run in run_log.jsonl
+    python instrument.py compare             # last two runs of the same script, stage by stage
+"""
+import argparse
+import cProfile
+import functools
+import json
+import os
+import re
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# ---------- CONFIG ----------
+
+RUN_LOG_PATH = "run_log.jsonl"
+RUN_LOG_ENV = "SMARTSCOUTING_RUN_LOG"
+PROFILE_ENV = "SMARTSCOUTING_PROFILE"
+TRACE_MEMORY_ENV = "SMARTSCOUTING_TRACE_MEMORY"
+
+RUN_STAGE = "<run>"             # stage name of the whole-run record
+
+_active = None                  # RunLog of the running script, if any
+
+
+# ---------- MEASUREMENT ----------
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def current_rss_mb():
+    """Current resident set size of this process from /proc (None where there is no /proc)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+
+
+def high_water_rss_mb():
+    """VmHWM of this process from /proc (None where there is no /proc)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, IndexError, ValueError):
+        pass
+    return None
+
+
+def reset_high_water_rss() -> bool:
+    """Reset VmHWM (and ru_maxrss) to the current RSS; False where the kernel does not allow it."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def rss_delta(start):
+    """MB the current RSS changed since start (None when it cannot be read)."""
+    end = current_rss_mb()
+    return None if start is None or end is None else round(end - start, 1)
+
+
+def row_count(obj):
+    """Rows of a DataFrame / Series / array (or an int passed as is), else None."""
+    if isinstance(obj, int) and not isinstance(obj, bool):
+        return obj
+    shape = getattr(obj, "shape", None)
+    return int(shape[0]) if shape else None
+
+
+class Stage:
+    """Measurements of one open stage; call rows_out(df) to record its output size."""
+
+    def __init__(self, name: str, path: str, depth: int, rows_in=None):
+        self.record = {"stage": path, "depth": depth, "rows_in": row_count(rows_in), "rows_out": None}
+        self.name = name
+        self.peak = 0               # tracemalloc peak of finished child stages
+        self.rss_peak = 0.0         # VmHWM of finished child stages
+
+    def rows_out(self, obj):
+        self.record["rows_out"] = row_count(obj)
+        return obj
+
+
+class _NoStage:
+    def rows_out(self, obj):
+        return obj
+
+
+_NO_STAGE = _NoStage()
+
+
+# ---------- RUN LOG ----------
+
+class RunLog:
+    def __init__(self, script: str, path: str = None, profile_dir: str = None,
+                 trace_memory: bool = False):
+        self.script = script
+        self.path = path
+        self.profile_dir = profile_dir
+        self.trace_memory = trace_memory
+        self.run_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        self.records = []
+        self._stack = []
+        self._process_peak = 0.0    # ru_maxrss no longer holds it once stages reset VmHWM
+
+    @classmethod
+    def from_env(cls, script: str) -> "RunLog":
+        """RunLog configured by the SMARTSCOUTING_* environment variables (no log file by default)."""
+        return cls(script,
+                   path=os.environ.get(RUN_LOG_ENV) or None,
+                   profile_dir=os.environ.get(PROFILE_ENV) or None,
+                   trace_memory=os.environ.get(TRACE_MEMORY_ENV, "") not in ("", "0"))
+
+    def __enter__(self):
+        global _active
+        self._previous, _active = _active, self
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+        self._started = (datetime.now(timezone.utc), time.perf_counter(), time.process_time(),
+                         current_rss_mb())
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        global _active
+        started_at, wall, cpu, rss = self._started
+        self.records.append({
+            "stage": RUN_STAGE, "depth": 0, "rows_in": None, "rows_out": None,
+            "wall_s": round(time.perf_counter() - wall, 6),
+            "cpu_s": round(time.process_time() - cpu, 6),
+            "rss_delta_mb": rss_delta(rss),
+            "rss_process_peak_mb": round(self.process_peak_mb(), 1),
+            "status": "error" if exc_type else "ok",
+        })
+        if self.trace_memory:
+            tracemalloc.stop()
+        _active = self._previous
+        self.write(started_at)
+        return False
+
+    def process_peak_mb(self) -> float:
+        """Peak RSS of the process, including peaks before any stage reset VmHWM."""
+        self._process_peak = max(self._process_peak, peak_rss_mb(), high_water_rss_mb() or 0)
+        return self._process_peak
+
+    def write(self, started_at):
+        if not self.path:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            for record in self.records:
+                line = {"run_id": self.run_id, "script": self.script,
+                        "started_at": started_at.isoformat(timespec="seconds"), **record}
+                f.write(json.dumps(line) + "\n")
+
+    @contextmanager
+    def stage(self, name: str, rows_in=None):
+        """Measure the enclosed block as name (nested under any open stage)."""
+        parent = self._stack[-1] if self._stack else None
+        path = f"{parent.record['stage']}/{name}" if parent else name
+        current = Stage(name, path, len(self._stack), rows_in)
+        if self.trace_memory:
+            if parent:
+                parent.peak = max(parent.peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self.process_peak_mb()
+        if parent:
+            parent.rss_peak = max(parent.rss_peak, high_water_rss_mb() or 0)
+        measure_rss = reset_high_water_rss() and high_water_rss_mb() is not None
+
+        profiler = cProfile.Profile() if self.profile_dir and parent is None else None
+        self._stack.append(current)
+        self.records.append(current.record)         # in start order, filled in on exit
+        wall, cpu, rss = time.perf_counter(), time.process_time(), current_rss_mb()
+        if profiler:
+            profiler.enable()
+        try:
+            yield current
+        finally:
+            if profiler:
+                profiler.disable()
+            current.record["wall_s"] = round(time.perf_counter() - wall, 6)
+            current.record["cpu_s"] = round(time.process_time() - cpu, 6)
+            current.record["rss_delta_mb"] = rss_delta(rss)
+            current.record["rss_peak_mb"] = None
+            if measure_rss:
+                rss_peak = max(current.rss_peak, high_water_rss_mb())
+                current.record["rss_peak_mb"] = round(rss_peak, 1)
+                if parent:
+                    parent.rss_peak = max(parent.rss_peak, rss_peak)
+            current.record["rss_process_peak_mb"] = round(self.process_peak_mb(), 1)
+            self._stack.pop()
+            if self.trace_memory:
+                peak = max(current.peak, tracemalloc.get_traced_memory()[1])
+                current.record["py_peak_mb"] = round(peak / 1024 ** 2, 2)
+                if parent:
+                    parent.peak = max(parent.peak, peak)
+                tracemalloc.reset_peak()
+            if profiler:
+                safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+                out = os.path.join(self.profile_dir, f"{self.run_id}.{safe}.prof")
+                profiler.dump_stats(out)
+                current.record["profile"] = out
+
+
+# ---------- HOOKS FOR LIBRARY CODE ----------
+
+def step(name: str, rows_in=None):
+    """A stage of the active run, or a no-op when nothing is being logged."""
+    if _active is None:
+        return _no_step()
+    return _active.stage(name, rows_in)
+
+
+@contextmanager
+def _no_step():
+    yield _NO_STAGE
+
+
+def traced(func):
+    """Log every call of func as a step: rows of its first argument in, of its result out."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _active is None:
+            return func(*args, **kwargs)
+        with _active.stage(func.__name__, args[0] if args else None) as s:
+            return s.rows_out(func(*args, **kwargs))
+    return wrapper
+
+
+# ---------- REPORTS ----------
+
+def read_runs(path: str = RUN_LOG_PATH) -> dict:
+    """{run_id: [records]} in log order."""
+    runs = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                runs.setdefault(record["run_id"], []).append(record)
+    return runs
+
+
+def summarize(records: list) -> dict:
+    """{stage path: totals} with repeated steps (e.g. normalize_keys) added up."""
+    out = {}
+    for r in records:
+        s = out.setdefault(r["stage"], {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0,
+                                        "rows_in": None, "rows_out": None, "rss_delta_mb": None,
+                                        "rss_peak_mb": None, "py_peak_mb": None})
+        s["calls"] += 1
+        s["wall_s"] += r["wall_s"]
+        s["cpu_s"] += r["cpu_s"]
+        for key in ("rows_in", "rows_out", "rss_delta_mb"):
+            if r.get(key) is not None:
+                s[key] = (s[key] or 0) + r[key]
+        for key in ("rss_peak_mb", "py_peak_mb"):
+            if r.get(key) is not None:
+                s[key] = max(s[key] or 0, r[key])
+    return out
+
+
+def format_run(records: list) -> str:
+    first = records[0]
+    lines = [f"{first['script']}  run {first['run_id']}  started {first['started_at']}",
+             f"  {'stage':<56} {'calls':>5} {'wall s':>9} {'cpu s':>9} {'rows in':>9} {'rows out':>9} "
+             f"{'rss +MB':>9} {'peak MB':>9}"]
+    for stage, s in summarize(records).items():
+        rss = "" if s["rss_delta_mb"] is None else f"{s['rss_delta_mb']:+.1f}"
+        peak = "" if s["rss_peak_mb"] is None else f"{s['rss_peak_mb']:.1f}"
+        lines.append(f"  {stage:<56} {s['calls']:>5} {s['wall_s']:>9.3f} {s['cpu_s']:>9.3f} "
+                     f"{_fmt(s['rows_in']):>9} {_fmt(s['rows_out']):>9} {rss:>9} {peak:>9}")
+    return "\n".join(lines)
+
+
+def compare_runs(old: list, new: list) -> str:
+    """Stage-by-stage wall / CPU / rows of two runs, slowest change first."""
+    a, b = summarize(old), summarize(new)
+    stages = list(dict.fromkeys(list(a) + list(b)))
+    zero = {"wall_s": 0.0, "cpu_s": 0.0, "rows_out": None}
+    stages.sort(key=lambda s: -abs(b.get(s, zero)["wall_s"] - a.get(s, zero)["wall_s"]))
+    lines = [f"{old[0]['run_id']} -> {new[0]['run_id']}",
+             f"  {'stage':<56} {'wall s':>9} {'->':>9} {'change':>8} {'cpu s':>9} {'rows out':>9} {'->':>9}"]
+    for stage in stages:
+        x, y = a.get(stage, zero), b.get(stage, zero)
+        change = f"{y['wall_s'] / x['wall_s'] - 1:+.0%}" if x["wall_s"] else "new"
+        if stage not in b:
+            change = "gone"
+        lines.append(f"  {stage:<56} {x['wall_s']:>9.3f} {y['wall_s']:>9.3f} {change:>8} "
+                     f"{y['cpu_s']:>9.3f} {_fmt(x['rows_out']):>9} {_fmt(y['rows_out']):>9}")
+    return "\n".join(lines)
+
+
+def _fmt(value):
+    return "" if value is None else str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or compare runs in the run log.")
+    parser.add_argument("command", choices=["show", "compare"])
+    parser.add_argument("runs", nargs="*", help="run ids (default: the latest / latest two of --script)")
+    parser.add_argument("--log", default=RUN_LOG_PATH)
+    parser.add_argument("--script", default=None, help="only runs of this script")
+    args = parser.parse_args()
+
+    runs = read_runs(args.log)
+    if args.script:
+        runs = {k: v for k, v in runs.items() if v[0]["script"] == args.script}
+    wanted = 1 if args.command == "show" else 2
+    ids = args.runs or list(runs)[-wanted:]
+    if args.command == "compare" and not args.runs and ids:
+        # default: the latest run and the one before it of the same script
+        script = runs[ids[-1]][0]["script"]
+        ids = [k for k, v in runs.items() if v[0]["script"] == script][-2:]
+    if len(ids) != wanted or any(i not in runs for i in ids):
+        parser.error(f"need {wanted} run(s) in {args.log}; found {len(runs)}")
+
+    if args.command == "show":
+        print(format_run(runs[ids[0]]))
+    else:
+        print(compare_runs(runs[ids[0]], runs[ids[1]]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from instrument import traced
+
+# ---------- CONFIG ----------
+
+# Upper bound on cached names; shared by every table cleaned in one run
+KEY_CACHE_SIZE = 65536
+
+CLUB_MAP_FBREF_TO_CANON = {
+    "Ipswich Town": "Ipswich",
+    "Leicester City": "Leicester",
+    "Manchester City": "Man City",
+    "Manchester Utd": "Man Utd",
+    "Newcastle Utd": "Newcastle",
+    "Nott'ham Forest": "Nottm Forest"
+}
+
+
+# ---------- SCALAR HELPERS ----------
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def _strip_accents(s: str) -> str:
+    s = s.strip().lower()
+    return "".join(
+        c for c in unicodedata.normalize("NFKD", s)
+        if not unicodedata.combining(c)
+    )
+
+
+def normalize_name(s: str) -> str:
+    """Lowercase, strip, and remove accents for robust joining."""
+    if pd.isna(s):
+        return ""
+    return _strip_accents(str(s))
+
+
+def standardize_club_fbref(club):
+    if pd.isna(club):
+        return club
+    club = str(club).strip()
+    return CLUB_MAP_FBREF_TO_CANON.get(club, club)
+
+
+# ---------- COLUMN HELPERS ----------
+
+def map_unique(series: pd.Series, func, missing) -> pd.Series:
+    """Apply func once per distinct value and broadcast back to every row."""
+    codes, uniques = pd.factorize(series)
+    mapped = np.empty(len(uniques) + 1, dtype=object)
+    mapped[:-1] = [func(u) for u in uniques]
+    mapped[-1] = missing            # factorize marks NaN with code -1
+    return pd.Series(mapped[codes], index=series.index, name=series.name)
+
+
+@traced
+def normalize_keys(series: pd.Series) -> pd.Series:
+    """normalize_name over a whole column, computed on unique values only."""
+    return map_unique(series, normalize_name, "")
+
+
+@traced
+def standardize_clubs(series: pd.Series) -> pd.Series:
+    """standardize_club_fbref over a whole column, computed on unique values only."""
+    return map_unique(series, standardize_club_fbref, np.nan)
+
+
+def key_cache_info():
+    """Hit/miss counts of the shared name cache (functools CacheInfo)."""
+    return _strip_accents.cache_info()
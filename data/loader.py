@@ -0,0 +1,120 @@
+import codecs
+import csv
+import io
+
+import pandas as pd
+
+from instrument import traced
+
+# ---------- CONFIG ----------
+
+SNIFF_BYTES = 64 * 1024          # how much of the file to look at before parsing
+HEADER_ROWS_TO_CHECK = 3         # FBref puts at most one title row above the header
+
+# Renamed columns that always hold text; read as strings instead of inferred
+TEXT_COLS = {"player_name", "nation", "nation_raw", "position", "club", "market_value_raw"}
+
+EXCEL_MAGIC = (
+    b"PK\x03\x04",                          # .xlsx (zip container)
+    b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1",    # .xls (OLE2)
+)
+
+
+# ---------- SNIFFING ----------
+
+def sniff_encoding(sample: bytes) -> str:
+    """utf-8-sig / utf-8 if the sample decodes cleanly, else latin-1."""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        # final=False: a multi-byte character cut off at the end of the sample is fine
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def header_row(rows: list, expected_cols) -> int:
+    """Index of the row that contains the most expected column names."""
+    expected = set(expected_cols)
+    scores = [len(expected.intersection(c.strip() for c in row)) for row in rows]
+    if not scores or max(scores) == 0:
+        return 0
+    return scores.index(max(scores))
+
+
+def sniff(path: str, expected_cols=()) -> dict:
+    """
+    Look at the first SNIFF_BYTES of a raw export and work out
+    {"kind": "csv"|"excel", "encoding": ..., "header": row index}.
+    The header is the row holding most of expected_cols, which skips the
+    FBref title row whenever there is one.
+    """
+    with open(path, "rb") as f:
+        sample = f.read(SNIFF_BYTES)
+
+    if sample.startswith(EXCEL_MAGIC):
+        top = pd.read_excel(path, header=None, nrows=HEADER_ROWS_TO_CHECK, dtype=str)
+        rows = [[str(v) for v in row if pd.notna(v)] for row in top.itertuples(index=False)]
+        return {"kind": "excel", "encoding": None, "header": header_row(rows, expected_cols)}
+
+    encoding = sniff_encoding(sample)
+    text = sample.decode(encoding, errors="ignore")
+    lines = text.splitlines()[:HEADER_ROWS_TO_CHECK]
+    rows = list(csv.reader(io.StringIO("\n".join(lines))))
+    return {"kind": "csv", "encoding": encoding, "header": header_row(rows, expected_cols)}
+
+
+# ---------- LOADING ----------
+
+def dtype_map(rename_map: dict, numeric_cols=()) -> dict:
+    """
+    Raw column -> dtype for every text column of the rename map. Numeric
+    columns are left to the C parser's numeric path (and coerced by the
+    cleaner), so integer counts stay integers in the outputs.
+    """
+    numeric = set(numeric_cols)
+    return {raw: "str" for raw, clean in rename_map.items()
+            if clean in TEXT_COLS and clean not in numeric}
+
+
+@traced
+def load_raw(path: str, rename_map: dict, numeric_cols=(), verbose: bool = True) -> pd.DataFrame:
+    """Sniff a raw FBref / Transfermarkt export and parse it exactly once."""
+    layout = sniff(path, expected_cols=rename_map.keys())
+    dtypes = dtype_map(rename_map, numeric_cols)
+
+    if verbose:
+        where = f"{layout['encoding']} CSV" if layout["kind"] == "csv" else "Excel"
+        print(f"Reading '{path}' as {where} (header on row {layout['header'] + 1})...")
+
+    if layout["kind"] == "excel":
+        return pd.read_excel(path, header=layout["header"], dtype=dtypes)
+
+    try:
+        return pd.read_csv(path, header=layout["header"], encoding=layout["encoding"], dtype=dtypes)
+    except UnicodeDecodeError:
+        # Only reachable when non-UTF-8 bytes first appear after the sniffed sample
+        if verbose:
+            print("UTF-8 failed past the sniffed sample; re-reading as latin-1...")
+        return pd.read_csv(path, header=layout["header"], encoding="latin-1", dtype=dtypes)
+
+
+def iter_raw(path: str, rename_map: dict, numeric_cols=(), chunksize: int = 100_000,
+             encoding: str = None, verbose: bool = True):
+    """
+    load_raw, chunksize rows at a time (CSV only). encoding overrides the
+    sniffed one, e.g. to restart as latin-1 after a late UnicodeDecodeError.
+    """
+    layout = sniff(path, expected_cols=rename_map.keys())
+    if layout["kind"] == "excel":
+        raise ValueError(f"'{path}' is an Excel file; streaming needs a CSV export")
+    encoding = encoding or layout["encoding"]
+
+    if verbose:
+        print(f"Streaming '{path}' as {encoding} CSV (header on row {layout['header'] + 1}, "
+              f"{chunksize} rows per chunk)...")
+
+    with pd.read_csv(path, header=layout["header"], encoding=encoding,
+                     dtype=dtype_map(rename_map, numeric_cols), chunksize=chunksize) as reader:
+        yield from reader
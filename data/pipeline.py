@@ -0,0 +1,245 @@
+"""
+Run the whole ETL (clean -> join -> transform) in one process.
+
+Tables are handed from stage to stage in memory; the per-stage CSVs that
+the standalone scripts write are only produced with --dump-intermediates.
+--format parquet (or arrow) writes the intermediates and the final table
+as columnar files instead of CSV (see storage.py). --incremental re-runs
+only the stages whose inputs changed since the last run (see incremental.py).
+--run-log writes every stage to a JSON-lines run log (see instrument.py).
+Like data_transform.py it also saves the league reference that
+reference.py and scoring_service.py score new players against, and the
+report cube of aggregates.py.
+
+    python pipeline.py
+    python pipeline.py --dump-intermediates --format parquet
+    python pipeline.py --incremental
+    python pipeline.py --compact --format parquet
+    python pipeline.py --run-log --profile profiles/ --trace-memory
+"""
+import argparse
+import os
+import time
+from contextlib import contextmanager
+
+import data_clean_defense
+import data_clean_pass
+import data_clean_possess
+import data_clean_tnsfmkt
+import data_cleaning_att
+import data_join
+import data_transform
+from aggregates import CUBE_PATH, write_cube
+from compact import compact_frame, format_report
+from incremental import CACHE_DIR, run_incremental
+from instrument import RUN_LOG_PATH, RunLog, step
+from reference import reference_from_final
+from scoring import load_weights
+from storage import FORMAT_EXTENSIONS, with_format, write_table
+from valuation import load_thresholds
+
+# ---------- CONFIG ----------
+
+# table name -> (raw path, loader, cleaner, clean output path)
+CLEAN_STAGES = {
+    "shooting": (data_cleaning_att.RAW_SHOOTING_PATH,
+                 data_cleaning_att.load_shooting,
+                 data_cleaning_att.clean_shooting,
+                 data_cleaning_att.CLEAN_SHOOTING_PATH),
+    "passing": (data_clean_pass.RAW_PASSING_PATH,
+                data_clean_pass.load_passing,
+                data_clean_pass.clean_passing,
+                data_clean_pass.CLEAN_PASSING_PATH),
+    "defense": (data_clean_defense.RAW_DEF_PATH,
+                data_clean_defense.load_defense,
+                data_clean_defense.clean_defense,
+                data_clean_defense.CLEAN_DEF_PATH),
+    "possession": (data_clean_possess.RAW_POSSESSION_PATH,
+                   data_clean_possess.load_possession,
+                   data_clean_possess.clean_possession,
+                   data_clean_possess.CLEAN_POSSESSION_PATH),
+    "transfermarkt": (data_clean_tnsfmkt.RAW_TM_PATH,
+                      data_clean_tnsfmkt.load_transfermarkt,
+                      data_clean_tnsfmkt.clean_transfermarkt,
+                      data_clean_tnsfmkt.CLEAN_TM_PATH),
+}
+
+SEASON_LABEL = "2024-25"
+LEAGUE_LABEL = "Premier League"
+
+
+# ---------- STAGE TIMING ----------
+
+@contextmanager
+def timed(timings: dict, stage: str):
+    """
+    Record the wall time of the enclosed block under timings[stage], and
+    the stage itself in the active run log.
+    """
+    start = time.perf_counter()
+    try:
+        with step(stage):
+            yield
+    finally:
+        timings[stage] = time.perf_counter() - start
+
+
+def print_timings(timings: dict):
+    total = sum(timings.values())
+    print("\nStage timings:")
+    for stage, seconds in timings.items():
+        share = seconds / total if total else 0.0
+        print(f"  {stage:<24} {seconds:9.3f}s  {share:6.1%}")
+    print(f"  {'total':<24} {total:9.3f}s")
+
+
+# ---------- PIPELINE ----------
+
+def run_pipeline(raw_paths: dict = None,
+                 final_path: str = data_transform.FINAL_PATH,
+                 season: str = SEASON_LABEL,
+                 league: str = LEAGUE_LABEL,
+                 weights: dict = None,
+                 dump_intermediates: bool = False,
+                 fmt: str = "csv",
+                 incremental: bool = False,
+                 cache_dir: str = CACHE_DIR,
+                 compact: bool = False,
+                 resolve_entities: bool = False,
+                 thresholds: dict = None,
+                 reference_path: str = data_transform.REFERENCE_PATH,
+                 cube_path: str = CUBE_PATH):
+    """
+    Clean all five raw exports, join them and score the result.
+
+    raw_paths overrides the raw file per table name (see CLEAN_STAGES).
+    fmt picks the format of the intermediate dumps ('csv', 'parquet',
+    'arrow'); the final table is written in whatever final_path ends with.
+    With incremental=True unchanged stages are served from cache_dir.
+    With compact=True every written table (and the returned one) uses the
+    compact schema of compact.py; scoring itself still runs on full dtypes.
+    resolve_entities adds fuzzy Transfermarkt matching (entity_resolution.py).
+    thresholds sets the valuation cut-offs per league / position (valuation.py).
+    The league reference (reference.py) is saved to reference_path and the
+    report cube (aggregates.py) to cube_path, each unless the path is empty.
+    Returns (final table, {stage: seconds}).
+    """
+    raw_paths = raw_paths or {}
+    timings = {}
+    clean = {}
+
+    def store(df, path, name):
+        if compact:
+            with timed(timings, f"compact:{name}"):
+                df, report = compact_frame(df)
+            print(format_report(name, report))
+        write_table(df, path)
+        return df
+
+    def save_outputs(final):
+        if reference_path:
+            with timed(timings, "save:reference"):
+                reference_from_final(final, weights).save(reference_path)
+        if cube_path:
+            with timed(timings, "save:cube"):
+                write_cube(final, cube_path)
+        with timed(timings, "save:final"):
+            return store(final, final_path, "final")
+
+    if incremental:
+        final, clean, status = run_incremental(raw_paths, CLEAN_STAGES, season, league,
+                                               weights, cache_dir, timed, timings,
+                                               resolve_entities, thresholds)
+        for stage, state in status.items():
+            print(f"  {stage:<24} {state}")
+        if dump_intermediates:
+            for table, (_, _, _, clean_path) in CLEAN_STAGES.items():
+                with timed(timings, f"dump:{table}"):
+                    store(clean[table], with_format(clean_path, fmt), table)
+        return save_outputs(final), timings
+
+    for table, (default_path, load, clean_table, clean_path) in CLEAN_STAGES.items():
+        with timed(timings, f"load:{table}"):
+            raw = load(raw_paths.get(table, default_path))
+        with timed(timings, f"clean:{table}"):
+            clean[table] = clean_table(raw, season=season, league=league)
+        if dump_intermediates:
+            with timed(timings, f"dump:{table}"):
+                store(clean[table], with_format(clean_path, fmt), table)
+
+    with timed(timings, "join"):
+        joined = data_join.join_tables(clean["shooting"], clean["passing"],
+                                       clean["defense"], clean["possession"],
+                                       clean["transfermarkt"],
+                                       resolve_entities)
+    if dump_intermediates:
+        with timed(timings, "dump:joined"):
+            store(joined, with_format(data_join.joined_path, fmt), "joined")
+
+    with timed(timings, "transform"):
+        final = data_transform.transform(joined, weights, thresholds=thresholds)
+
+    return save_outputs(final), timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the SmartScouting ETL in one process.")
+    parser.add_argument("--dump-intermediates", action="store_true",
+                        help="also write the per-stage clean and joined tables (debugging)")
+    parser.add_argument("--output", default=None,
+                        help="path of the final scored table (default: epl_player_data_final_v2.<format>)")
+    parser.add_argument("--format", default="csv", choices=sorted(FORMAT_EXTENSIONS),
+                        help="storage format of the intermediate and final tables")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only re-run stages whose inputs changed since the last run")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help="artifact cache used by --incremental")
+    parser.add_argument("--compact", action="store_true",
+                        help="store tables with categoricals, downcast numbers and no duplicate join columns")
+    parser.add_argument("--resolve-entities", action="store_true",
+                        help="fuzzy-match players missing from the exact Transfermarkt join")
+    parser.add_argument("--season", default=SEASON_LABEL)
+    parser.add_argument("--league", default=LEAGUE_LABEL)
+    parser.add_argument("--weights", default=data_transform.WEIGHTS_PATH,
+                        help="optional JSON weight table (see scoring.py)")
+    parser.add_argument("--thresholds", default=data_transform.THRESHOLDS_PATH,
+                        help="optional JSON valuation thresholds per league / position (see valuation.py)")
+    parser.add_argument("--reference", default=data_transform.REFERENCE_PATH,
+                        help="where to save the league reference for reference.py / scoring_service.py ('' to skip)")
+    parser.add_argument("--cube", default=CUBE_PATH,
+                        help="where to save the report cube of aggregates.py ('' to skip)")
+    parser.add_argument("--run-log", nargs="?", const=RUN_LOG_PATH, default=None, metavar="PATH",
+                        help=f"append per-stage time, CPU, rows, RSS change and peak RSS during the stage "
+                             f"(plus the process-wide peak so far) to this JSON-lines log "
+                             f"(default {RUN_LOG_PATH} when given without a path)")
+    parser.add_argument("--profile", default=None, metavar="DIR",
+                        help="write a cProfile file per stage into DIR")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="record each stage's peak allocations (tracemalloc; slower)")
+    args = parser.parse_args()
+
+    weights = load_weights(args.weights) if args.weights else None
+    thresholds = load_thresholds(args.thresholds) if args.thresholds else None
+    output = args.output or with_format(data_transform.FINAL_PATH, args.format)
+    with RunLog("pipeline.py", args.run_log, args.profile, args.trace_memory):
+        final, timings = run_pipeline(final_path=output,
+                                      season=args.season,
+                                      league=args.league,
+                                      weights=weights,
+                                      dump_intermediates=args.dump_intermediates,
+                                      fmt=args.format,
+                                      incremental=args.incremental,
+                                      cache_dir=args.cache_dir,
+                                      compact=args.compact,
+                                      resolve_entities=args.resolve_entities,
+                                      thresholds=thresholds,
+                                      reference_path=args.reference,
+                                      cube_path=args.cube)
+
+    print(f"Process Complete. File saved as '{os.path.abspath(output)}'")
+    print("Final shape:", final.shape)
+    print_timings(timings)
+
+
+if __name__ == "__main__":
+    main()
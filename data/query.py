@@ -0,0 +1,325 @@
+"""
+Lazy queries over the final scored table (or any stage table).
+
+A Query only records filters, a column selection and a row limit; nothing
+is read until it is collected. Building one never touches the file:
+
+    q = (Query("epl_player_data_final_v2.parquet")
+         .where("valuation_category", "==", "Undervalued")
+         .where("age", "<", 28)
+         .where("nineties", ">=", 16.7)
+         .select("player_name", "club", "age", "undervaluation_delta"))
+    q.to_pandas()                         # matching rows, selected columns
+    for batch in q.iter_batches(50_000):  # the same, one DataFrame at a time
+        ...
+    q.export("targets.parquet")           # streamed to disk batch by batch
+
+On Parquet the filters and the selection are pushed down to pyarrow's
+dataset scanner: only the needed columns are decoded and row groups whose
+min / max statistics rule out every row are skipped (write the table with
+pipeline.py --format parquet). Arrow IPC files are scanned the same way
+without the row-group skipping. CSV is read in chunks of the needed
+columns only and filtered chunk by chunk, so memory stays at one chunk;
+every chunk uses the same dtypes (csv_dtypes), numbers read as float64.
+
+Filters use pyarrow's tuple form (column, op, value) with op one of OPS;
+PRESETS holds named filter sets such as results.qmd's Prime Targets.
+
+    python query.py --preset prime_targets --columns player_name club age
+    python query.py --where "position_group == MF" --where "age < 23" --out young_mf.csv
+"""
+import argparse
+import operator
+
+import numpy as np
+import pandas as pd
+
+import data_transform
+from storage import _require_pyarrow, table_format
+
+# ---------- CONFIG ----------
+
+BATCH_ROWS = 65_536             # rows per streamed batch / CSV chunk
+DTYPE_SAMPLE_ROWS = 10_000      # CSV rows sampled for columns no schema describes
+
+# Suffixes data_join.py gives the columns of the joined tables
+JOIN_SUFFIXES = ["_tm", "_pass", "_def", "_poss"]
+
+OPS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": None,
+    "not in": None,
+}
+
+PRESETS = {
+    # results.qmd "Prime Targets": undervalued, prime age, proven starter (>= ~1500 minutes)
+    "prime_targets": [
+        ("valuation_category", "==", "Undervalued"),
+        ("age", "<", 28),
+        ("nineties", ">=", 16.7),
+    ],
+}
+
+
+# ---------- PREDICATES ----------
+
+def check_filter(col: str, op: str, value):
+    if op not in OPS:
+        raise ValueError(f"Unknown filter operator '{op}' (expected one of {list(OPS)})")
+    if op in ("in", "not in") and not isinstance(value, (list, tuple, set)):
+        raise ValueError(f"'{op}' filter on '{col}' needs a list of values, got {value!r}")
+    return (col, op, list(value) if op in ("in", "not in") else value)
+
+
+def parse_filter(text: str) -> tuple:
+    """'age < 28' / 'club in Arsenal,Chelsea' -> ("age", "<", 28); numbers are parsed as numbers."""
+    for op in sorted(OPS, key=len, reverse=True):
+        col, sep, value = text.partition(f" {op} ")
+        if sep:
+            values = [_parse_value(v.strip()) for v in value.split(",")]
+            return check_filter(col.strip(), op, values if op in ("in", "not in") else values[0])
+    raise ValueError(f"Cannot parse filter '{text}' (expected 'column op value', op one of {list(OPS)})")
+
+
+def _parse_value(text: str):
+    try:
+        number = float(text)
+    except ValueError:
+        return text
+    return int(number) if number.is_integer() and "." not in text else number
+
+
+def filter_expression(filters: list):
+    """The filters as one pyarrow dataset expression (None when there are none)."""
+    import pyarrow.dataset as ds
+
+    expr = None
+    for col, op, value in filters:
+        field = ds.field(col)
+        if op == "in":
+            term = field.isin(value)
+        elif op == "not in":
+            term = ~field.isin(value)
+        else:
+            term = OPS[op](field, value)
+        expr = term if expr is None else expr & term
+    return expr
+
+
+def filter_mask(df: pd.DataFrame, filters: list) -> np.ndarray:
+    """Rows of df passing every filter (missing values never pass)."""
+    mask = np.ones(len(df), dtype=bool)
+    for col, op, value in filters:
+        values = df[col]
+        if op == "in":
+            passed = values.isin(value)
+        elif op == "not in":
+            passed = ~values.isin(value) & values.notna()
+        else:
+            passed = OPS[op](values, value).fillna(False)
+        mask &= passed.to_numpy(dtype=bool)
+    return mask
+
+
+# ---------- CSV DTYPES ----------
+
+def csv_dtypes(path: str, columns: list = None) -> dict:
+    """
+    One dtype per CSV column, used for every chunk so a column reads the same
+    in all of them (a column that is empty in the first chunk would otherwise
+    be float there and text later). Columns the cleaners' schemas describe
+    (also with a join suffix such as club_tm) are float64 or str from the
+    schema; the rest are float64 if numeric in a sample of the file, else str.
+    """
+    import pipeline  # noqa: F401  (imports the cleaners, which register their schemas)
+    from schemas import SCHEMAS
+
+    numeric, text = set(), set()
+    for schema in SCHEMAS.values():
+        numeric |= set(schema.numeric)
+        text |= set(schema.rename_map.values()) - set(schema.numeric)
+
+    sample = pd.read_csv(path, usecols=columns, nrows=DTYPE_SAMPLE_ROWS, encoding="utf-8-sig", dtype=str)
+    dtypes = {}
+    for col in sample.columns:
+        base = next((col[:-len(s)] for s in JOIN_SUFFIXES if col.endswith(s) and col[:-len(s)]), col)
+        if base in numeric:
+            dtypes[col] = "float64"
+        elif base in text:
+            dtypes[col] = "str"
+        else:
+            values = sample[col].dropna()
+            parsed = pd.to_numeric(values, errors="coerce")
+            dtypes[col] = "float64" if len(values) and parsed.notna().all() else "str"
+    return dtypes
+
+
+# ---------- QUERY ----------
+
+class Query:
+    """Filters, column selection and limit over one table, read only when collected."""
+
+    def __init__(self, path: str = data_transform.FINAL_PATH, filters: list = None, columns: list = None,
+                 limit: int = None):
+        self.path = path
+        self.fmt = table_format(path)
+        self.filters = list(filters or [])
+        self.columns = list(columns) if columns is not None else None
+        self.row_limit = limit
+
+    def _with(self, **changes) -> "Query":
+        state = {"filters": self.filters, "columns": self.columns, "limit": self.row_limit, **changes}
+        return Query(self.path, **state)
+
+    # ---------- BUILDING ----------
+
+    def where(self, col: str, op: str, value) -> "Query":
+        return self._with(filters=self.filters + [check_filter(col, op, value)])
+
+    def preset(self, name: str) -> "Query":
+        if name not in PRESETS:
+            raise ValueError(f"Unknown preset '{name}' (expected one of {sorted(PRESETS)})")
+        return self._with(filters=self.filters + PRESETS[name])
+
+    def select(self, *columns) -> "Query":
+        return self._with(columns=list(columns))
+
+    def limit(self, n: int) -> "Query":
+        return self._with(limit=n)
+
+    def needed_columns(self) -> list:
+        """Columns that have to be read: the selection plus every filtered column."""
+        if self.columns is None:
+            return None
+        return self.columns + [c for c, _, _ in self.filters if c not in self.columns]
+
+    def explain(self) -> str:
+        where = " AND ".join(f"{c} {op} {v!r}" for c, op, v in self.filters) or "-"
+        pushdown = {"parquet": "columns + row-group statistics", "arrow": "columns",
+                    "csv": "columns (chunked scan)"}[self.fmt]
+        return (f"SELECT {', '.join(self.columns) if self.columns else '*'} FROM {self.path} WHERE {where}"
+                + (f" LIMIT {self.row_limit}" if self.row_limit is not None else "")
+                + f"  [pushdown: {pushdown}]")
+
+    # ---------- READING ----------
+
+    def _scan(self, batch_rows: int):
+        """Matching rows with only the selected columns, as DataFrames of up to batch_rows."""
+        if self.fmt == "csv":
+            chunks = pd.read_csv(self.path, usecols=self.needed_columns(), chunksize=batch_rows,
+                                 encoding="utf-8-sig", dtype=csv_dtypes(self.path, self.needed_columns()))
+            for chunk in chunks:
+                if self.filters:
+                    chunk = chunk[filter_mask(chunk, self.filters)]
+                yield chunk if self.columns is None else chunk[self.columns]
+            return
+
+        _require_pyarrow(self.fmt)
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(self.path, format="parquet" if self.fmt == "parquet" else "ipc")
+        scanner = dataset.scanner(columns=self.columns, filter=filter_expression(self.filters),
+                                  batch_size=batch_rows)
+        for batch in scanner.to_batches():
+            yield batch.to_pandas()
+
+    def iter_batches(self, batch_rows: int = BATCH_ROWS):
+        """Stream the result as DataFrames of batch_rows rows (the last one shorter)."""
+        remaining = self.row_limit
+        pending, pending_rows = [], 0
+        for batch in self._scan(batch_rows):
+            if remaining is not None:
+                batch = batch.iloc[:remaining]
+                remaining -= len(batch)
+            # filtered scans hand back many small batches; pass them on full-sized
+            if len(batch):
+                pending.append(batch)
+                pending_rows += len(batch)
+            while pending_rows >= batch_rows:
+                merged = pd.concat(pending, ignore_index=True)
+                yield merged.iloc[:batch_rows].reset_index(drop=True)
+                pending, pending_rows = [merged.iloc[batch_rows:]], pending_rows - batch_rows
+            if remaining == 0:
+                break
+        if pending_rows:
+            yield pd.concat(pending, ignore_index=True)
+
+    def to_pandas(self) -> pd.DataFrame:
+        batches = list(self.iter_batches())
+        if not batches:
+            return pd.DataFrame(columns=self.columns or [])
+        return pd.concat(batches, ignore_index=True)
+
+    def count(self) -> int:
+        """Matching rows, reading the filtered columns plus at most one more."""
+        probe = self.filters[0][0] if self.filters else (self.columns or [None])[0]
+        q = self.select(probe) if probe else self
+        return sum(len(batch) for batch in q.iter_batches())
+
+    def export(self, path: str, batch_rows: int = BATCH_ROWS) -> int:
+        """Stream the result to a CSV or Parquet file without holding it in memory; returns rows written."""
+        fmt = table_format(path)
+        rows, writer = 0, None
+        try:
+            for batch in self.iter_batches(batch_rows):
+                if fmt == "csv":
+                    batch.to_csv(path, mode="w" if rows == 0 else "a", header=rows == 0, index=False,
+                                 encoding="utf-8-sig" if rows == 0 else "utf-8")
+                else:
+                    _require_pyarrow(fmt)
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+
+                    table = pa.Table.from_pandas(batch, preserve_index=False)
+                    if writer is None:
+                        if fmt != "parquet":
+                            raise ValueError(f"export writes CSV or Parquet, not '{path}'")
+                        writer = pq.ParquetWriter(path, table.schema)
+                    # an all-null column of a later batch can come back as another type
+                    writer.write_table(table.cast(writer.schema))
+                rows += len(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows
+
+
+# ---------- CLI ----------
+
+def main():
+    parser = argparse.ArgumentParser(description="Filter and project the final table without loading all of it.")
+    parser.add_argument("--table", default=data_transform.FINAL_PATH, help="CSV, Parquet or Arrow table")
+    parser.add_argument("--preset", action="append", default=[], choices=sorted(PRESETS))
+    parser.add_argument("--where", action="append", default=[], help="e.g. 'age < 28' or 'club in Arsenal,Chelsea'")
+    parser.add_argument("--columns", nargs="+", default=None)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--out", default=None, help="stream the result to this CSV / Parquet file")
+    parser.add_argument("--explain", action="store_true", help="print the query plan and exit")
+    args = parser.parse_args()
+
+    q = Query(args.table)
+    for name in args.preset:
+        q = q.preset(name)
+    for text in args.where:
+        q = q.where(*parse_filter(text))
+    if args.columns:
+        q = q.select(*args.columns)
+    if args.limit is not None:
+        q = q.limit(args.limit)
+
+    print(q.explain())
+    if args.explain:
+        return
+    if args.out:
+        print(f"Wrote {q.export(args.out)} rows to {args.out}")
+    else:
+        print(q.to_pandas().to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
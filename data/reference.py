@@ -0,0 +1,171 @@
+"""
+Frozen league baseline for scoring new players without the full table.
+
+A reference holds what data_transform otherwise recomputes over the whole
+league on every run: the mean / std of each raw_* feature (z-scores), the
+performance-index weights, and per position group the sorted
+performance_index and market_value_millions of every scored player
+(percentiles). New rows are z-scored with the stored stats and get their
+percentiles by binary search in the stored arrays; for rows that are part
+of the fitted league this reproduces groupby(...).rank(pct=True) exactly.
+
+    python pipeline.py                            # also writes epl_reference.npz
+    python reference.py new_players.csv --out new_players_scored.csv
+"""
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+import data_transform
+from data_transform import RAW_FEATURES, ROUNDED_COLS
+from scoring import SCORE_FEATURES, raw_feature_arrays, weighted_index
+from valuation import categorize, row_thresholds
+
+# ---------- CONFIG ----------
+
+# Columns whose within-position percentiles the reference can look up
+PERCENTILE_COLS = ["performance_index", "market_value_millions"]
+
+# Columns data_transform.value_players adds
+VALUATION_COLS = ["perf_rank_pct", "value_rank_pct", "undervaluation_delta", "valuation_category"]
+
+
+# ---------- REFERENCE ----------
+
+class Reference:
+    """
+    stats:         {raw feature: (mean, std)}
+    weights:       performance-index weight table (None = scoring defaults)
+    distributions: {column: {position_group: sorted float64 array}}
+    """
+
+    def __init__(self, stats: dict, weights: dict, distributions: dict, rows: int = 0):
+        self.stats = stats
+        self.weights = weights
+        self.distributions = distributions
+        self.rows = rows
+
+    def percentiles(self, df: pd.DataFrame, col: str) -> pd.Series:
+        """
+        Percentile of each row's col within its position group, as
+        rank(pct=True) would give it had the row been part of the league:
+        (values below + average rank among ties) / group size. Rows with a
+        missing value or an unknown position group get NaN.
+        """
+        values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64")
+        return pd.Series(self.percentile_of(col, values, df["position_group"].to_numpy()), index=df.index)
+
+    def percentile_of(self, col: str, values: np.ndarray, groups: np.ndarray) -> np.ndarray:
+        out = np.full(len(values), np.nan)
+        for group, ref in self.distributions[col].items():
+            mask = groups == group
+            if not mask.any() or len(ref) == 0:
+                continue
+            x = values[mask]
+            left = np.searchsorted(ref, x, side="left")
+            right = np.searchsorted(ref, x, side="right")
+            pct = (left + (right - left + 1) / 2) / len(ref)
+            out[mask] = np.where(np.isnan(x), np.nan, pct)
+        return out
+
+    def score_arrays(self, stats: dict, position_group, market_value_millions,
+                     league=None, thresholds: dict = None) -> dict:
+        """
+        transform(df, reference=self) for a handful of rows without building
+        a DataFrame: stats is {stat column: array} (nineties, goals, npxg,
+        ...). Returns {output column: array}; goalkeepers are not filtered,
+        so callers should not pass them.
+        """
+        groups = np.asarray(position_group, dtype=object)
+        out = raw_feature_arrays(stats)
+        for col in RAW_FEATURES:
+            mu, sigma = self.stats[col]
+            out[f"z_{col}"] = (out[col] - mu) / sigma
+        z = np.column_stack([out[f] for f in SCORE_FEATURES])
+        out["performance_index"] = weighted_index(z, groups, self.weights)
+
+        value = np.asarray(market_value_millions, dtype="float64")
+        out["perf_rank_pct"] = self.percentile_of("performance_index", out["performance_index"], groups)
+        out["value_rank_pct"] = self.percentile_of("market_value_millions", value, groups)
+        out["undervaluation_delta"] = out["perf_rank_pct"] - out["value_rank_pct"]
+        out["valuation_category"] = categorize(out["undervaluation_delta"],
+                                               *row_thresholds(thresholds, league, groups))
+        for col in ROUNDED_COLS:
+            out[col] = np.round(out[col], 4)
+        return out
+
+    def save(self, path: str):
+        features = list(self.stats)
+        arrays, layout = {}, {}
+        for i, (col, by_group) in enumerate(self.distributions.items()):
+            layout[col] = {}
+            for j, (group, ref) in enumerate(by_group.items()):
+                key = f"dist_{i}_{j}"
+                arrays[key] = ref
+                layout[col][group] = key
+        meta = {"features": features, "weights": self.weights, "rows": self.rows, "layout": layout}
+        np.savez(path,
+                 mu=np.array([self.stats[f][0] for f in features], dtype="float64"),
+                 sigma=np.array([self.stats[f][1] for f in features], dtype="float64"),
+                 meta=np.array(json.dumps(meta)),
+                 **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "Reference":
+        with np.load(path, allow_pickle=False) as npz:
+            meta = json.loads(str(npz["meta"]))
+            stats = {f: (float(m), float(s)) for f, m, s in zip(meta["features"], npz["mu"], npz["sigma"])}
+            distributions = {col: {group: npz[key] for group, key in by_group.items()}
+                             for col, by_group in meta["layout"].items()}
+        return cls(stats, meta["weights"], distributions, meta["rows"])
+
+
+def fit_reference(scored: pd.DataFrame, stats: dict, weights: dict = None) -> Reference:
+    """
+    Reference from the output of data_transform.score_performance (before
+    valuation rounds it) and the feature stats it was z-scored with.
+    """
+    stats = {col: (float(mu), float(sigma)) for col, (mu, sigma) in stats.items()}
+    distributions = {}
+    for col in PERCENTILE_COLS:
+        values = pd.to_numeric(scored[col], errors="coerce")
+        distributions[col] = {
+            group: np.sort(v.dropna().to_numpy(dtype="float64"))
+            for group, v in values.groupby(scored["position_group"])
+        }
+    return Reference(stats, weights, distributions, rows=len(scored))
+
+
+def reference_from_final(final: pd.DataFrame, weights: dict = None) -> Reference:
+    """
+    The reference data_transform.py fits, rebuilt from its final table: the
+    counting stats are re-scored so the baseline is unrounded.
+    """
+    inputs = final.drop(columns=data_transform.SCORE_COLS + VALUATION_COLS, errors="ignore")
+    scored = data_transform.score_performance(inputs, weights)
+    return fit_reference(scored, data_transform.feature_stats(scored), weights)
+
+
+# ---------- CLI ----------
+
+def main():
+    parser = argparse.ArgumentParser(description="Score new players against a fitted league reference.")
+    parser.add_argument("players", help="CSV in the joined-table layout (epl_player_joined_raw.csv)")
+    parser.add_argument("--reference", default=data_transform.REFERENCE_PATH)
+    parser.add_argument("--out", default=None, help="write the scored rows here instead of printing")
+    args = parser.parse_args()
+
+    reference = Reference.load(args.reference)
+    scored = data_transform.transform(pd.read_csv(args.players), reference=reference)
+    if args.out:
+        scored.to_csv(args.out, index=False, encoding="utf-8-sig")
+        print(f"Scored {len(scored)} players against a {reference.rows}-player reference -> {args.out}")
+    else:
+        print(scored[["player_name", "position_group", "performance_index",
+                      "perf_rank_pct", "value_rank_pct", "valuation_category"]].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Declarative schemas for the five raw exports, compiled once per table type.
+
+Each cleaner builds one TableSchema from its RENAME_MAP and NUMERIC_COLS
+at import time; the constructor registers it in SCHEMAS. A compiled schema
+knows every column's canonical name, kind (text / numeric), accepted range
+and nullability, and does two jobs in the cleaner:
+
+  check_header  catch header drift on the raw export before anything is
+                joined: known aliases (FBref's "1/3" vs the Excel-mangled
+                "1-Mar") are renamed to the expected header, missing and
+                unexpected columns are reported, and a missing key column
+                (player name, club, ...) is an error.
+  coerce        convert every numeric column that did not parse as a
+                number in one batched to_numeric call over all of them,
+                then check all ranges in one pass over the numeric block.
+                Returns per-column counts of values coerced to NaN and of
+                values outside their range (reported, never dropped).
+
+    python schemas.py EPL_Passing.csv --table passing
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# ---------- CONFIG ----------
+
+# Other headers FBref uses for the same column -> the header RENAME_MAP expects
+HEADER_ALIASES = {
+    "1/3": "1-Mar",
+}
+
+# Raw columns every export may carry that the cleaners drop or ignore
+IGNORED_RAW_COLS = {"Rk", "Matches", "Born"}
+
+# Canonical columns that must be in the raw export (when the table maps them)
+REQUIRED_COLS = {"player_name", "club", "position", "nineties", "market_value_raw"}
+
+# Canonical columns that may not be missing in any row
+NON_NULLABLE_COLS = {"player_name", "club"}
+
+# Accepted range by canonical name; checked in order, first match wins
+RANGE_RULES = [
+    (lambda c: c == "age", (14, 50)),
+    (lambda c: c == "nineties", (0, 60)),
+    (lambda c: c.endswith("_pct"), (0, 100)),
+    (lambda c: "_minus_" in c, (-np.inf, np.inf)),   # over / under-performance can be negative
+    (lambda c: True, (0, np.inf)),                   # counts, totals and per-90 rates
+]
+
+# Text that to_numeric turns into an integer (anything else parses as float)
+INTEGER_TEXT = r"\s*[+-]?\d+\s*"
+
+SCHEMAS = {}
+
+
+def default_range(col: str) -> tuple:
+    for matches, bounds in RANGE_RULES:
+        if matches(col):
+            return bounds
+
+
+# ---------- SCHEMA ----------
+
+class TableSchema:
+    """
+    name:         table name (shooting, passing, defense, possession, transfermarkt)
+    rename_map:   raw header -> canonical column
+    numeric_cols: canonical columns holding numbers
+    ranges:       {canonical column: (low, high)} overriding RANGE_RULES
+    """
+
+    def __init__(self, name: str, rename_map: dict, numeric_cols=(), ranges: dict = None):
+        self.name = name
+        self.rename_map = dict(rename_map)
+        self.numeric = list(numeric_cols)
+
+        bounds = [(ranges or {}).get(c) or default_range(c) for c in self.numeric]
+        self.low = np.array([b[0] for b in bounds], dtype="float64")
+        self.high = np.array([b[1] for b in bounds], dtype="float64")
+        self.required = [raw for raw, col in self.rename_map.items() if col in REQUIRED_COLS]
+        self.non_nullable = [c for c in self.rename_map.values() if c in NON_NULLABLE_COLS]
+        self.aliases = {alias: raw for alias, raw in HEADER_ALIASES.items() if raw in self.rename_map}
+        SCHEMAS[name] = self
+
+    def columns(self) -> pd.DataFrame:
+        """The schema as a table: raw header, column, kind, range, nullable."""
+        numeric = {c: i for i, c in enumerate(self.numeric)}
+        rows = []
+        for raw, col in self.rename_map.items():
+            i = numeric.get(col)
+            rows.append({"raw": raw, "column": col, "kind": "numeric" if i is not None else "text",
+                         "low": self.low[i] if i is not None else None,
+                         "high": self.high[i] if i is not None else None,
+                         "nullable": col not in self.non_nullable})
+        return pd.DataFrame(rows)
+
+    # ---------- HEADER ----------
+
+    def drift(self, columns) -> dict:
+        """Header drift of raw columns: {"renamed": {alias: header}, "missing": [...], "unexpected": [...]}."""
+        columns = [str(c) for c in columns]
+        renamed = {c: self.aliases[c] for c in columns if c in self.aliases and self.aliases[c] not in columns}
+        present = {renamed.get(c, c) for c in columns}
+        return {
+            "renamed": renamed,
+            "missing": [raw for raw in self.rename_map if raw not in present],
+            "unexpected": [c for c in columns if renamed.get(c, c) not in self.rename_map
+                           and c not in IGNORED_RAW_COLS],
+        }
+
+    def check_header(self, raw: pd.DataFrame) -> pd.DataFrame:
+        """Rename known header aliases and report drift; a missing key column is an error."""
+        drift = self.drift(raw.columns)
+        missing_keys = [c for c in self.required if c in drift["missing"]]
+        if missing_keys:
+            raise ValueError(f"{self.name}: raw export is missing required column(s) {missing_keys}; "
+                             f"got {list(raw.columns)}")
+        for alias, header in drift["renamed"].items():
+            print(f"{self.name}: reading header '{alias}' as '{header}'")
+        if drift["missing"]:
+            print(f"{self.name}: {len(drift['missing'])} expected column(s) not in export: {drift['missing']}")
+        if drift["unexpected"]:
+            print(f"{self.name}: {len(drift['unexpected'])} column(s) not in the schema (kept as-is): {drift['unexpected']}")
+        return raw.rename(columns=drift["renamed"]) if drift["renamed"] else raw
+
+    # ---------- VALUES ----------
+
+    def coerce(self, df: pd.DataFrame) -> dict:
+        """
+        Make df's numeric columns numeric in place and return
+        {column: {"coerced": n, "out_of_range": n, "null": n}} for every
+        column with a non-zero count ("null" only for non-nullable text).
+
+        Columns the parser already read as numbers are left alone; all the
+        others are parsed together in one to_numeric call. A parsed column
+        becomes int64 only when every value is written as an integer ("5",
+        not "5.0" or "5e0") and none is missing, as to_numeric would make
+        it on its own; otherwise it stays float64.
+        """
+        report = {}
+        cols = [c for c in self.numeric if c in df.columns]
+        text = [c for c in cols if not pd.api.types.is_numeric_dtype(df[c])]
+        if text:
+            raw = df[text].to_numpy(dtype=object)
+            present = pd.notna(raw) & (raw != "")
+            parsed = pd.to_numeric(raw.ravel(), errors="coerce").astype("float64").reshape(raw.shape)
+            coerced = (present & np.isnan(parsed)).sum(axis=0)
+            for j, col in enumerate(text):
+                values = parsed[:, j]
+                whole = not np.isnan(values).any() and np.array_equal(values, np.round(values))
+                if whole:
+                    whole = pd.Series(raw[:, j]).astype(str).str.fullmatch(INTEGER_TEXT).all()
+                df[col] = values.astype("int64") if whole and len(values) else values
+                if coerced[j]:
+                    report.setdefault(col, {})["coerced"] = int(coerced[j])
+
+        if cols:
+            idx = [self.numeric.index(c) for c in cols]
+            block = df[cols].to_numpy(dtype="float64")
+            with np.errstate(invalid="ignore"):
+                outside = ((block < self.low[idx]) | (block > self.high[idx])).sum(axis=0)
+            for col, n in zip(cols, outside):
+                if n:
+                    report.setdefault(col, {})["out_of_range"] = int(n)
+
+        for col in self.non_nullable:
+            if col in df.columns:
+                nulls = int(df[col].isna().sum())
+                if nulls:
+                    report.setdefault(col, {})["null"] = nulls
+        return report
+
+    def validate(self, df: pd.DataFrame) -> dict:
+        """coerce, printing one line per column with problems."""
+        report = self.coerce(df)
+        for line in format_report(self.name, report):
+            print(line)
+        return report
+
+
+def format_report(name: str, report: dict) -> list:
+    labels = {"coerced": "not numeric (now NaN)", "out_of_range": "out of range", "null": "missing"}
+    return [f"{name}: {n} value(s) in '{col}' {labels[kind]}"
+            for col, counts in report.items() for kind, n in counts.items()]
+
+
+# ---------- CLI ----------
+
+def main():
+    import pipeline
+    from loader import load_raw
+    # the cleaners register their schemas in the imported module, not in __main__
+    from schemas import SCHEMAS
+
+    parser = argparse.ArgumentParser(description="Check a raw export against its table schema.")
+    parser.add_argument("path", help="raw CSV / Excel export")
+    parser.add_argument("--table", required=True, choices=sorted(pipeline.CLEAN_STAGES))
+    parser.add_argument("--show", action="store_true", help="print the schema itself")
+    args = parser.parse_args()
+
+    schema = SCHEMAS[args.table]
+    if args.show:
+        print(schema.columns().to_string(index=False))
+    raw = schema.check_header(load_raw(args.path, schema.rename_map, schema.numeric))
+    df = raw.rename(columns=schema.rename_map)
+    report = schema.coerce(df)
+    lines = format_report(args.table, report)
+    print("\n".join(lines) if lines else f"{args.table}: {len(df)} rows, no coerced or out-of-range values")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from instrument import traced
+
+# ---------- CONFIG ----------
+
+# Order of the z-scored features in the weight matrix
+SCORE_FEATURES = [
+    "z_raw_attacking",
+    "z_raw_progression",
+    "z_raw_creation",
+    "z_raw_defensive",
+    "z_raw_mistakes",
+]
+
+# Stats summed per 90 into each raw feature (z-scored into SCORE_FEATURES)
+RAW_FEATURE_STATS = {
+    # A. Attacking: Goals + Non-Penalty xG
+    # We use npxG to measure threat without penalty inflation
+    "raw_attacking": ["goals", "npxg"],
+    # B. Progression (Moving the ball)
+    # Passes that move the ball 10 yards or into the box + Carries
+    "raw_progression": ["progressive_passes", "progressive_carries"],
+    # C. Creation (The final ball): Assists + Expected Assisted Goals (xAG)
+    "raw_creation": ["assists", "xag"],
+    # D. Defensive Activity: Tackles + Interceptions + Blocks + Clearances
+    # Note: 'recoveries' was excluded as it wasn't in the initial column list
+    "raw_defensive": ["tackles_plus_interceptions", "blocks", "clearances"],
+    # E. Mistakes (Negative Impact): losing the ball via failed dribble or bad touch
+    "raw_mistakes": ["dispossessed", "miscontrols"],
+}
+
+FALLBACK_GROUP = "fallback"
+
+# Weighted formula per position group (mistakes carry a negative weight)
+DEFAULT_POSITION_WEIGHTS = {
+    # Forwards: Heavily favor Attacking & Creation
+    "FW": {
+        "z_raw_attacking": 0.50,
+        "z_raw_progression": 0.15,
+        "z_raw_creation": 0.25,
+        "z_raw_defensive": 0.10,
+        "z_raw_mistakes": -0.15,
+    },
+    # Midfielders: Balanced, high emphasis on Progression
+    "MF": {
+        "z_raw_attacking": 0.15,
+        "z_raw_progression": 0.35,
+        "z_raw_creation": 0.25,
+        "z_raw_defensive": 0.25,
+        "z_raw_mistakes": -0.15,
+    },
+    # Defenders: Heavily favor Defense, but reward Progression (Modern CBs)
+    "DF": {
+        "z_raw_attacking": 0.05,
+        "z_raw_progression": 0.20,
+        "z_raw_creation": 0.05,
+        "z_raw_defensive": 0.70,
+        "z_raw_mistakes": -0.15,
+    },
+    # Fallback (Equal weights)
+    FALLBACK_GROUP: {
+        "z_raw_attacking": 1.0,
+        "z_raw_progression": 1.0,
+        "z_raw_creation": 1.0,
+        "z_raw_defensive": 1.0,
+        "z_raw_mistakes": -1.0,
+    },
+}
+
+
+# ---------- WEIGHT TABLES ----------
+
+def load_weights(path: str) -> dict:
+    """
+    Read a weight table from JSON, shaped like DEFAULT_POSITION_WEIGHTS:
+    {"FW": {"z_raw_attacking": 0.5, ...}, ..., "fallback": {...}}
+    """
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_weight_matrix(weights: dict = None):
+    """
+    Turn a {position_group: {feature: weight}} table into
+    (groups, matrix), where matrix[i] holds the weights of groups[i]
+    in SCORE_FEATURES order. The fallback row is always last.
+    """
+    if weights is None:
+        weights = DEFAULT_POSITION_WEIGHTS
+    if FALLBACK_GROUP not in weights:
+        raise ValueError(f"Weight table needs a '{FALLBACK_GROUP}' entry")
+
+    groups = [g for g in weights if g != FALLBACK_GROUP] + [FALLBACK_GROUP]
+    matrix = np.zeros((len(groups), len(SCORE_FEATURES)), dtype="float64")
+    for i, group in enumerate(groups):
+        unknown = set(weights[group]) - set(SCORE_FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown features for '{group}': {sorted(unknown)}")
+        for j, feature in enumerate(SCORE_FEATURES):
+            matrix[i, j] = weights[group].get(feature, 0.0)
+    return groups, matrix
+
+
+# ---------- BATCHED SCORING ----------
+
+def position_codes(position_group, groups) -> np.ndarray:
+    """Row index into the weight matrix for every player (fallback if unknown)."""
+    lookup = {g: i for i, g in enumerate(groups) if g != FALLBACK_GROUP}
+    codes = pd.Series(position_group).map(lookup)
+    return codes.fillna(len(groups) - 1).to_numpy(dtype="int64")
+
+
+def weighted_index(z: np.ndarray, position_group, weights: dict = None) -> np.ndarray:
+    """
+    Position-weighted sum of the z-score matrix z (rows x SCORE_FEATURES).
+
+    Each player's weight row is gathered from the weight matrix and the
+    features are accumulated in SCORE_FEATURES order, which keeps the
+    result identical to the original per-row formula.
+    """
+    groups, matrix = build_weight_matrix(weights)
+
+    if position_group is not None:
+        codes = position_codes(position_group, groups)
+    else:
+        codes = np.full(len(z), len(groups) - 1, dtype="int64")
+
+    row_weights = matrix[codes]
+    score = row_weights[:, 0] * z[:, 0]
+    for j in range(1, len(SCORE_FEATURES)):
+        score = score + row_weights[:, j] * z[:, j]
+    return score
+
+
+@traced
+def performance_index(df: pd.DataFrame, weights: dict = None) -> pd.Series:
+    """Position-weighted performance index for every row at once."""
+    position_group = df["position_group"] if "position_group" in df.columns else None
+    z = df[SCORE_FEATURES].to_numpy(dtype="float64")
+    return pd.Series(weighted_index(z, position_group, weights), index=df.index, name="performance_index")
+
+
+def raw_feature_arrays(stats: dict) -> dict:
+    """
+    Raw per-90 features for a few rows given as {stat column: array}, as
+    data_transform.add_raw_features computes them (same operation order,
+    so the same floats). Missing stats count as 0, like missing values.
+    """
+    nineties = np.asarray(stats["nineties"], dtype="float64")
+    nineties = np.where(nineties == 0, np.nan, nineties)
+    features = {}
+    for feature, cols in RAW_FEATURE_STATS.items():
+        per90 = []
+        for col in cols:
+            values = np.asarray(stats.get(col, np.zeros(len(nineties))), dtype="float64")
+            per90.append(np.where(np.isnan(values), 0.0, values) / nineties)
+        score = per90[0]
+        for values in per90[1:]:
+            score = score + values
+        features[feature] = score
+    return features
@@ -0,0 +1,339 @@
+"""
+Local HTTP scoring service over the final table and the league reference.
+
+The final table (epl_player_data_final_v2.csv) and the reference artifact
+(epl_reference.npz, see reference.py) are loaded once and kept in memory;
+a background task re-loads them whenever either file's mtime changes and
+swaps the new state in atomically, so in-flight requests never see a
+half-loaded table. Requests are served concurrently by asyncio.
+
+    GET  /health
+    GET  /player?name=Bukayo Saka[&club=Arsenal]      rows of the final table
+    POST /players   {"names": ["Bukayo Saka", ...]}   batch lookup
+    POST /score     {"players": [{"position_group": "MF", "nineties": 20.1,
+                                  "goals": 4, "npxg": 3.2, ...,
+                                  "market_value_millions": 45}, ...]}
+
+/score rates new players against the frozen reference with the same
+formula as data_transform.transform (Reference.score_arrays), without
+going through pandas. Valuation cut-offs come from --thresholds (the same
+JSON as pipeline.py --thresholds), resolved per player from its
+position_group and league (default --league).
+
+    python scoring_service.py --port 8765 --thresholds thresholds.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+import data_transform
+from keys import normalize_name, standardize_club_fbref
+from pipeline import LEAGUE_LABEL
+from reference import Reference
+from scoring import RAW_FEATURE_STATS
+from storage import read_table
+from valuation import load_thresholds
+
+# ---------- CONFIG ----------
+
+HOST = "127.0.0.1"
+PORT = 8765
+RELOAD_INTERVAL = 1.0            # seconds between mtime checks
+MAX_BODY_BYTES = 1024 * 1024
+
+# Final-table columns returned by the lookup endpoints (when present)
+LOOKUP_COLS = [
+    "player_name", "club", "position", "position_group", "age", "season", "league",
+    "nineties", "market_value_millions",
+    "z_raw_attacking", "z_raw_progression", "z_raw_creation", "z_raw_defensive", "z_raw_mistakes",
+    "performance_index", "perf_rank_pct", "value_rank_pct", "undervaluation_delta",
+    "valuation_category",
+]
+
+# Stat columns /score reads from each player
+SCORE_INPUT_COLS = ["nineties"] + [c for cols in RAW_FEATURE_STATS.values() for c in cols]
+
+# Reference.score_arrays outputs returned by /score
+SCORE_OUTPUT_COLS = [
+    "raw_attacking", "raw_progression", "raw_creation", "raw_defensive", "raw_mistakes",
+    "performance_index", "perf_rank_pct", "value_rank_pct", "undervaluation_delta",
+    "valuation_category",
+]
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# ---------- STATE ----------
+
+def _json_value(v):
+    if isinstance(v, (np.integer,)):
+        return int(v)
+    if isinstance(v, (float, np.floating)):
+        return None if math.isnan(v) else float(v)
+    return v
+
+
+def mtime(path: str):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+class ServiceState:
+    """One immutable snapshot of the final table index and the reference."""
+
+    def __init__(self, final_path: str, reference_path: str):
+        self.mtimes = (mtime(final_path), mtime(reference_path))
+        self.loaded_at = time.time()
+
+        final = read_table(final_path)
+        cols = [c for c in LOOKUP_COLS if c in final.columns]
+        records = [{c: _json_value(v) for c, v in zip(cols, row)}
+                   for row in final[cols].itertuples(index=False, name=None)]
+
+        # player_key -> [(club_key, record)]
+        self.players = {}
+        for key, club_key, record in zip(final["player_key"], final["club_key"], records):
+            self.players.setdefault(key, []).append((club_key, record))
+        self.rows = len(final)
+
+        self.reference = Reference.load(reference_path) if self.mtimes[1] is not None else None
+
+    def lookup(self, name: str, club: str = None) -> list:
+        matches = self.players.get(normalize_name(name), [])
+        if club:
+            wanted = {normalize_name(club), normalize_name(standardize_club_fbref(club))}
+            matches = [m for m in matches if m[0] in wanted]
+        return [record for _, record in matches]
+
+
+# ---------- SCORING ----------
+
+def score_players(reference: Reference, players: list, thresholds: dict = None,
+                  league: str = LEAGUE_LABEL) -> list:
+    """
+    Score joined-layout player dicts against the reference in one batch,
+    with the valuation thresholds of each player's league (default league)
+    and position_group.
+    """
+    if reference is None:
+        raise RequestError(503, "no reference artifact loaded; run data_transform.py first")
+    if not isinstance(players, list) or not players:
+        raise RequestError(400, "'players' must be a non-empty list")
+    for i, p in enumerate(players):
+        if not isinstance(p, dict) or "position_group" not in p or "nineties" not in p:
+            raise RequestError(400, f"player {i} needs at least position_group and nineties")
+        if not isinstance(p["position_group"], str):
+            raise RequestError(400, f"player {i}: position_group must be a string")
+        if not isinstance(p.get("league", league), str):
+            raise RequestError(400, f"player {i}: league must be a string")
+        if p["position_group"] == "GK":
+            raise RequestError(400, f"player {i}: goalkeepers are not scored")
+
+    def column(col):
+        values = [p.get(col) for p in players]
+        return np.array([np.nan if v is None else v for v in values], dtype="float64")
+
+    try:
+        stats = {col: column(col) for col in SCORE_INPUT_COLS}
+        value = column("market_value_millions")
+    except (TypeError, ValueError):
+        raise RequestError(400, "stat values must be numbers")
+
+    out = reference.score_arrays(stats, [p["position_group"] for p in players], value,
+                                 league=np.array([p.get("league", league) for p in players], dtype=object),
+                                 thresholds=thresholds)
+    results = []
+    for i, p in enumerate(players):
+        row = {"player_name": p.get("player_name"), "position_group": p["position_group"]}
+        row.update({col: _json_value(out[col][i]) for col in SCORE_OUTPUT_COLS})
+        results.append(row)
+    return results
+
+
+# ---------- SERVICE ----------
+
+class ScoringService:
+    def __init__(self, final_path: str = data_transform.FINAL_PATH,
+                 reference_path: str = data_transform.REFERENCE_PATH,
+                 reload_interval: float = RELOAD_INTERVAL, thresholds: dict = None,
+                 league: str = LEAGUE_LABEL):
+        self.final_path = final_path
+        self.reference_path = reference_path
+        self.reload_interval = reload_interval
+        self.thresholds = thresholds
+        self.league = league
+        self.state = ServiceState(final_path, reference_path)
+
+    async def watch(self):
+        """Reload (off the event loop) whenever the final table or reference changes."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            current = (mtime(self.final_path), mtime(self.reference_path))
+            if current == self.state.mtimes or current[0] is None:
+                continue
+            try:
+                state = await loop.run_in_executor(None, ServiceState, self.final_path, self.reference_path)
+            except Exception as exc:          # keep serving the old snapshot
+                print(f"Reload failed, keeping previous data: {exc}")
+                continue
+            self.state = state
+            print(f"Reloaded {state.rows} players (reference: {state.reference is not None})")
+
+    def route(self, method: str, target: str, body: bytes):
+        url = urlsplit(target)
+        state = self.state            # one snapshot per request
+
+        if url.path == "/health":
+            return {"status": "ok", "players": state.rows, "loaded_at": state.loaded_at,
+                    "reference_rows": state.reference.rows if state.reference else None}
+
+        if url.path == "/player":
+            if method != "GET":
+                raise RequestError(405, "use GET")
+            query = parse_qs(url.query)
+            if "name" not in query:
+                raise RequestError(400, "missing ?name=")
+            matches = state.lookup(query["name"][0], query.get("club", [None])[0])
+            if not matches:
+                raise RequestError(404, f"no player named '{query['name'][0]}'")
+            return {"players": matches}
+
+        if method != "POST" and url.path in ("/players", "/score"):
+            raise RequestError(405, "use POST")
+        if url.path == "/players":
+            names = _parse_json(body).get("names")
+            if not isinstance(names, list):
+                raise RequestError(400, "'names' must be a list")
+            return {"players": {name: state.lookup(name) for name in names}}
+        if url.path == "/score":
+            return {"players": score_players(state.reference, _parse_json(body).get("players"),
+                                             self.thresholds, self.league)}
+
+        raise RequestError(404, f"unknown path {url.path}")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """One HTTP/1.1 connection; requests are served until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = parse_request_line(request_line.decode("latin-1"))
+                    bad_request = None
+                except RequestError as exc:
+                    method = target = version = None
+                    bad_request = exc
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0) or 0)
+                keep_alive = (bad_request is None and headers.get("connection", "").lower() != "close"
+                              and version == "HTTP/1.1")
+                try:
+                    if bad_request is not None:
+                        raise bad_request
+                    if length > MAX_BODY_BYTES:
+                        raise RequestError(413, f"body over {MAX_BODY_BYTES} bytes")
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = 200, self.route(method, target, body)
+                except RequestError as exc:
+                    status, payload = exc.status, {"error": str(exc)}
+                except Exception as exc:
+                    status, payload = 500, {"error": repr(exc)}
+
+                data = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = HOST, port: int = PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        watcher = asyncio.create_task(self.watch())
+        print(f"Serving {self.state.rows} players on http://{host}:{port} "
+              f"(reference: {self.state.reference is not None})")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+
+def parse_request_line(line: str) -> tuple:
+    """
+    (method, target, version) of an HTTP request line. The method ends at the
+    first space and the version starts after the last, so a target with
+    unencoded spaces ("/player?name=Bukayo Saka") stays whole.
+    """
+    method, _, rest = line.rstrip("\r\n").partition(" ")
+    target, _, version = rest.rpartition(" ")
+    if not method.isalpha() or not target or not version.startswith("HTTP/"):
+        raise RequestError(400, f"malformed request line {line.strip()!r}")
+    return method, target, version
+
+
+def _parse_json(body: bytes) -> dict:
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        raise RequestError(400, "body is not valid JSON")
+    if not isinstance(payload, dict):
+        raise RequestError(400, "body must be a JSON object")
+    return payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve player lookups and scoring over local HTTP.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--final", default=data_transform.FINAL_PATH,
+                        help="final table (.csv, .parquet or .arrow)")
+    parser.add_argument("--reference", default=data_transform.REFERENCE_PATH)
+    parser.add_argument("--reload-interval", type=float, default=RELOAD_INTERVAL)
+    parser.add_argument("--thresholds", default=None,
+                        help="JSON valuation thresholds per league / position (as pipeline.py --thresholds)")
+    parser.add_argument("--league", default=LEAGUE_LABEL, help="league of players sent without one")
+    args = parser.parse_args()
+
+    thresholds = load_thresholds(args.thresholds) if args.thresholds else None
+    service = ScoringService(args.final, args.reference, args.reload_interval, thresholds, args.league)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Sensitivity of the rankings and valuation categories to the position weights.
+
+The FW / MF / DF / fallback weights in scoring.DEFAULT_POSITION_WEIGHTS are
+hand-picked. This scores the final table's z-score profile (z_raw_*) under
+many alternative weight tables at once: a block of configurations is one
+matrix product per position group, (players x features) @ (features x
+configs), followed by within-position percentiles and the valuation
+cut-offs for the whole block. Only running per-config and per-player
+summaries are kept, so memory depends on the block size and not on the
+number of configurations; the block size follows from the number of
+players and a memory budget (--memory-mb).
+
+Configurations scale every baseline weight by a factor, either sampled
+uniformly in [1 - scale, 1 + scale] per group and feature, or taken from
+a grid of per-feature factors shared by every group (steps ** 5 tables).
+
+    python sensitivity.py --samples 20000 --scale 0.5
+    python sensitivity.py --grid 0.5 0.75 1 1.25 1.5 --out-players stability.csv
+"""
+import argparse
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+
+import data_transform
+from bootstrap import rank_pct
+from scoring import SCORE_FEATURES, build_weight_matrix, load_weights, position_codes, weighted_index
+from storage import read_table
+from valuation import CATEGORIES, bin_codes, frame_thresholds, load_thresholds
+
+# ---------- CONFIG ----------
+
+BLOCK_CONFIGS = 1024            # most configurations scored together
+MEMORY_BUDGET_MB = 512          # working memory of one block
+ARRAYS_PER_CONFIG = 12          # configs x players float64 arrays alive at once (ranking included)
+DEFAULT_SAMPLES = 10_000
+DEFAULT_SCALE = 0.5
+SEED = 42
+
+PLAYER_COLS = ["player_name", "club", "season", "league", "position_group"]
+
+
+# ---------- CONFIGURATIONS ----------
+
+def sample_weights(n: int, scale: float = DEFAULT_SCALE, weights: dict = None, seed: int = SEED):
+    """
+    (groups, configs): n weight matrices (n x groups x SCORE_FEATURES), each
+    baseline weight scaled by its own factor in [1 - scale, 1 + scale].
+    """
+    groups, matrix = build_weight_matrix(weights)
+    factors = np.random.default_rng(seed).uniform(1 - scale, 1 + scale, size=(n,) + matrix.shape)
+    return groups, matrix * factors
+
+
+def grid_weights(factors, weights: dict = None):
+    """(groups, configs): every combination of one factor per feature, applied to all groups."""
+    groups, matrix = build_weight_matrix(weights)
+    combos = np.array(list(itertools.product(factors, repeat=len(SCORE_FEATURES))), dtype="float64")
+    return groups, matrix * combos[:, None, :]
+
+
+# ---------- ENGINE ----------
+
+def config_block(n: int, budget_mb: float = MEMORY_BUDGET_MB) -> int:
+    """Configurations per block so one block's arrays over n players fit in budget_mb."""
+    per_config = max(n, 1) * 8 * ARRAYS_PER_CONFIG
+    return int(max(1, min(BLOCK_CONFIGS, budget_mb * 1024 ** 2 // per_config)))
+
+
+def _corr_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pearson correlation of every row of a with the vector b."""
+    a = a - a.mean(axis=1, keepdims=True)
+    b = b - b.mean()
+    return (a @ b) / np.sqrt(np.einsum("ij,ij->i", a, a) * (b @ b))
+
+
+def _by_player(values: np.ndarray, ranked: np.ndarray) -> np.ndarray:
+    """Per-ranked-player values spread over every player (NaN for the unranked)."""
+    out = np.full(len(ranked), np.nan)
+    out[ranked] = values
+    return out
+
+
+def sensitivity(final: pd.DataFrame, groups: list, configs: np.ndarray, thresholds: dict = None,
+                weights: dict = None, block: int = None, budget_mb: float = MEMORY_BUDGET_MB):
+    """
+    Score final (players with a complete z_raw_* profile) under every
+    weight matrix in configs (configs x groups x SCORE_FEATURES, rows in
+    the order of groups, see scoring.build_weight_matrix).
+
+    Returns (per_config, per_player):
+      per_config: Spearman correlation of performance_index with the
+                  baseline, share of players keeping their category, number
+                  of Undervalued players and overlap (Jaccard) with the
+                  baseline Undervalued list
+      per_player: share of configs keeping the baseline category, share
+                  Undervalued, and the range of perf_rank_pct
+    Players without a position_group have no within-position percentile:
+    they are left out of the category statistics and get NaN in per_player.
+    The baseline is the final table's valuation_category and its score
+    under weights (the table's own weight table), recomputed unrounded from
+    the z-scores so the rounding of performance_index adds no ties. Configs
+    are scored block by block, block (default: config_block of budget_mb)
+    at a time.
+    """
+    df = final.dropna(subset=SCORE_FEATURES).reset_index(drop=True)
+    z = df[SCORE_FEATURES].to_numpy(dtype="float64")
+    n = len(df)
+    weight_rows = position_codes(df["position_group"], groups)
+    weight_sets = [(g, np.flatnonzero(weight_rows == g)) for g in np.unique(weight_rows)]
+    pos_codes, positions = pd.factorize(df["position_group"])
+    rank_sets = [np.flatnonzero(pos_codes == i) for i in range(len(positions))]
+    ranked = pos_codes >= 0
+    n_ranked = int(ranked.sum())
+
+    value_pct = df.groupby("position_group")["market_value_millions"].rank(pct=True).to_numpy(dtype="float64")
+    upper, lower = frame_thresholds(df, thresholds)
+    base_rank = pd.Series(weighted_index(z, df["position_group"], weights)).rank().to_numpy(dtype="float64")
+    block = block or config_block(n, budget_mb)
+    base_cats = pd.Categorical(df["valuation_category"], categories=CATEGORIES).codes[ranked]
+    base_under = base_cats == 2
+    value_pct, upper, lower = value_pct[ranked], upper[ranked], lower[ranked]
+
+    spearman, agreement, n_under, overlap = [], [], [], []
+    kept = np.zeros(n_ranked, dtype="int64")
+    under = np.zeros(n_ranked, dtype="int64")
+    pct_min = np.full(n_ranked, np.inf)
+    pct_max = np.full(n_ranked, -np.inf)
+
+    for start in range(0, len(configs), block):
+        w = configs[start:start + block]
+        scores = np.empty((len(w), n))
+        for g, rows in weight_sets:
+            scores[:, rows] = w[:, g, :] @ z[rows].T
+
+        spearman.append(_corr_rows(rank_pct(scores), base_rank))
+        pct = np.full_like(scores, np.nan)
+        for rows in rank_sets:
+            pct[:, rows] = rank_pct(scores[:, rows])
+        pct = pct[:, ranked]
+        cats = bin_codes(pct - value_pct, upper, lower)
+
+        same = cats == base_cats
+        is_under = cats == 2
+        agreement.append(same.mean(axis=1))
+        n_under.append(is_under.sum(axis=1))
+        both = (is_under & base_under).sum(axis=1)
+        union = (is_under | base_under).sum(axis=1)
+        overlap.append(np.divide(both, union, out=np.ones(len(w)), where=union > 0))
+
+        kept += same.sum(axis=0)
+        under += is_under.sum(axis=0)
+        np.minimum(pct_min, np.nanmin(pct, axis=0), out=pct_min)
+        np.maximum(pct_max, np.nanmax(pct, axis=0), out=pct_max)
+
+    per_config = pd.DataFrame({
+        "config": np.arange(len(configs)),
+        "spearman": np.concatenate(spearman),
+        "category_agreement": np.concatenate(agreement),
+        "undervalued": np.concatenate(n_under),
+        "undervalued_overlap": np.concatenate(overlap),
+    })
+    for g, group in enumerate(groups):
+        for j, feature in enumerate(SCORE_FEATURES):
+            per_config[f"{group}/{feature}"] = configs[:, g, j]
+
+    per_player = df[[c for c in PLAYER_COLS if c in df.columns]].copy()
+    per_player["perf_rank_pct"] = df["perf_rank_pct"]
+    per_player["perf_rank_pct_min"] = _by_player(pct_min, ranked)
+    per_player["perf_rank_pct_max"] = _by_player(pct_max, ranked)
+    per_player["valuation_category"] = df["valuation_category"]
+    per_player["category_stability"] = _by_player(kept / len(configs), ranked)
+    per_player["share_undervalued"] = _by_player(under / len(configs), ranked)
+    return per_config.round(4), per_player.round(4)
+
+
+# ---------- CLI ----------
+
+def main():
+    parser = argparse.ArgumentParser(description="Weight-sweep sensitivity of rankings and valuation categories.")
+    parser.add_argument("--final", default=data_transform.FINAL_PATH)
+    parser.add_argument("--weights", default=None, help="JSON weight table the final table was scored with")
+    parser.add_argument("--thresholds", default=None, help="JSON valuation thresholds the final table used")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="random weight tables to try")
+    parser.add_argument("--scale", type=float, default=DEFAULT_SCALE, help="max relative change per weight")
+    parser.add_argument("--grid", type=float, nargs="+", default=None,
+                        help="per-feature factors; tries every combination instead of sampling")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--memory-mb", type=float, default=MEMORY_BUDGET_MB,
+                        help="working memory per block of configurations")
+    parser.add_argument("--out-configs", default=None, help="write the per-config table as CSV")
+    parser.add_argument("--out-players", default=None, help="write the per-player table as CSV")
+    args = parser.parse_args()
+
+    weights = load_weights(args.weights) if args.weights else None
+    if args.grid:
+        groups, configs = grid_weights(args.grid, weights)
+    else:
+        groups, configs = sample_weights(args.samples, args.scale, weights, args.seed)
+
+    start = time.perf_counter()
+    per_config, per_player = sensitivity(read_table(args.final), groups, configs,
+                                         load_thresholds(args.thresholds) if args.thresholds else None,
+                                         weights, budget_mb=args.memory_mb)
+    print(f"Scored {len(per_player)} players under {len(configs)} weight tables "
+          f"in {time.perf_counter() - start:.1f}s")
+    print(per_config[["spearman", "category_agreement", "undervalued", "undervalued_overlap"]]
+          .describe().round(3).to_string())
+
+    if args.out_configs:
+        per_config.to_csv(args.out_configs, index=False)
+        print(f"Wrote per-config results to {args.out_configs}")
+    if args.out_players:
+        per_player.to_csv(args.out_players, index=False)
+        print(f"Wrote per-player stability to {args.out_players}")
+    else:
+        print(per_player.sort_values("category_stability").head(15).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from instrument import traced
+
+# ---------- CONFIG ----------
+
+# File extension -> storage format
+FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+}
+
+FORMAT_EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+# Rows per Parquet row group; smaller groups let filtered reads skip more
+ROW_GROUP_ROWS = 100_000
+
+# Columns that read_table can filter on
+PREDICATE_COLS = ["season", "league", "position_group"]
+
+
+# ---------- HELPERS ----------
+
+def table_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Unknown table format for '{path}' (expected one of {sorted(FORMATS)})")
+    return FORMATS[ext]
+
+
+def with_format(path: str, fmt: str) -> str:
+    """Swap the extension of path for the one used by fmt ('csv', 'parquet', 'arrow')."""
+    return os.path.splitext(path)[0] + FORMAT_EXTENSIONS[fmt]
+
+
+def _require_pyarrow(fmt: str):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError(f"Reading/writing {fmt} tables needs pyarrow (pip install pyarrow)") from e
+
+
+def _as_list(value):
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    return [value]
+
+
+def build_filters(season=None, league=None, position_group=None) -> list:
+    """Predicates as pyarrow filter tuples, e.g. [("season", "in", ["2024-25"])]."""
+    filters = []
+    for col, value in zip(PREDICATE_COLS, (season, league, position_group)):
+        values = _as_list(value)
+        if values is not None:
+            filters.append((col, "in", values))
+    return filters
+
+
+# ---------- WRITE / READ ----------
+
+@traced
+def write_table(df: pd.DataFrame, path: str):
+    """Write df as CSV (UTF-8-SIG), Parquet or Arrow IPC, picked by extension."""
+    fmt = table_format(path)
+    if fmt == "csv":
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+    elif fmt == "parquet":
+        _require_pyarrow(fmt)
+        df.to_parquet(path, index=False, engine="pyarrow", row_group_size=ROW_GROUP_ROWS)
+    else:
+        _require_pyarrow(fmt)
+        df.reset_index(drop=True).to_feather(path)
+
+
+@traced
+def read_table(path: str, columns: list = None,
+               season=None, league=None, position_group=None) -> pd.DataFrame:
+    """
+    Read a stage table, optionally only some columns and only the rows whose
+    season / league / position_group is in the given value(s).
+
+    Parquet pushes both down to the reader (column projection and row-group
+    pruning); Arrow IPC and CSV read the projected columns and filter after.
+    """
+    fmt = table_format(path)
+    filters = build_filters(season, league, position_group)
+
+    if fmt == "parquet":
+        _require_pyarrow(fmt)
+        return pd.read_parquet(path, columns=columns, filters=filters or None, engine="pyarrow")
+
+    # Predicate columns must be loaded to filter on, even if not projected
+    load_cols = None
+    if columns is not None:
+        load_cols = list(columns) + [c for c, _, _ in filters if c not in columns]
+
+    if fmt == "arrow":
+        _require_pyarrow(fmt)
+        df = pd.read_feather(path, columns=load_cols)
+    else:
+        df = pd.read_csv(path, usecols=load_cols)
+
+    if filters:
+        mask = pd.Series(True, index=df.index)
+        for col, _, values in filters:
+            mask &= df[col].isin(values)
+        df = df[mask].reset_index(drop=True)
+
+    if columns is not None:
+        df = df[list(columns)]
+    return df
+
+
+@traced
+def read_rows(path: str, rows, columns: list = None) -> pd.DataFrame:
+    """
+    The rows at positions rows of a table, in that order. Parquet decodes
+    only the row groups holding them, Arrow IPC memory-maps the file and
+    converts only those rows, CSV stops parsing after the last one.
+    """
+    rows = np.asarray(rows, dtype="int64")
+    wanted = np.unique(rows)
+    fmt = table_format(path)
+
+    if fmt == "parquet":
+        _require_pyarrow(fmt)
+        import pyarrow.parquet as pq
+        f = pq.ParquetFile(path)
+        sizes = [f.metadata.row_group(i).num_rows for i in range(f.num_row_groups)]
+        starts = np.concatenate([[0], np.cumsum(sizes)])
+        groups = np.unique(np.searchsorted(starts, wanted, "right") - 1)
+        table = f.read_row_groups(groups.tolist(), columns=columns, use_pandas_metadata=True)
+        # position of each wanted row within the row groups read
+        offsets = np.concatenate([[0], np.cumsum(starts[groups + 1] - starts[groups])[:-1]])
+        group = np.searchsorted(starts[groups], wanted, "right") - 1
+        df = table.take(wanted - starts[groups][group] + offsets[group]).to_pandas()
+    elif fmt == "arrow":
+        _require_pyarrow(fmt)
+        from pyarrow import feather
+        df = feather.read_table(path, columns=columns, memory_map=True).take(wanted).to_pandas()
+    else:
+        keep = set(wanted.tolist())
+        df = pd.read_csv(path, usecols=columns, nrows=len(wanted),
+                         skiprows=lambda line: line > 0 and line - 1 not in keep)
+
+    if columns is not None:
+        df = df[list(columns)]
+    return df.iloc[np.searchsorted(wanted, rows)].reset_index(drop=True)
+
+
+# ---------- HIVE PARTITIONS ----------
+
+def write_partition(df: pd.DataFrame, path: str, partition: dict):
+    """
+    Write one file of a hive-style partitioned table (.../<col>=<value>/part.<ext>).
+    The partition columns are left out of the file: readers of the whole
+    directory (pd.read_parquet(dir), pyarrow.dataset) take them from the path.
+    """
+    write_table(df.drop(columns=list(partition), errors="ignore"), path)
+
+
+def read_partition(path: str, partition: dict, columns: list = None, rows=None) -> pd.DataFrame:
+    """
+    Read one file written by write_partition (only the row positions rows,
+    if given), with its partition columns added back.
+    """
+    load_cols = None if columns is None else [c for c in columns if c not in partition]
+    df = read_table(path, columns=load_cols) if rows is None else read_rows(path, rows, load_cols)
+    for col, value in partition.items():
+        if columns is None or col in columns:
+            df[col] = value
+    return df if columns is None else df[list(columns)]
+
@@ -0,0 +1,147 @@
+"""
+Chunked cleaning for raw exports too large to load at once.
+
+Runs a table's cleaner on chunksize rows at a time and appends each
+cleaned chunk to the output CSV, so peak memory depends on the chunk size
+and not on the file size. Every cleaning step is row-local, so the only
+thing a chunk cannot know on its own is a column's final dtype: a stat
+column with one blank cell anywhere in the file is float64 (written
+"5.0") in the whole-file cleaner, while a chunk without blanks would
+parse it as int64 ("5"). A first pass over the chunks therefore records
+the dtype every output column ends up with across the whole file and the
+second pass casts each chunk to it, which keeps the output byte-identical
+to the standalone scripts.
+
+    python streaming.py shooting --input EPL_Shooting_big.csv --chunksize 200000
+    python streaming.py                     # all five tables, default paths
+"""
+import argparse
+import contextlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+import data_clean_defense
+import data_clean_pass
+import data_clean_possess
+import data_clean_tnsfmkt
+import data_cleaning_att
+from loader import iter_raw
+from pipeline import CLEAN_STAGES, LEAGUE_LABEL, SEASON_LABEL
+
+# ---------- CONFIG ----------
+
+CHUNK_SIZE = 100_000
+
+# table name -> (rename map, numeric columns) the loader parses with
+RAW_SCHEMAS = {
+    "shooting": (data_cleaning_att.RENAME_MAP, data_cleaning_att.NUMERIC_COLS),
+    "passing": (data_clean_pass.RENAME_MAP, data_clean_pass.NUMERIC_COLS),
+    "defense": (data_clean_defense.RENAME_MAP, data_clean_defense.NUMERIC_COLS),
+    "possession": (data_clean_possess.RENAME_MAP, data_clean_possess.NUMERIC_COLS),
+    "transfermarkt": (data_clean_tnsfmkt.RENAME_MAP, ()),
+}
+
+
+# ---------- DTYPES ----------
+
+def merge_dtype(a, b):
+    """The dtype pandas gives a column that is a in some rows and b in others."""
+    if a == b:
+        return a
+    numeric = (pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b)
+               and not pd.api.types.is_bool_dtype(a) and not pd.api.types.is_bool_dtype(b))
+    return np.result_type(a, b) if numeric else np.dtype(object)
+
+
+def cast_chunk(chunk: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    """Widen the numeric columns of one cleaned chunk to their whole-file dtype."""
+    for col, dtype in dtypes.items():
+        if chunk[col].dtype != dtype and pd.api.types.is_numeric_dtype(dtype):
+            chunk[col] = chunk[col].astype(dtype)
+    return chunk
+
+
+# ---------- STREAMING ----------
+
+def clean_chunks(table: str, input_file: str, chunksize: int, season: str, league: str,
+                 encoding: str = None, verbose: bool = True):
+    """Yield the cleaned chunks of one raw export."""
+    rename_map, numeric_cols = RAW_SCHEMAS[table]
+    clean = CLEAN_STAGES[table][2]
+    for raw in iter_raw(input_file, rename_map, numeric_cols, chunksize, encoding, verbose):
+        yield clean(raw, season=season, league=league)
+
+
+def output_dtypes(table: str, input_file: str, chunksize: int, season: str, league: str,
+                  encoding: str = None) -> dict:
+    """First pass: the dtype of every output column over the whole file."""
+    dtypes = {}
+    # the cleaners' per-chunk messages are repeated by the writing pass
+    with contextlib.redirect_stdout(io.StringIO()):
+        for chunk in clean_chunks(table, input_file, chunksize, season, league, encoding):
+            for col, dtype in chunk.dtypes.items():
+                dtypes[col] = merge_dtype(dtypes[col], dtype) if col in dtypes else dtype
+    return dtypes
+
+
+def _write_stream(table, input_file, output_file, chunksize, season, league, encoding):
+    dtypes = output_dtypes(table, input_file, chunksize, season, league, encoding)
+    rows = 0
+    # utf-8-sig writes its BOM once, on the first write to the handle
+    with open(output_file, "w", encoding="utf-8-sig", newline="") as f:
+        for i, chunk in enumerate(clean_chunks(table, input_file, chunksize, season, league,
+                                               encoding, verbose=False)):
+            cast_chunk(chunk, dtypes).to_csv(f, index=False, header=(i == 0))
+            rows += len(chunk)
+    return rows
+
+
+def stream_clean(table: str, input_file: str = None, output_file: str = None,
+                 chunksize: int = CHUNK_SIZE, season: str = SEASON_LABEL,
+                 league: str = LEAGUE_LABEL) -> int:
+    """
+    Clean one raw export chunk by chunk into output_file (by default the
+    table's usual raw / clean paths). Returns the number of rows written.
+    """
+    raw_path, _, _, clean_path = CLEAN_STAGES[table]
+    input_file = input_file or raw_path
+    output_file = output_file or clean_path
+
+    try:
+        rows = _write_stream(table, input_file, output_file, chunksize, season, league, None)
+    except UnicodeDecodeError:
+        # Only reachable when non-UTF-8 bytes first appear after the sniffed sample
+        print("UTF-8 failed past the sniffed sample; re-reading as latin-1...")
+        rows = _write_stream(table, input_file, output_file, chunksize, season, league, "latin-1")
+
+    print(f"Saved {rows} cleaned {table} rows to: {os.path.abspath(output_file)}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean raw exports chunk by chunk.")
+    parser.add_argument("tables", nargs="*", metavar="table",
+                        help=f"any of {', '.join(CLEAN_STAGES)} (default: all)")
+    parser.add_argument("--input", default=None, help="raw export (only with a single table)")
+    parser.add_argument("--output", default=None, help="clean CSV (only with a single table)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--season", default=SEASON_LABEL)
+    parser.add_argument("--league", default=LEAGUE_LABEL)
+    args = parser.parse_args()
+
+    tables = args.tables or list(CLEAN_STAGES)
+    unknown = set(tables) - set(CLEAN_STAGES)
+    if unknown:
+        parser.error(f"unknown table(s): {', '.join(sorted(unknown))}")
+    if (args.input or args.output) and len(tables) != 1:
+        parser.error("--input/--output need exactly one table")
+
+    for table in tables:
+        stream_clean(table, args.input, args.output, args.chunksize, args.season, args.league)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Synthetic FBref / Transfermarkt exports for benchmarking.
+
+Each FBref table carries the real raw headers of its cleaner's rename map
+(plus the columns the cleaners drop, such as Rk and Matches) and, except
+for passing, the title row above the header, so the generated files go
+through exactly the same load / clean / join / transform code as the
+real exports.
+
+    python synthetic.py 100000 bench_raw/
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+import data_clean_defense
+import data_clean_pass
+import data_clean_possess
+import data_cleaning_att
+from keys import CLUB_MAP_FBREF_TO_CANON
+
+# ---------- CONFIG ----------
+
+FIRST_NAMES = ["Martin", "Bukayo", "Darwin", "José", "Søren", "Nicolás", "Bryan",
+               "Kai", "Luís", "Ødegaard", "Thiago", "Benoît", "Mikel", "İlkay"]
+LAST_NAMES = ["Ødegaard", "Saka", "Núñez", "Sá", "Mbeumo", "Havertz", "Jiménez",
+              "Díaz", "Müller", "Dúbravka", "Gündoğan", "Señor", "Kovačić", "Ruiz"]
+CLUBS = list(CLUB_MAP_FBREF_TO_CANON) + ["Arsenal", "Chelsea", "Liverpool", "Brentford",
+                                         "Fulham", "Everton", "Brighton", "Bournemouth"]
+POSITIONS = ["DF", "MF", "FW", "GK", "DF,MF", "MF,FW", "FW,MF", "DF,FW", "MF,DF"]
+NATIONS = ["eng ENG", "ci CIV", "br BRA", "es ESP", "no NOR", "fr FRA", "ar ARG", "de GER"]
+TM_POSITIONS = ["Centre-Back", "Left-Back", "Central Midfield", "Right Winger", "Centre-Forward"]
+
+# Raw columns the cleaners drop or keep untouched, per table
+EXTRA_COLS = {
+    "shooting": ["Rk", "SoT%", "Matches"],
+    "passing": ["Rk", "Born", "Matches"],
+    "defense": ["Rk", "Matches"],
+    "possession": ["Rk", "Matches"],
+}
+
+# Identity columns sit under an empty title cell in FBref's first row
+IDENTITY_COLS = {"Rk", "Player", "Nation", "Pos", "Squad", "Age", "Born", "90s", "Matches"}
+
+FBREF_TABLES = {
+    "shooting": (data_cleaning_att.RENAME_MAP, "EPL_Shooting.csv", "Standard"),
+    "passing": (data_clean_pass.RENAME_MAP, "EPL_Passing.csv", None),
+    "defense": (data_clean_defense.RENAME_MAP, "EPL_Defensive.csv", "Tackles"),
+    "possession": (data_clean_possess.RENAME_MAP, "EPL_Possession.csv", "Touches"),
+}
+TM_FILE = "Transfermkt.csv"
+
+
+# ---------- GENERATORS ----------
+
+def players(n: int, seed: int = 0) -> pd.DataFrame:
+    """The shared identity columns of n synthetic players."""
+    rng = np.random.default_rng(seed)
+    ids = pd.Series(np.arange(n)).astype(str)
+    first = pd.Series(FIRST_NAMES).iloc[rng.integers(0, len(FIRST_NAMES), n)].to_numpy()
+    last = pd.Series(LAST_NAMES).iloc[rng.integers(0, len(LAST_NAMES), n)].to_numpy()
+    nineties = np.round(rng.uniform(0, 38, n), 1)
+    nineties[rng.random(n) < 0.05] = 0.0
+    return pd.DataFrame({
+        "Rk": np.arange(1, n + 1),
+        "Player": first + " " + last + " " + ids.to_numpy(),
+        "Nation": pd.Series(NATIONS).iloc[rng.integers(0, len(NATIONS), n)].to_numpy(),
+        "Pos": pd.Series(POSITIONS).iloc[rng.integers(0, len(POSITIONS), n)].to_numpy(),
+        "Squad": pd.Series(CLUBS).iloc[rng.integers(0, len(CLUBS), n)].to_numpy(),
+        "Age": rng.integers(17, 38, n),
+        "Born": rng.integers(1987, 2008, n),
+        "90s": nineties,
+        "Matches": "Matches",
+    })
+
+
+def fbref_table(people: pd.DataFrame, table: str, seed: int = 0) -> pd.DataFrame:
+    """One FBref export: identity columns + every raw stat column of the table."""
+    rename_map, _, _ = FBREF_TABLES[table]
+    rng = np.random.default_rng(seed + 1 + list(FBREF_TABLES).index(table))
+    n = len(people)
+    cols = ["Rk"] + list(rename_map) + [c for c in EXTRA_COLS[table] if c != "Rk" and c not in rename_map]
+    out = {}
+    for col in cols:
+        if col in people.columns:
+            out[col] = people[col]
+        elif col.endswith("%"):
+            out[col] = np.round(rng.uniform(0, 100, n), 1)
+        else:
+            out[col] = np.round(rng.gamma(2.0, 3.0, n), 2)
+    return pd.DataFrame(out)
+
+
+def transfermarkt_table(people: pd.DataFrame, seed: int = 0, coverage: float = 0.9) -> pd.DataFrame:
+    """Transfermarkt export (Name, Position, Value, Team) for a share of the players."""
+    rng = np.random.default_rng(seed + 99)
+    keep = rng.random(len(people)) < coverage
+    sub = people[keep]
+    n = len(sub)
+    millions = np.round(rng.lognormal(2.0, 1.2, n), 2)
+    values = np.where(millions >= 1, "€" + pd.Series(millions).map("{:.2f}m".format).to_numpy(),
+                      "€" + pd.Series((millions * 1000).round()).map("{:.0f}k".format).to_numpy())
+    values[rng.random(n) < 0.02] = "-"
+    return pd.DataFrame({
+        "Name": sub["Player"].to_numpy(),
+        "Position": pd.Series(TM_POSITIONS).iloc[rng.integers(0, len(TM_POSITIONS), n)].to_numpy(),
+        "Value": values,
+        # Transfermarkt already uses the canonical short club names
+        "Team": sub["Squad"].map(lambda c: CLUB_MAP_FBREF_TO_CANON.get(c, c)).to_numpy(),
+    })
+
+
+# ---------- WRITERS ----------
+
+def write_fbref(df: pd.DataFrame, path: str, title: str = None):
+    """Write like FBref's CSV export, with an over-header title row if given."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if title is not None:
+            f.write(",".join("" if c in IDENTITY_COLS else title for c in df.columns) + "\n")
+        df.to_csv(f, index=False)
+
+
+def write_exports(n: int, out_dir: str, seed: int = 0) -> dict:
+    """Generate all five raw exports for n players; returns {table: path}."""
+    os.makedirs(out_dir, exist_ok=True)
+    people = players(n, seed)
+    paths = {}
+    for table, (_, filename, title) in FBREF_TABLES.items():
+        paths[table] = os.path.join(out_dir, filename)
+        write_fbref(fbref_table(people, table, seed), paths[table], title)
+    paths["transfermarkt"] = os.path.join(out_dir, TM_FILE)
+    transfermarkt_table(people, seed).to_csv(paths["transfermarkt"], index=False, encoding="utf-8")
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic FBref/Transfermarkt exports.")
+    parser.add_argument("players", type=int)
+    parser.add_argument("out_dir")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for table, path in write_exports(args.players, args.out_dir, args.seed).items():
+        print(f"{table:<14} {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Valuation categories from undervaluation_delta (perf pct - value pct).
+
+A player is "Undervalued" when the delta is above the upper threshold,
+"Overvalued" when below the lower one and "Fair Value" otherwise. The
+thresholds can differ per league and position group; the table is a dict
+(or JSON file) shaped like DEFAULT_THRESHOLDS, where the most specific
+entry wins:
+
+    {"default": {"undervalued": 0.25, "overvalued": -0.15},
+     "La Liga": {...},            # one league, every position
+     "*/DF": {...},               # one position, every league
+     "La Liga/DF": {...}}         # one league and position
+
+Categorizing is a binning of the delta array against per-row threshold
+arrays, and sweep() counts the categories under many threshold tables at
+once from the sorted deltas, so tuning never has to re-run the transform.
+
+    python valuation.py --upper 0.2 0.25 0.3 --lower -0.1 -0.15 -0.2 --by position_group
+"""
+import argparse
+import itertools
+import json
+
+import numpy as np
+import pandas as pd
+
+from instrument import traced
+
+# ---------- CONFIG ----------
+
+DEFAULT_GROUP = "default"
+ANY = "*"
+
+DEFAULT_THRESHOLDS = {
+    # If Performance percentile is >25% higher than Value percentile -> Undervalued
+    # If Performance percentile is >15% lower than Value percentile -> Overvalued
+    DEFAULT_GROUP: {"undervalued": 0.25, "overvalued": -0.15},
+}
+
+# Bin order: code 0 / 1 / 2
+CATEGORIES = np.array(["Overvalued", "Fair Value", "Undervalued"], dtype=object)
+
+
+# ---------- THRESHOLD TABLES ----------
+
+def load_thresholds(path: str) -> dict:
+    """Read a threshold table from JSON (see the module docstring)."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def resolve_thresholds(thresholds: dict, league, position_group):
+    """(undervalued, overvalued) thresholds for one league / position group."""
+    if DEFAULT_GROUP not in thresholds:
+        raise ValueError(f"Threshold table needs a '{DEFAULT_GROUP}' entry")
+    for key in (f"{league}/{position_group}", str(league), f"{ANY}/{position_group}", DEFAULT_GROUP):
+        if key in thresholds:
+            entry = thresholds[key]
+            missing = {"undervalued", "overvalued"} - set(entry)
+            if missing:
+                raise ValueError(f"Threshold entry '{key}' is missing {sorted(missing)}")
+            return float(entry["undervalued"]), float(entry["overvalued"])
+
+
+def row_thresholds(thresholds: dict, league, position_group):
+    """
+    Per-row (undervalued, overvalued) threshold arrays for arrays of league
+    and position_group (either may be None: unknown for every row),
+    resolved once per distinct (league, position_group) pair.
+    """
+    thresholds = thresholds or DEFAULT_THRESHOLDS
+    n = len(position_group) if position_group is not None else len(league)
+    if league is None:
+        league = np.full(n, None, dtype=object)
+    if position_group is None:
+        position_group = np.full(n, None, dtype=object)
+
+    league_codes, leagues = pd.factorize(league, use_na_sentinel=False)
+    pos_codes, positions = pd.factorize(position_group, use_na_sentinel=False)
+    pair_codes, pairs = pd.factorize(league_codes * max(len(positions), 1) + pos_codes)
+
+    resolved = np.empty((len(pairs), 2), dtype="float64")
+    for i, pair in enumerate(pairs):
+        lg, pos = divmod(int(pair), max(len(positions), 1))
+        resolved[i] = resolve_thresholds(thresholds, leagues[lg], positions[pos])
+    return resolved[pair_codes, 0], resolved[pair_codes, 1]
+
+
+def frame_thresholds(df: pd.DataFrame, thresholds: dict = None):
+    """row_thresholds for the league / position_group columns of df."""
+    return row_thresholds(thresholds,
+                          df["league"] if "league" in df.columns else None,
+                          df["position_group"] if "position_group" in df.columns else
+                          np.full(len(df), None, dtype=object))
+
+
+# ---------- BINNING ----------
+
+def bin_codes(delta, upper, lower) -> np.ndarray:
+    """
+    0 (Overvalued) / 1 (Fair Value) / 2 (Undervalued) per delta, for
+    scalar or per-row thresholds. A missing delta is Fair Value, as before.
+    """
+    delta = np.asarray(delta, dtype="float64")
+    above = delta > upper
+    codes = np.where(above, 2, 1).astype("int8")
+    codes[(delta < lower) & ~above] = 0
+    return codes
+
+
+def categorize(delta, upper, lower) -> np.ndarray:
+    """Category label per delta for scalar or per-row thresholds."""
+    return CATEGORIES[bin_codes(delta, upper, lower)]
+
+
+@traced
+def categorize_players(df: pd.DataFrame, thresholds: dict = None) -> pd.Series:
+    """valuation_category of every row from its undervaluation_delta, league and position."""
+    upper, lower = frame_thresholds(df, thresholds)
+    labels = categorize(df["undervaluation_delta"].to_numpy(dtype="float64"), upper, lower)
+    return pd.Series(labels, index=df.index, name="valuation_category", dtype=object)
+
+
+# ---------- SWEEPS ----------
+
+def threshold_grid(uppers, lowers) -> list:
+    """One default-only threshold table per (undervalued, overvalued) pair."""
+    return [{DEFAULT_GROUP: {"undervalued": u, "overvalued": lo}}
+            for u, lo in itertools.product(uppers, lowers)]
+
+
+def sweep(df: pd.DataFrame, configs: list, by: str = None) -> pd.DataFrame:
+    """
+    Category counts and shares of df's undervaluation_delta under every
+    threshold table in configs, optionally per value of column by.
+
+    Thresholds are constant within a (league, position_group) cell, so the
+    deltas are sorted once per cell and every config's counts come from two
+    binary searches per cell, for all configs at once; rows are never
+    re-binned per config.
+    """
+    n = len(df)
+    league = df["league"].to_numpy() if "league" in df.columns else np.full(n, None, dtype=object)
+    position = (df["position_group"].to_numpy() if "position_group" in df.columns
+                else np.full(n, None, dtype=object))
+    if by is not None:
+        group_codes, group_names = pd.factorize(df[by], use_na_sentinel=False)
+    else:
+        group_codes, group_names = np.zeros(n, dtype="int64"), pd.Index(["all"])
+
+    cells = pd.DataFrame({"league": league, "position": position, "group": group_codes})
+    cell_codes, cell_keys = pd.factorize(pd.MultiIndex.from_frame(cells))
+    delta = df["undervaluation_delta"].to_numpy(dtype="float64")
+
+    counts = np.zeros((len(configs), len(CATEGORIES), len(group_names)), dtype="int64")
+    order = np.argsort(cell_codes, kind="stable")
+    bounds = np.searchsorted(cell_codes[order], np.arange(len(cell_keys) + 1))
+    for c, (lg, pos, group) in enumerate(cell_keys):
+        values = delta[order[bounds[c]:bounds[c + 1]]]
+        missing = np.isnan(values).sum()              # NaN deltas are always Fair Value
+        values = np.sort(values[~np.isnan(values)])
+
+        upper, lower = np.array([resolve_thresholds(cfg, lg, pos) for cfg in configs],
+                                dtype="float64").reshape(-1, 2).T
+        under = len(values) - np.searchsorted(values, upper, side="right")
+        # Overvalued needs delta < lower and not delta > upper
+        over = np.where(lower <= upper,
+                        np.searchsorted(values, lower, side="left"),
+                        np.searchsorted(values, upper, side="right"))
+        counts[:, 2, group] += under
+        counts[:, 0, group] += over
+        counts[:, 1, group] += len(values) + missing - under - over
+
+    rows = []
+    for i, cfg in enumerate(configs):
+        default = cfg.get(DEFAULT_GROUP, {})
+        for g, name in enumerate(group_names):
+            total = counts[i, :, g].sum()
+            row = {"config": i,
+                   "undervalued": default.get("undervalued"),
+                   "overvalued": default.get("overvalued")}
+            if by is not None:
+                row[by] = name
+            row["players"] = int(total)
+            for c, label in enumerate(CATEGORIES):
+                row[label] = int(counts[i, c, g])
+                row[f"{label} share"] = round(counts[i, c, g] / total, 4) if total else np.nan
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+# ---------- CLI ----------
+
+def main():
+    import data_transform
+    from storage import read_table
+
+    parser = argparse.ArgumentParser(description="Sweep valuation thresholds over the final table.")
+    parser.add_argument("--final", default=data_transform.FINAL_PATH)
+    parser.add_argument("--upper", type=float, nargs="+", default=[0.25],
+                        help="undervalued thresholds to try")
+    parser.add_argument("--lower", type=float, nargs="+", default=[-0.15],
+                        help="overvalued thresholds to try")
+    parser.add_argument("--by", default=None, help="break counts down by this column (e.g. position_group)")
+    parser.add_argument("--out", default=None, help="write the sweep table as CSV")
+    args = parser.parse_args()
+
+    columns = ["undervaluation_delta", "league", "position_group"] + ([args.by] if args.by else [])
+    final = read_table(args.final, columns=list(dict.fromkeys(columns)))
+    result = sweep(final, threshold_grid(args.upper, args.lower), by=args.by)
+    if args.out:
+        result.to_csv(args.out, index=False)
+        print(f"Wrote {len(result)} sweep rows to {args.out}")
+    else:
+        print(result.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+# The pipeline scripts in data/ import each other by plain module name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "data"))
+
+
+@pytest.fixture(scope="session")
+def joined_table(tmp_path_factory):
+    """Joined raw table of a synthetic 400-player league."""
+    import data_join
+    from pipeline import CLEAN_STAGES
+    from synthetic import write_exports
+
+    paths = write_exports(400, str(tmp_path_factory.mktemp("raw")))
+    clean = {table: clean_table(load(paths[table]))
+             for table, (_, load, clean_table, _) in CLEAN_STAGES.items()}
+    return data_join.join_tables(clean["shooting"], clean["passing"], clean["defense"],
+                                 clean["possession"], clean["transfermarkt"])
+
+
+@pytest.fixture(scope="session")
+def final_table(joined_table):
+    """Final scored table of the synthetic league."""
+    import data_transform
+
+    return data_transform.transform(joined_table)
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from aggregates import build_cube
+
+
+def cube_value(cube, dimension, metric, stat="median", **keys):
+    rows = cube[(cube["dimension"] == dimension) & (cube["metric"] == metric)]
+    for col, value in keys.items():
+        rows = rows[rows[col] == value]
+    assert len(rows) == 1
+    return rows[stat].iloc[0]
+
+
+def test_quadrant_medians_match_the_report_filters(final_table):
+    # results.qmd: filter(position_group %in% ..., nineties >= 10) then median(per 90)
+    cube = build_cube(final_table)
+    df = final_table
+    prog = df[df["position_group"].isin(["MF", "FW", "DF"]) & (df["nineties"] >= 10)]
+    defn = df[df["position_group"].isin(["DF", "MF"]) & (df["nineties"] >= 10)]
+    expected = {
+        ("prog_quadrant", "prog_pass_p90"): (prog["progressive_passes"] / prog["nineties"]).median(),
+        ("prog_quadrant", "prog_carry_p90"): (prog["progressive_carries"] / prog["nineties"]).median(),
+        ("def_quadrant", "aggression_p90"): (defn["tackles_plus_interceptions"] / defn["nineties"]).median(),
+        ("def_quadrant", "protection_p90"): ((defn["blocks"] + defn["clearances"]) / defn["nineties"]).median(),
+    }
+    for (dimension, metric), median in expected.items():
+        assert cube_value(cube, dimension, metric) == round(median, 4)
+    assert cube_value(cube, "def_quadrant", "aggression_p90", "players") == len(defn)
+    # the unfiltered league median is a different number
+    assert cube_value(cube, "all", "aggression_p90") != cube_value(cube, "def_quadrant", "aggression_p90")
+
+
+def test_prime_targets_carry_the_league_wide_percent_ranks(final_table):
+    cube = build_cube(final_table)
+    df = final_table
+    targets = (df[(df["valuation_category"] == "Undervalued") & (df["age"] < 28) & (df["nineties"] >= 16.7)]
+               .sort_values("performance_index", ascending=False, kind="stable").head(15))
+    assert len(targets) > 0
+
+    def percent_rank(x):
+        # dplyr: (min_rank(x) - 1) / (sum(!is.na(x)) - 1)
+        x = x.to_numpy(dtype=float)
+        valid = x[~np.isnan(x)]
+        return pd.Series([(valid < v).sum() / (len(valid) - 1) * 100 for v in x], index=df.index)
+
+    perf = percent_rank(df["performance_index"])
+    cost = percent_rank(df["market_value_millions"])
+    rows = cube[cube["dimension"] == "prime_targets"]
+    assert set(rows["player_name"]) == set(targets["player_name"])
+    for idx, name in targets["player_name"].items():
+        assert cube_value(cube, "prime_targets", "league_perf_pct", player_name=name) == round(perf[idx], 4)
+        assert cube_value(cube, "prime_targets", "league_value_pct", player_name=name) == round(cost[idx], 4)
+
+
+def test_club_totals_match_the_landscape_sums(final_table):
+    cube = build_cube(final_table)
+    totals = final_table.groupby("club")["performance_index"].agg(["sum", "size"])
+    for club, row in totals.iterrows():
+        assert np.isclose(cube_value(cube, "club", "performance_index", "sum", club=club), row["sum"], atol=1e-4)
+        assert cube_value(cube, "club", "performance_index", "players", club=club) == row["size"]
@@ -0,0 +1,54 @@
+import warnings
+
+import numpy as np
+
+from bootstrap import BATCH_REPLICATES, RunningSummary, bootstrap, replicate_block
+
+
+def test_batch_size_follows_the_player_count():
+    assert replicate_block(300) == BATCH_REPLICATES
+    assert 1 <= replicate_block(100_000) < BATCH_REPLICATES
+    assert replicate_block(10 ** 9, budget_mb=1) == 1
+
+
+def test_players_without_a_position_group_are_not_ranked(final_table):
+    final = final_table.copy()
+    final["position_group"] = final["position_group"].astype(object)
+    final.loc[final.index[:5], "position_group"] = np.nan
+    out = bootstrap(final, 60, workers=1)
+
+    unranked, ranked = out.iloc[:5], out.iloc[5:]
+    share_cols = ["category_stability", "share_overvalued", "share_fair_value", "share_undervalued"]
+    assert unranked[["perf_rank_pct_lo", "perf_rank_pct_hi"] + share_cols].isna().all().all()
+    assert ranked["perf_rank_pct_lo"].between(0, 1).all()
+    np.testing.assert_allclose(ranked[share_cols[1:]].sum(axis=1), 1.0, atol=1e-3)
+
+
+def test_results_do_not_depend_on_workers(final_table):
+    a = bootstrap(final_table, 40, workers=1, budget_mb=0.5)
+    b = bootstrap(final_table, 40, workers=2, budget_mb=0.5)
+    assert a.equals(b)
+
+
+def test_running_summary_equals_the_stacked_replicates():
+    rng = np.random.default_rng(3)
+    values = rng.normal(size=(533, 40))
+    values[rng.random(values.shape) < 0.05] = np.nan
+    values[:, 0] = np.nan                      # never valid
+    values[:, 1] = 2.5                         # constant
+    values[:, 2] = rng.integers(0, 4, 533)     # ties
+
+    for confidence in (0.5, 0.9, 0.99):
+        tail = (1 - confidence) / 2
+        for skipna in (False, True):
+            summary = RunningSummary(len(values), confidence, skipna=skipna)
+            for start in range(0, len(values), 70):
+                summary.add(values[start:start + 70])
+            assert len(summary.low) == len(summary.high) < len(values)
+
+            quantile = np.nanquantile if skipna else np.quantile
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                expected = quantile(values, [tail, 1 - tail], axis=0)
+            np.testing.assert_allclose(summary.interval(), expected, rtol=1e-12, atol=1e-12)
+            np.testing.assert_allclose(summary.std(), np.std(values, axis=0, ddof=1), rtol=1e-9)
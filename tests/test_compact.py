@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from compact import compact_frame
+
+
+def as_values(s: pd.Series) -> list:
+    return s.astype(object).where(s.notna(), None).tolist()
+
+
+def test_compact_joined_table_keeps_every_value(joined_table):
+    compact, report = compact_frame(joined_table)
+    assert report["bytes_after"] < report["bytes_before"]
+    for col in report["dropped_columns"]:
+        base = col.rsplit("_", 1)[0]
+        present = joined_table[col].notna()
+        assert as_values(joined_table.loc[present, col]) == as_values(joined_table.loc[present, base])
+
+    for col in compact.columns:
+        before, after = joined_table[col], compact[col]
+        assert after.isna().equals(before.isna()), col
+        if pd.api.types.is_float_dtype(after) and after.dtype == "float32":
+            np.testing.assert_allclose(after.to_numpy(dtype="float64"), before.to_numpy(dtype="float64"),
+                                       rtol=1e-6, equal_nan=True)
+        elif pd.api.types.is_numeric_dtype(after):
+            np.testing.assert_array_equal(after.to_numpy(dtype="float64"), before.to_numpy(dtype="float64"))
+        else:
+            assert as_values(after) == as_values(before), col
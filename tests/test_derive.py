@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from derive import nation_codes, position_groups
+
+
+def extract_country_code(nation):
+    """The per-row rules the cleaners applied before derive.py."""
+    if pd.isna(nation):
+        return ""
+    parts = str(nation).split()
+    last = parts[-1]
+    return "".join(ch for ch in last if ch.isupper())
+
+
+def position_group(pos):
+    if pd.isna(pos):
+        return "Other"
+    pos = str(pos)
+    if "GK" in pos:
+        return "GK"
+    if "DF" in pos:
+        return "DF"
+    if "MF" in pos:
+        return "MF"
+    if "FW" in pos:
+        return "FW"
+    return "Other"
+
+
+def test_nation_codes_equal_the_per_row_rule():
+    rng = np.random.default_rng(0)
+    values = ["eng ENG", "ci CIV", "br BRA", "ENG", "wls WAL", "  nir NIR ", "kr KOR", np.nan, None]
+    for dtype in (object, "str"):
+        nations = pd.Series(rng.choice(np.array(values, dtype=object), 2000), dtype=dtype)
+        assert nation_codes(nations).tolist() == nations.apply(extract_country_code).tolist()
+
+
+def test_position_groups_equal_the_per_row_rule():
+    rng = np.random.default_rng(1)
+    values = ["DF", "MF", "FW", "GK", "DF,MF", "MF,FW", "FW,MF", "FW,DF", "GK,DF", "", "??", np.nan, None]
+    for dtype in (object, "str"):
+        positions = pd.Series(rng.choice(np.array(values, dtype=object), 2000), dtype=dtype)
+        assert position_groups(positions).tolist() == positions.apply(position_group).tolist()
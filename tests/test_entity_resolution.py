@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+import entity_resolution
+from entity_resolution import best_one_to_one, candidate_pairs, resolve_unmatched
+from keys import normalize_keys, standardize_clubs
+
+FIRST = ["james", "lucas", "mateo", "oliver", "kai", "noah", "bruno", "diego", "hugo", "emil",
+         "ivan", "leon", "marco", "nico", "omar", "pablo", "rafael", "samir", "tomas", "yannick"]
+LAST = ["anders", "berg", "carl", "dahl", "eriks", "fred", "gunnar", "hakon", "ivar", "jens",
+        "karl", "lars", "magnus", "niels", "olaf", "peder", "rune", "stig", "tor", "ulf"]
+CLUBS = ["Arsenal", "Chelsea", "Liverpool", "Everton", "Fulham", "Brentford"]
+
+
+def block(names, clubs):
+    df = pd.DataFrame({"player_name": names, "club": clubs, "season": "2024-25", "league": "Premier League"})
+    df["player_key"] = normalize_keys(df["player_name"])
+    df["club_key"] = normalize_keys(standardize_clubs(df["club"]))
+    return df
+
+
+def league():
+    # 400 names ending in "sson": their shared trigrams are common enough to be pruned
+    names = [f"{f} {l}sson" for f in FIRST for l in LAST]
+    clubs = [CLUBS[i % len(CLUBS)] for i in range(len(names))]
+    return names, clubs
+
+
+def test_pruning_does_not_lower_name_scores():
+    names, clubs = league()
+    right = block(names, clubs)
+    left = block(names[:200], clubs[:200])
+    pairs = candidate_pairs(left, right)
+    exact = pairs[pairs["left_row"] == pairs["right_row"]]
+    assert len(exact) == 200
+    np.testing.assert_allclose(exact["name_score"], 1.0)
+
+    unpruned = entity_resolution.MIN_TRIGRAM_POSTINGS
+    try:
+        entity_resolution.MIN_TRIGRAM_POSTINGS = 10 ** 9
+        full = candidate_pairs(left, right)
+    finally:
+        entity_resolution.MIN_TRIGRAM_POSTINGS = unpruned
+    merged = pairs.merge(full, on=["left_row", "right_row"], suffixes=("", "_full"))
+    np.testing.assert_allclose(merged["name_score"], merged["name_score_full"])
+
+
+def test_exact_and_near_exact_names_are_matched():
+    names, clubs = league()
+    tm = block(names, clubs)
+    tm["position"] = "MF"
+    tm["market_value_eur"] = np.arange(len(tm), dtype="float64") * 1e6 + 1e6
+    tm["market_value_millions"] = tm["market_value_eur"] / 1e6
+
+    # Unmatched FBref rows: 30 exact names, 30 with one letter dropped
+    exact = names[:30]
+    typos = [n[:-1] for n in names[30:60]]
+    full = block(exact + typos, clubs[:60])
+    for col in ["player_name_tm", "club_tm", "position_tm"]:
+        full[col] = pd.Series(None, index=full.index, dtype=object)
+    full["market_value_eur"] = np.nan
+    full["market_value_millions"] = np.nan
+
+    out = resolve_unmatched(full, tm)
+    assert (out["tm_match_method"] == "fuzzy").all()
+    np.testing.assert_array_equal(out["market_value_eur"], tm["market_value_eur"].iloc[:60])
+    assert (out["tm_match_confidence"].iloc[:30] == 1.0).all()
+
+
+def test_one_to_one_gives_a_player_their_next_free_candidate():
+    # Player 0 takes TM row 0; player 1 wanted row 0 too but row 1 is still free
+    pairs = pd.DataFrame({"left_row": [0, 1, 1], "right_row": [0, 0, 1], "confidence": [0.95, 0.9, 0.8]})
+    matches = best_one_to_one(pairs)
+    assert sorted(zip(matches["left_row"], matches["right_row"])) == [(0, 0), (1, 1)]
+
+
+def test_one_to_one_prefers_the_stronger_claim():
+    # Greedy by confidence: row 0 goes to player 1 (0.9), player 0 falls back to row 1
+    pairs = pd.DataFrame({"left_row": [0, 0, 1], "right_row": [0, 1, 0], "confidence": [0.85, 0.8, 0.9]})
+    matches = best_one_to_one(pairs)
+    assert sorted(zip(matches["left_row"], matches["right_row"])) == [(0, 1), (1, 0)]
+
+
+def test_rows_matched_exactly_by_filtered_players_stay_taken():
+    # "martin saka 12" plays too little to be kept but matched its TM row exactly;
+    # "martin saka 125" has no TM row and must not take that one
+    from data_join import merge_transfermarkt
+
+    base = block(["Martin Saka 12", "Martin Saka 125"], ["Arsenal", "Arsenal"])
+    base["nineties"] = [5.0, 20.0]
+    tm = block(["Martin Saka 12"], ["Arsenal"])
+    tm["position"] = "MF"
+    tm["market_value_eur"] = 5e6
+    tm["market_value_millions"] = 5.0
+
+    out = merge_transfermarkt(base, tm, resolve_entities=True)
+    assert out["player_name"].tolist() == ["Martin Saka 125"]
+    assert out["market_value_eur"].isna().all()
+    assert out["tm_match_method"].isna().all()
@@ -0,0 +1,78 @@
+import shutil
+
+import pandas as pd
+import pytest
+
+import data_join
+import data_transform
+import loader
+import keys
+from incremental import FBREF_TABLES, run_incremental
+from pipeline import CLEAN_STAGES, timed
+from synthetic import write_exports
+
+
+def run(raw_paths, cache_dir):
+    _, _, status = run_incremental(raw_paths, CLEAN_STAGES, "2024-25", "Premier League",
+                                   cache_dir=str(cache_dir), timed=timed, timings={})
+    return status
+
+
+@pytest.fixture
+def raw_paths(tmp_path):
+    return write_exports(200, str(tmp_path / "raw"))
+
+
+def edited_copy(module, tmp_path, monkeypatch):
+    """Point module.__file__ at a copy of its source with one more line."""
+    copy = tmp_path / f"{module.__name__}_edited.py"
+    shutil.copy(module.__file__, copy)
+    with open(copy, "a", encoding="utf-8") as f:
+        f.write("\n# edited\n")
+    monkeypatch.setattr(module, "__file__", str(copy))
+
+
+def test_unchanged_inputs_are_served_from_cache(raw_paths, tmp_path):
+    assert set(run(raw_paths, tmp_path / "cache").values()) == {"recomputed"}
+    assert set(run(raw_paths, tmp_path / "cache").values()) == {"cached"}
+
+
+def test_editing_loader_invalidates_clean_stages(raw_paths, tmp_path, monkeypatch):
+    run(raw_paths, tmp_path / "cache")
+    edited_copy(loader, tmp_path, monkeypatch)
+    status = run(raw_paths, tmp_path / "cache")
+    assert all(state == "recomputed" for stage, state in status.items() if stage.startswith("clean:"))
+
+
+def test_editing_keys_invalidates_the_score_stages(raw_paths, tmp_path, monkeypatch):
+    run(raw_paths, tmp_path / "cache")
+    edited_copy(keys, tmp_path, monkeypatch)
+    status = run(raw_paths, tmp_path / "cache")
+    assert status["fbref_scored"] == "recomputed"
+    assert status["final"] == "recomputed"
+
+
+def misspell_transfermarkt(path):
+    """Drop the last character of some Transfermarkt names so the exact join misses them."""
+    tm = pd.read_csv(path)
+    rows = tm.index[::6]
+    tm.loc[rows, "Name"] = tm.loc[rows, "Name"].str[:-1]
+    tm.to_csv(path, index=False)
+
+
+@pytest.mark.parametrize("resolve_entities", [False, True])
+def test_incremental_run_equals_the_full_run(tmp_path, resolve_entities):
+    # namesakes in a larger league give goalkeepers' Transfermarkt rows fuzzy rivals
+    raw_paths = write_exports(2000, str(tmp_path / "raw"))
+    misspell_transfermarkt(raw_paths["transfermarkt"])
+    clean = {table: clean_table(load(raw_paths[table]))
+             for table, (_, load, clean_table, _) in CLEAN_STAGES.items()}
+    joined = data_join.join_tables(*[clean[t] for t in FBREF_TABLES], clean["transfermarkt"], resolve_entities)
+    expected = data_transform.transform(joined)
+
+    final, _, _ = run_incremental(raw_paths, CLEAN_STAGES, "2024-25", "Premier League",
+                                  cache_dir=str(tmp_path / "cache"), timed=timed, timings={},
+                                  resolve_entities=resolve_entities)
+    if resolve_entities:
+        assert (expected["tm_match_method"] == "fuzzy").any()
+    pd.testing.assert_frame_equal(final, expected)
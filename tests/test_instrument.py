@@ -0,0 +1,50 @@
+import os
+
+from instrument import RUN_LOG_ENV, RunLog, read_runs
+
+
+def test_standalone_scripts_log_only_when_asked(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv(RUN_LOG_ENV, raising=False)
+    with RunLog.from_env("data_join.py") as run:
+        with run.stage("join"):
+            pass
+    assert os.listdir(tmp_path) == []
+
+    monkeypatch.setenv(RUN_LOG_ENV, str(tmp_path / "log.jsonl"))
+    with RunLog.from_env("data_join.py") as run:
+        with run.stage("join"):
+            pass
+    assert len(read_runs(str(tmp_path / "log.jsonl"))) == 1
+
+
+def touch(mb):
+    block = bytearray(mb * 1024 ** 2)
+    block[::4096] = b"x" * len(block[::4096])
+    return block
+
+
+def test_stages_record_their_own_rss_change_and_peak(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    with RunLog("test", path) as run:
+        with run.stage("allocate"):
+            block = touch(64)
+        with run.stage("spike"):
+            with run.stage("inner"):
+                touch(128)
+        del block
+        with run.stage("idle"):
+            pass
+    records = {r["stage"]: r for r in next(iter(read_runs(path).values()))}
+    assert records["idle"]["rss_process_peak_mb"] >= records["spike"]["rss_process_peak_mb"]
+    if records["allocate"]["rss_delta_mb"] is None:         # no /proc: not measured
+        return
+    assert records["allocate"]["rss_delta_mb"] >= 60
+    assert abs(records["idle"]["rss_delta_mb"]) < 60
+    if records["idle"]["rss_peak_mb"] is None:              # kernel without clear_refs
+        return
+    spike = records["spike"]["rss_peak_mb"]
+    assert spike >= records["spike/inner"]["rss_peak_mb"] >= records["allocate"]["rss_peak_mb"] + 60
+    assert abs(records["spike"]["rss_delta_mb"]) < 60           # freed again before the stage ended
+    assert records["idle"]["rss_peak_mb"] < spike - 100         # a later stage has its own peak
+    assert records["<run>"]["rss_process_peak_mb"] >= spike
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_join import align_left, chained_left_join, fbref_display_cols, tm_cols
+from pipeline import CLEAN_STAGES
+from synthetic import write_exports
+
+
+@pytest.fixture(scope="module")
+def clean_tables(tmp_path_factory):
+    paths = write_exports(300, str(tmp_path_factory.mktemp("raw")), seed=3)
+    return {table: clean(load(paths[table])) for table, (_, load, clean, _) in CLEAN_STAGES.items()}
+
+
+def rights(clean, duplicate_keys=False):
+    rng = np.random.default_rng(0)
+    out = []
+    for table, suffix in [("passing", "_pass"), ("defense", "_def"), ("possession", "_poss")]:
+        right = clean[table].drop(columns=fbref_display_cols, errors="ignore")
+        # some players missing from each right table, the rest in another order
+        right = right.iloc[rng.permutation(len(right))[: len(right) - 20]]
+        out.append((right, suffix))
+    tm = clean["transfermarkt"][tm_cols].copy()
+    tm.loc[tm.index[:3], "club_key"] = np.nan             # NaN keys match NaN keys, as in merge
+    out.append((tm, "_tm"))
+    if duplicate_keys:
+        right, suffix = out[1]
+        out[1] = (pd.concat([right, right.iloc[:5]]), suffix)
+    return out
+
+
+@pytest.mark.parametrize("duplicate_keys", [False, True])
+def test_align_left_equals_the_chained_merge(clean_tables, duplicate_keys):
+    left = clean_tables["shooting"].copy()
+    left.loc[left.index[:3], "club_key"] = np.nan
+    tables = rights(clean_tables, duplicate_keys)
+
+    expected = left
+    for right, suffix in tables:
+        expected = expected.merge(right, on=["player_key", "club_key", "season", "league"],
+                                  how="left", suffixes=("", suffix))
+    got = align_left(left, tables)
+    pd.testing.assert_frame_equal(got, expected)
+    pd.testing.assert_frame_equal(chained_left_join(left, tables), expected)
+    if duplicate_keys:
+        assert len(got) == len(left) + 5
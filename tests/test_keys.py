@@ -0,0 +1,39 @@
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from keys import CLUB_MAP_FBREF_TO_CANON, normalize_keys, standardize_clubs
+
+
+def normalize_name(s):
+    """The per-row key function the cleaners applied before keys.py."""
+    if pd.isna(s):
+        return ""
+    s = str(s).strip().lower()
+    return "".join(c for c in unicodedata.normalize("NFKD", s) if not unicodedata.combining(c))
+
+
+def standardize_club_fbref(club):
+    if pd.isna(club):
+        return club
+    club = str(club).strip()
+    return CLUB_MAP_FBREF_TO_CANON.get(club, club)
+
+
+NAMES = ["Martin Ødegaard", "  Gabriel Martinelli ", "Raúl Jiménez", "Raul Jimenez", "Son Heung-min",
+         "Dominik Szoboszlai", "Joško Gvardiol", "Ibrahima Konaté", "Ñíguez", "ŁUKASZ FABIAŃSKI",
+         np.nan, None, "", "Raúl Jiménez"]
+
+
+def test_normalize_keys_equals_the_per_row_function():
+    for names in (pd.Series(NAMES, dtype=object), pd.Series(NAMES, dtype="str")):
+        assert normalize_keys(names).tolist() == names.apply(normalize_name).tolist()
+
+
+def test_standardize_clubs_equals_the_per_row_function():
+    clubs = pd.Series(["Manchester City", " Manchester Utd", "Arsenal", np.nan, "Nott'ham Forest",
+                       "Newcastle Utd", "Arsenal"], dtype=object)
+    got, expected = standardize_clubs(clubs), clubs.apply(standardize_club_fbref)
+    assert got.isna().tolist() == expected.isna().tolist()
+    assert got.dropna().tolist() == expected.dropna().tolist()
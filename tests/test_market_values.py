@@ -0,0 +1,48 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from data_clean_tnsfmkt import parse_market_values
+
+
+def parse_market_value(v):
+    """The per-row parser data_clean_tnsfmkt.py applied before parse_market_values."""
+    if pd.isna(v):
+        return None
+    s = str(v).strip().lower()
+    s = s.replace("€", "").replace(",", "").strip()
+    multiplier = 1.0
+    if s.endswith("m"):
+        multiplier = 1e6
+        s = s[:-1]
+    elif s.endswith("k"):
+        multiplier = 1e3
+        s = s[:-1]
+    s = re.sub(r"[^0-9.]", "", s)
+    if not s:
+        return None
+    try:
+        return float(s) * multiplier
+    except ValueError:
+        return None
+
+
+def test_parser_equals_the_per_row_parser():
+    rng = np.random.default_rng(0)
+    generated = ([f"€{x:.2f}m" for x in rng.uniform(0, 200, 500)]
+                 + [f"€{int(x)}k" for x in rng.uniform(25, 999, 500)])
+    values = pd.Series(generated + ["€150.00m", " €10.00M ", "€800k", "€1,500k", "1200000", "-", "", "  ",
+                                    None, np.nan, "€1.2.3m", "n/a", "€"], dtype=object)
+    euros, counts = parse_market_values(values)
+    expected = values.apply(parse_market_value).astype("float64")
+    np.testing.assert_array_equal(euros.to_numpy(), expected.to_numpy())
+    assert counts == {"parsed": int(expected.notna().sum()), "missing": 6, "malformed": 2}
+
+
+def test_billions_keep_their_suffix():
+    # the per-row parser dropped 'bn' and read '€1.5bn' as 1.5 euros
+    euros, counts = parse_market_values(pd.Series(["€1.5bn", "€1.50bn", "-", ""]))
+    np.testing.assert_array_equal(euros.to_numpy(), [1.5e9, 1.5e9, np.nan, np.nan])
+    assert counts == {"parsed": 2, "missing": 2, "malformed": 0}
+    assert parse_market_value("€1.5bn") == 1.5
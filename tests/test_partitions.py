@@ -0,0 +1,89 @@
+import pandas as pd
+import pytest
+
+from batch import discover, run_batch
+import storage
+from history import HistoryStore, player_ids
+from synthetic import write_exports
+
+pytest.importorskip("pyarrow")
+
+
+def test_batch_output_reads_back_as_a_dataset(tmp_path):
+    for league, season in [("Premier League", "2024-25"), ("La Liga", "2024-25")]:
+        write_exports(300, str(tmp_path / "raw" / league / season), seed=len(league))
+    results = run_batch(str(tmp_path / "raw"), str(tmp_path / "out"), fmt="parquet", workers=1, score=True)
+    scored = sum(rows for stage, _, rows in results if stage == "score")
+
+    final = pd.read_parquet(tmp_path / "out" / "final")
+    assert len(final) == scored
+    assert set(final["league"].astype(str)) == {"Premier League", "La Liga"}
+    assert set(final["season"].astype(str)) == {"2024-25"}
+    assert len(pd.read_parquet(tmp_path / "out" / "shooting")) > 0
+
+
+def test_history_store_reads_back_as_a_dataset(tmp_path):
+    final = pd.DataFrame({
+        "player_name": ["Bukayo Saka", "Martin Odegaard", "Bukayo Saka"],
+        "player_key": ["bukayo saka", "martin odegaard", "bukayo saka"],
+        "born": [2001, 1998, 2001],
+        "season": ["2023-24", "2023-24", "2024-25"],
+        "league": "Premier League",
+        "nineties": [30.0, 28.0, 31.0],
+        "performance_index": [1.2, 0.9, 1.5],
+        "market_value_millions": [120.0, 90.0, 140.0],
+    })
+    store = HistoryStore(str(tmp_path / "history"), "parquet")
+    store.append(final)
+
+    back = pd.read_parquet(tmp_path / "history")
+    assert len(back) == 3
+    assert sorted(back["season"].astype(str)) == ["2023-24", "2023-24", "2024-25"]
+    saka = store.player("Bukayo Saka")
+    assert saka["season"].tolist() == ["2023-24", "2024-25"]
+    assert saka["performance_index"].tolist() == [1.2, 1.5]
+
+
+def test_two_exports_of_one_partition_are_rejected(tmp_path):
+    season = tmp_path / "raw" / "league=Premier League" / "season=2024-25"
+    write_exports(50, str(season))
+    assert len(discover(str(tmp_path / "raw"))) == 5
+
+    (season / "EPL_Shooting_1.csv").write_bytes((season / "EPL_Shooting.csv").read_bytes())
+    with pytest.raises(ValueError, match="shooting of Premier League 2024-25"):
+        discover(str(tmp_path / "raw"))
+    with pytest.raises(ValueError):
+        run_batch(str(tmp_path / "raw"), str(tmp_path / "out"), workers=1)
+    assert not (tmp_path / "out").exists()
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet", "arrow"])
+def test_history_lookup_round_trips_two_seasons(tmp_path, monkeypatch, final_table, fmt):
+    monkeypatch.setattr(storage, "ROW_GROUP_ROWS", 64)     # several Parquet row groups per partition
+    older = final_table.assign(season="2023-24", performance_index=final_table["performance_index"] - 0.5)
+    newer = final_table.assign(season="2024-25").sample(frac=1.0, random_state=1)
+    store = HistoryStore(str(tmp_path / "history"), fmt)
+    store.append(older)
+    store.append(newer)
+
+    # lookups read only the indexed rows, never a whole partition
+    store = HistoryStore(str(tmp_path / "history"), fmt)
+    store.index()
+    monkeypatch.setattr(storage, "read_table", None)
+
+    for pos in [0, 7, len(final_table) - 1]:
+        player_id = player_ids(final_table.iloc[[pos]]).iloc[0]
+        rows = store.lookup(player_id)
+        expected = pd.concat([older.iloc[[pos]], newer.loc[[final_table.index[pos]]]])
+        expected = expected.assign(player_id=player_id)[list(rows.columns)]
+        mine = rows[rows["player_name"] == final_table["player_name"].iloc[pos]]
+        assert mine["season"].tolist() == ["2023-24", "2024-25"]
+        pd.testing.assert_frame_equal(mine.reset_index(drop=True), expected.reset_index(drop=True),
+                                      check_dtype=False, check_exact=False)
+        assert store.lookup(player_id, start="2024-25")["season"].tolist() == ["2024-25"] * (len(rows) // 2)
+
+
+def test_player_ids_keep_same_year_namesakes_of_other_nations_apart():
+    df = pd.DataFrame({"player_name": ["Danilo", "Danilo", "Danilo"], "born": [2001, 2001, 1991],
+                       "nation_code": ["BRA", "POR", "BRA"]})
+    assert player_ids(df).tolist() == ["danilo|2001|BRA", "danilo|2001|POR", "danilo|1991|BRA"]
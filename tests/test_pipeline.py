@@ -0,0 +1,30 @@
+import numpy as np
+
+import data_transform
+from aggregates import write_cube
+from pipeline import run_pipeline
+from reference import Reference, fit_reference
+from synthetic import write_exports
+
+
+def test_pipeline_saves_the_reference_data_transform_fits(tmp_path, joined_table):
+    raw_paths = write_exports(400, str(tmp_path / "raw"))
+    reference_path = str(tmp_path / "epl_reference.npz")
+    run_pipeline(raw_paths, str(tmp_path / "final.csv"), reference_path=reference_path, cube_path="")
+
+    scored = data_transform.score_performance(joined_table)
+    expected = fit_reference(scored, data_transform.feature_stats(scored))
+    saved = Reference.load(reference_path)
+    assert saved.stats == expected.stats
+    for col, groups in expected.distributions.items():
+        for group, values in groups.items():
+            np.testing.assert_array_equal(saved.distributions[col][group], values)
+
+
+def test_pipeline_saves_the_report_cube(tmp_path, final_table):
+    raw_paths = write_exports(400, str(tmp_path / "raw"))
+    cube_path = str(tmp_path / "epl_player_cube.csv")
+    run_pipeline(raw_paths, str(tmp_path / "final.csv"), reference_path="", cube_path=cube_path)
+
+    write_cube(final_table, str(tmp_path / "expected.csv"))
+    assert (tmp_path / "epl_player_cube.csv").read_text() == (tmp_path / "expected.csv").read_text()
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from query import Query
+
+pytest.importorskip("pyarrow")
+
+ROWS = 3_000
+
+
+def final_table(path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "player_name": [f"player {i}" for i in range(ROWS)],
+        "season": "2024-25",
+        "age": rng.integers(17, 36, ROWS),
+        "nineties": rng.uniform(5, 38, ROWS).round(1),
+        "valuation_category": rng.choice(["Overvalued", "Fair Value", "Undervalued"], ROWS),
+        # Transfermarkt columns are empty for the first rows, then text
+        "club_tm": [None] * (ROWS // 2) + ["Arsenal"] * (ROWS - ROWS // 2),
+        "player_name_tm": [None] * (ROWS // 2) + [f"tm {i}" for i in range(ROWS - ROWS // 2)],
+    })
+    df.to_csv(path, index=False, encoding="utf-8-sig")
+    return df
+
+
+def test_csv_export_to_parquet_keeps_one_schema(tmp_path):
+    df = final_table(tmp_path / "final.csv")
+    out = tmp_path / "export.parquet"
+    rows = Query(str(tmp_path / "final.csv")).export(str(out), batch_rows=500)
+    assert rows == ROWS
+    back = pd.read_parquet(out)
+    assert back["club_tm"].tolist() == df["club_tm"].tolist()
+    assert back["player_name_tm"].dropna().tolist() == df["player_name_tm"].dropna().tolist()
+
+
+def test_csv_batches_share_dtypes(tmp_path):
+    final_table(tmp_path / "final.csv")
+    batches = list(Query(str(tmp_path / "final.csv")).iter_batches(500))
+    assert len({tuple(b.dtypes.astype(str)) for b in batches}) == 1
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_prime_targets_match_a_full_read(tmp_path, fmt):
+    df = final_table(tmp_path / "final.csv")
+    path = tmp_path / f"final.{fmt}"
+    if fmt == "parquet":
+        df.to_parquet(path, index=False, row_group_size=500)
+    got = Query(str(path)).preset("prime_targets").select("player_name", "age").to_pandas()
+    want = df[(df["valuation_category"] == "Undervalued") & (df["age"] < 28) & (df["nineties"] >= 16.7)]
+    assert got["player_name"].tolist() == want["player_name"].tolist()
+    assert list(got.columns) == ["player_name", "age"]
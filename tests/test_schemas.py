@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from schemas import TableSchema
+
+
+def coerce(values):
+    schema = TableSchema("test_coerce", {"Gls": "goals"}, ["goals"])
+    df = pd.DataFrame({"goals": pd.Series(values, dtype=object)})
+    report = schema.coerce(df)
+    return df["goals"], report
+
+
+def test_dtypes_match_to_numeric():
+    for values in (["5", "6"], ["5.0", "6"], ["1e1", "2"], ["5", None], [" 7", "+3"]):
+        got, _ = coerce(values)
+        want = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce")
+        assert got.dtype == want.dtype, values
+        np.testing.assert_array_equal(got.to_numpy(), want.to_numpy())
+
+
+def test_float_text_stays_float():
+    got, _ = coerce(["5.0", "3.0"])
+    assert got.dtype == "float64"
+    assert got.astype(str).tolist() == ["5.0", "3.0"]
+
+
+def test_unparseable_and_out_of_range_values_are_counted():
+    got, report = coerce(["5", "n/a", "-2"])
+    assert np.isnan(got.iloc[1])
+    assert report["goals"] == {"coerced": 1, "out_of_range": 1}
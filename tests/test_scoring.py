@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from scoring import SCORE_FEATURES, performance_index
+
+
+def calculate_index(row):
+    """The per-row formula data_transform.py applied before the weight matrix."""
+    pg = row.get("position_group", "")
+    att = row["z_raw_attacking"]
+    prog = row["z_raw_progression"]
+    creat = row["z_raw_creation"]
+    defs = row["z_raw_defensive"]
+    mistakes = row["z_raw_mistakes"]
+    if pg == "FW":
+        score = (0.50 * att) + (0.15 * prog) + (0.25 * creat) + (0.10 * defs) - (0.15 * mistakes)
+    elif pg == "MF":
+        score = (0.15 * att) + (0.35 * prog) + (0.25 * creat) + (0.25 * defs) - (0.15 * mistakes)
+    elif pg == "DF":
+        score = (0.05 * att) + (0.20 * prog) + (0.05 * creat) + (0.70 * defs) - (0.15 * mistakes)
+    else:
+        score = att + prog + creat + defs - mistakes
+    return score
+
+
+def test_default_weights_equal_the_per_row_formula():
+    rng = np.random.default_rng(0)
+    n = 5000
+    df = pd.DataFrame(rng.normal(size=(n, len(SCORE_FEATURES))), columns=SCORE_FEATURES)
+    df["position_group"] = rng.choice(np.array(["FW", "MF", "DF", "GK", None], dtype=object), n)
+    df.loc[::97, "z_raw_creation"] = np.nan
+
+    expected = df.apply(calculate_index, axis=1)
+    np.testing.assert_array_equal(performance_index(df).to_numpy(), expected.to_numpy())
+
+
+def test_default_weights_equal_the_per_row_formula_on_a_league(final_table):
+    expected = final_table.apply(calculate_index, axis=1)
+    np.testing.assert_array_equal(performance_index(final_table).to_numpy(), expected.to_numpy())
@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+import data_transform
+from reference import fit_reference
+from scoring_service import SCORE_INPUT_COLS, RequestError, ScoringService, parse_request_line, score_players
+
+THRESHOLDS = {
+    "default": {"undervalued": 0.25, "overvalued": -0.15},
+    "Premier League/MF": {"undervalued": -0.05, "overvalued": -0.5},
+}
+
+
+@pytest.fixture(scope="module")
+def reference(joined_table):
+    scored = data_transform.score_performance(joined_table)
+    return fit_reference(scored, data_transform.feature_stats(scored))
+
+
+def payload(rows):
+    cols = SCORE_INPUT_COLS + ["market_value_millions", "position_group", "league", "player_name"]
+    return [{c: (None if isinstance(v, float) and np.isnan(v) else v) for c, v in zip(cols, row)}
+            for row in rows[cols].itertuples(index=False, name=None)]
+
+
+def test_score_uses_the_per_league_position_thresholds(joined_table, reference):
+    rows = joined_table[joined_table["position_group"].isin(["MF", "FW", "DF"])].head(60)
+    want = data_transform.transform(rows, reference=reference, thresholds=THRESHOLDS)
+    got = score_players(reference, payload(rows), THRESHOLDS)
+    assert [p["valuation_category"] for p in got] == want["valuation_category"].tolist()
+    assert any(p["position_group"] == "MF" and p["valuation_category"] == "Undervalued" for p in got)
+
+
+def test_default_league_applies_to_players_sent_without_one(joined_table, reference):
+    rows = joined_table[joined_table["position_group"] == "MF"].head(20)
+    players = payload(rows)
+    for p in players:
+        del p["league"]
+    with_league = score_players(reference, payload(rows), THRESHOLDS)
+    assert score_players(reference, players, THRESHOLDS, league="Premier League") == with_league
+
+
+@pytest.mark.parametrize("position_group", [["MF"], 3, None])
+def test_non_string_position_group_is_a_bad_request(joined_table, reference, position_group):
+    player = payload(joined_table.head(1))[0]
+    player["position_group"] = position_group
+    with pytest.raises(RequestError) as err:
+        score_players(reference, [player])
+    assert err.value.status == 400
+
+
+def test_request_line_keeps_spaces_in_the_target():
+    assert parse_request_line("GET /player?name=Bukayo Saka&club=Arsenal HTTP/1.1\r\n") == (
+        "GET", "/player?name=Bukayo Saka&club=Arsenal", "HTTP/1.1")
+    for line in ["GARBAGE\r\n", "GET /health\r\n", "GET  HTTP/1.1\r\n", "\r\n"]:
+        with pytest.raises(RequestError) as err:
+            parse_request_line(line)
+        assert err.value.status == 400
+
+
+def test_service_answers_malformed_and_unencoded_request_lines(tmp_path, final_table):
+    final_path = str(tmp_path / "final.csv")
+    final_table.to_csv(final_path, index=False, encoding="utf-8-sig")
+    service = ScoringService(final_path, str(tmp_path / "missing.npz"))
+    name = next(n for n in final_table["player_name"] if " " in n and n.isascii())
+
+    async def ask(request: bytes):
+        server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(request)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+        head, _, body = response.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(body)
+
+    status, body = asyncio.run(ask(f"GET /player?name={name} HTTP/1.1\r\nConnection: close\r\n\r\n".encode()))
+    assert status == 200
+    assert name in {p["player_name"] for p in body["players"]}
+    status, body = asyncio.run(ask(b"GARBAGE\r\nHost: x\r\n\r\n"))
+    assert status == 400 and "malformed" in body["error"]
@@ -0,0 +1,44 @@
+import numpy as np
+
+import data_transform
+from scoring import build_weight_matrix
+from sensitivity import config_block, sample_weights, sensitivity
+
+
+def test_block_size_follows_the_player_count():
+    assert config_block(300) == 1024
+    small = config_block(100_000, budget_mb=512)
+    assert 1 <= small < 1024
+    assert small * 100_000 * 8 * 12 <= 512 * 1024 ** 2
+    assert config_block(10 ** 9, budget_mb=1) == 1
+
+
+def test_baseline_weights_reproduce_the_baseline(final_table):
+    groups, matrix = build_weight_matrix()
+    per_config, per_player = sensitivity(final_table, groups, matrix[None])
+    assert per_config["spearman"].iloc[0] == 1.0
+    assert per_config["category_agreement"].iloc[0] == 1.0
+    assert (per_player["category_stability"] == 1.0).all()
+
+
+def test_results_do_not_depend_on_the_block_size(final_table):
+    groups, configs = sample_weights(40, seed=1)
+    a = sensitivity(final_table, groups, configs)
+    b = sensitivity(final_table, groups, configs, block=7)
+    for x, y in zip(a, b):
+        np.testing.assert_array_equal(x.select_dtypes("number"), y.select_dtypes("number"))
+
+
+def test_players_without_a_position_group_are_left_out(joined_table):
+    joined = joined_table.copy()
+    joined["position_group"] = joined["position_group"].astype(object)
+    joined.loc[joined.index[:8], "position_group"] = np.nan
+    final = data_transform.transform(joined)
+    unranked = final["position_group"].isna().to_numpy()
+    assert unranked.any()
+
+    groups, matrix = build_weight_matrix()
+    per_config, per_player = sensitivity(final, groups, matrix[None])
+    assert per_config["category_agreement"].iloc[0] == 1.0
+    assert per_player.loc[unranked, ["category_stability", "perf_rank_pct_min"]].isna().all().all()
+    assert (per_player.loc[~unranked, "category_stability"] == 1.0).all()
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+import similarity
+from scoring import SCORE_FEATURES
+from similarity import SimilarityIndex
+
+
+def brute_force(final, query, k, position_group=None, min_age=None, max_age=None, max_value=None):
+    df = final.dropna(subset=SCORE_FEATURES)
+    keep = np.ones(len(df), dtype=bool)
+    if position_group is not None:
+        keep &= (df["position_group"] == position_group).to_numpy()
+    if min_age is not None:
+        keep &= (df["age"] >= min_age).to_numpy()
+    if max_age is not None:
+        keep &= (df["age"] <= max_age).to_numpy()
+    if max_value is not None:
+        keep &= (df["market_value_millions"] <= max_value).to_numpy()
+    df = df[keep]
+    distance = np.linalg.norm(df[SCORE_FEATURES].to_numpy(dtype="float64") - query, axis=1)
+    order = np.argsort(distance, kind="stable")[:k]
+    return df.iloc[order], distance[order]
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"position_group": "MF"},
+    {"max_age": 25},
+    {"min_age": 22, "max_value": 20.0},
+    {"position_group": "DF", "max_age": 30, "max_value": 40.0},
+])
+def test_search_equals_brute_force(final_table, monkeypatch, tmp_path, filters):
+    monkeypatch.setattr(similarity, "BLOCK_ROWS", 17)      # many blocks and running top-k merges
+    built = SimilarityIndex.build(final_table)
+    built.save(str(tmp_path / "index.npz"))
+    index = SimilarityIndex.load(str(tmp_path / "index.npz"))
+
+    rng = np.random.default_rng(0)
+    for query in rng.normal(size=(5, len(SCORE_FEATURES))):
+        expected, distance = brute_force(final_table, query, 8, **filters)
+        got = index.search(query, 8, **filters)
+        np.testing.assert_allclose(got["distance"], distance, rtol=1e-9, atol=1e-9)
+        assert got["player_key"].tolist() == expected["player_key"].astype(str).tolist()
@@ -0,0 +1,30 @@
+import pandas as pd
+import pytest
+
+from storage import read_table, write_table
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.mark.parametrize("ext", [".parquet", ".arrow"])
+def test_columnar_round_trip_equals_csv(tmp_path, joined_table, ext):
+    write_table(joined_table, str(tmp_path / "joined.csv"))
+    write_table(joined_table, str(tmp_path / f"joined{ext}"))
+    from_csv = read_table(str(tmp_path / "joined.csv"))
+    columnar = read_table(str(tmp_path / f"joined{ext}"))
+    pd.testing.assert_frame_equal(columnar, joined_table.reset_index(drop=True))
+    pd.testing.assert_frame_equal(columnar.astype(object).where(columnar.notna(), None),
+                                  from_csv.astype(object).where(from_csv.notna(), None),
+                                  check_dtype=False)
+
+
+@pytest.mark.parametrize("ext", [".csv", ".parquet", ".arrow"])
+def test_filtered_reads_equal_filtering_after(tmp_path, final_table, ext):
+    path = str(tmp_path / f"final{ext}")
+    write_table(final_table, path)
+    got = read_table(path, columns=["player_name", "performance_index"], position_group=["MF", "DF"])
+    expected = final_table[final_table["position_group"].isin(["MF", "DF"])]
+    assert got.columns.tolist() == ["player_name", "performance_index"]
+    assert got["player_name"].tolist() == expected["player_name"].tolist()
+    pd.testing.assert_series_equal(got["performance_index"].reset_index(drop=True),
+                                   expected["performance_index"].reset_index(drop=True), check_dtype=False)
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline import CLEAN_STAGES
+from streaming import RAW_SCHEMAS, stream_clean
+from synthetic import FBREF_TABLES, fbref_table, players, transfermarkt_table, write_fbref
+
+
+def write_raw(table: str, path: str, n: int = 300):
+    """A raw export whose integer stat columns and market values only have blanks in the last rows."""
+    people = players(n)
+    if table == "transfermarkt":
+        df = transfermarkt_table(people)
+        df.loc[df.index[-2:], "Value"] = ["", "-"]
+        df.to_csv(path, index=False, encoding="utf-8")
+        return
+    rename_map, numeric_cols = RAW_SCHEMAS[table]
+    df = fbref_table(people, table)
+    raw_numeric = [raw for raw, clean in rename_map.items() if clean in numeric_cols and raw in df.columns]
+    rng = np.random.default_rng(1)
+    for col in raw_numeric[1:4]:
+        df[col] = rng.integers(0, 30, len(df)).astype(object)
+        df.loc[df.index[-1], col] = None
+    write_fbref(df, path, FBREF_TABLES[table][2])
+
+
+@pytest.mark.parametrize("table", list(CLEAN_STAGES))
+def test_streamed_output_is_byte_identical(tmp_path, table):
+    raw = str(tmp_path / "raw.csv")
+    write_raw(table, raw)
+    _, load, clean, _ = CLEAN_STAGES[table]
+    clean(load(raw)).to_csv(tmp_path / "batch.csv", index=False, encoding="utf-8-sig")
+
+    rows = stream_clean(table, raw, str(tmp_path / "stream.csv"), chunksize=37)
+    assert rows == len(pd.read_csv(tmp_path / "batch.csv"))
+    assert (tmp_path / "stream.csv").read_bytes() == (tmp_path / "batch.csv").read_bytes()
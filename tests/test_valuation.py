@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from valuation import CATEGORIES, categorize_players, sweep, threshold_grid
+
+OVERRIDES = {
+    "default": {"undervalued": 0.25, "overvalued": -0.15},
+    "La Liga": {"undervalued": 0.3, "overvalued": -0.2},
+    "*/DF": {"undervalued": 0.2, "overvalued": -0.1},
+    "La Liga/DF": {"undervalued": 0.1, "overvalued": 0.15},       # lower above upper
+}
+
+
+def categorize_valuation(delta):
+    """The per-row rule data_transform.py applied before valuation.py."""
+    if delta > 0.25:
+        return "Undervalued"
+    if delta < -0.15:
+        return "Overvalued"
+    return "Fair Value"
+
+
+@pytest.fixture(scope="module")
+def players():
+    rng = np.random.default_rng(0)
+    n = 3000
+    delta = rng.choice(np.r_[rng.uniform(-1, 1, 200), [0.25, -0.15, 0.2, -0.1, 0.1, 0.15, 0.3, -0.2]], n)
+    delta[::41] = np.nan
+    return pd.DataFrame({
+        "undervaluation_delta": delta,
+        "league": rng.choice(np.array(["Premier League", "La Liga", None], dtype=object), n),
+        "position_group": rng.choice(np.array(["FW", "MF", "DF", "Other", None], dtype=object), n),
+    })
+
+
+def test_default_categories_equal_the_per_row_rule(players):
+    expected = players["undervaluation_delta"].apply(categorize_valuation)
+    assert categorize_players(players).tolist() == expected.tolist()
+
+
+@pytest.mark.parametrize("by", [None, "position_group", "league"])
+def test_sweep_counts_equal_categorize_players(players, by):
+    configs = threshold_grid([0.2, 0.25], [-0.15, 0.3]) + [OVERRIDES]
+    result = sweep(players, configs, by=by)
+    for i, cfg in enumerate(configs):
+        labels = categorize_players(players, cfg)
+        rows = result[result["config"] == i]
+        if by is None:
+            expected = {"all": labels.value_counts()}
+        else:
+            keys = players[by].fillna("<NA>")
+            expected = {k: labels[keys == k].value_counts() for k in keys.unique()}
+        got_keys = rows[by].fillna("<NA>") if by else pd.Series(["all"] * len(rows), index=rows.index)
+        assert set(got_keys) == set(expected)
+        for key, (_, row) in zip(got_keys, rows.iterrows()):
+            for label in CATEGORIES:
+                assert row[label] == expected[key].get(label, 0), (i, key, label)